@@ -0,0 +1,205 @@
+"""Benchmarks for the simulation and render hot paths.
+
+Times each subsystem per tick and sweeps entity counts well past the
+create_level caps. Results can be saved as a baseline and later runs compared
+against it; a drop beyond the tolerance exits non-zero.
+
+    python bench.py --save baseline.json
+    python bench.py --compare baseline.json --tolerance 0.2
+    python bench.py --gl             # add render timings on an offscreen llvmpipe context
+    python bench.py --memory         # tracemalloc allocations per tick instead of timings
+    python bench.py --agents 1000    # every scenario in multi-agent mode
+"""
+import argparse, json, random, sys, time, tracemalloc
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Cyber Heist subsystems.")
+    parser.add_argument('--quick', action='store_true', help="smaller sweep and shorter timings")
+    parser.add_argument('--gl', action='store_true', help="also time GLBackend rendering offscreen (EGL)")
+    parser.add_argument('--min-time', type=float, default=0.25, help="seconds spent timing each measurement")
+    parser.add_argument('--save', help="write results as a JSON baseline")
+    parser.add_argument('--compare', help="compare against a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument('--memory', action='store_true', help="report tracemalloc allocations per tick and frame")
+    parser.add_argument('--agents', type=int, default=1, help="agents per scenario (multi-agent mode when > 1)")
+    return parser.parse_args(argv)
+
+ARGS = parse_args() if __name__ == '__main__' else None
+if ARGS and ARGS.gl:
+    import offscreen
+    CONTEXT = offscreen.create_context(1024, 768)
+
+import game
+from game import Game, Laser, NullBackend, SecurityCamera, Wall
+
+LASER_TYPES = ('horizontal_fixed', 'vertical_fixed', 'rotating', 'sliding')
+DEFAULT_COUNTS = {'cameras': 8, 'lasers': 8, 'walls': 7}
+
+def build_scenario(cameras, lasers, walls, seed=0, agents=1):
+    rng = random.Random(seed)
+    scenario = Game(headless=True, verbose=False, seed=seed, agents=agents)
+    outer = [Wall(0, 1.5, -10, 20, 3, 1), Wall(0, 1.5, 10, 20, 3, 1), Wall(-10, 1.5, 0, 1, 3, 20), Wall(10, 1.5, 0, 1, 3, 20)]
+    scenario.walls = outer + [Wall(rng.uniform(-9, 9), 1.5, rng.uniform(-9, 9), rng.uniform(0.3, 3), 3, rng.uniform(0.3, 3))
+                              for _ in range(max(0, walls - len(outer)))]
+    scenario.cameras = [SecurityCamera(rng.uniform(-9, 9), rng.uniform(-9, 9), rng.choice((1, -1))) for _ in range(cameras)]
+    for camera in scenario.cameras:
+        camera.angle = rng.uniform(0, 6.28)
+        camera.rotation_timer = rng.uniform(0, camera.rotation_interval)
+        camera.detection_threshold = float('inf')
+    scenario.lasers = []
+    for _ in range(lasers):
+        x, z = rng.uniform(-9, 9), rng.uniform(-9, 9)
+        scenario.lasers.append(Laser(x, z, x + rng.uniform(-2, 2), z + rng.uniform(-2, 2), rng.choice(LASER_TYPES)))
+    scenario.rebuild_level_caches()
+    bake_occlusion(scenario)
+    return scenario
+
+def bake_occlusion(scenario):
+    # Occlusion maps bake lazily on first sight; bake them up front so per-tick
+    # numbers measure the steady state. Baking is timed separately.
+    for camera in scenario.cameras:
+        if camera.occlusion_map is not None:
+            camera.occlusion_map.bake()
+
+def drive(scenario):
+    # Deterministic wandering input, and no game over: benchmarks want every
+    # tick to take the full path. Extra agents share eight offset patterns.
+    tick, keys = scenario.clock.ticks, scenario.keys
+    keys[b'w'], keys[b'a'], keys[b' '] = tick % 240 < 200, tick % 90 < 20, tick % 150 == 0
+    scenario.state, scenario.start_time = 'playing', scenario.clock.time
+    agents = scenario.agents
+    if agents is not None:
+        if not hasattr(agents, 'patterns'):
+            agents.patterns = [{} for _ in range(8)]
+            agents.keys[1:] = [agents.patterns[i % 8] for i in range(1, agents.count)]
+        for offset, pattern in enumerate(agents.patterns):
+            t = tick + offset * 37
+            pattern[b'w'], pattern[b'a'], pattern[b'd'] = t % 240 < 200, t % 90 < 20 - offset, t % 70 < offset
+        agents.alive[:] = True
+
+def subsystems(scenario, gl_backend=None):
+    null_backend = NullBackend()
+    def tick():
+        drive(scenario)
+        scenario.update()
+    def phase(method):
+        def run():
+            drive(scenario)
+            scenario.clock.advance()
+            method()
+        return run
+    def bake():
+        scenario.rebuild_level_caches()
+        bake_occlusion(scenario)
+    runs = {'tick': tick, 'player': phase(scenario.update_player), 'cameras': phase(scenario.update_cameras),
+            'lasers': phase(scenario.update_lasers), 'render_null': lambda: scenario.render(null_backend),
+            'level_caches': bake}
+    if gl_backend is not None:
+        from OpenGL.GL import glFinish
+        runs['render_gl'] = lambda: (scenario.render(gl_backend), glFinish())
+    return runs
+
+def measure(run, min_time):
+    run()
+    iterations, start = 0, time.perf_counter()
+    while True:
+        run()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return iterations / elapsed
+
+def allocations(run, ticks=600, warmup=120):
+    # Bytes allocated per call as seen by tracemalloc: the transient high-water
+    # mark above the starting point, and what stays allocated afterwards.
+    for _ in range(warmup):
+        run()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    transient = 0
+    for _ in range(ticks):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        run()
+        current, peak = tracemalloc.get_traced_memory()
+        transient += peak - before
+    tracemalloc.stop()
+    return transient / ticks, (current - start) / ticks
+
+def run_memory(args):
+    ticks = 200 if args.quick else 600
+    for name, counts in sweeps(args.quick):
+        runs = subsystems(build_scenario(**counts, agents=args.agents))
+        rows = []
+        for subsystem in ('tick', 'player', 'cameras', 'lasers', 'render_null'):
+            transient, retained = allocations(runs[subsystem], ticks)
+            rows.append(f"{subsystem} {transient:,.0f}/{retained:,.1f}")
+        print(f"{name:>16}  " + "  ".join(rows), flush=True)
+
+def sweeps(quick):
+    counts = [64, 256] if quick else [64, 256, 1024]
+    yield 'default', dict(DEFAULT_COUNTS)
+    for kind in ('cameras', 'lasers', 'walls'):
+        for count in counts:
+            yield f"{kind}={count}", dict(DEFAULT_COUNTS, **{kind: count})
+
+def run_benchmarks(args):
+    gl_backend = None
+    if args.gl:
+        gl_backend = game.GLBackend(swap_buffers=False, glut_shapes=False, font=None)
+    min_time = args.min_time / 2 if args.quick else args.min_time
+    results = {}
+    for name, counts in sweeps(args.quick):
+        scenario = build_scenario(**counts, agents=args.agents)
+        if gl_backend is not None:
+            scenario.init_opengl()
+        results[name] = {}
+        for subsystem, run in subsystems(scenario, gl_backend).items():
+            results[name][subsystem] = measure(run, min_time)
+        null_backend = NullBackend()
+        scenario.render(null_backend)
+        null_backend.reset_stats()
+        scenario.render(null_backend)
+        results[name]['render_calls'] = null_backend.calls
+        print(f"{name:>16}  " + "  ".join(f"{key} {value:,.0f}" + ("" if key == 'render_calls' else "/s")
+                                          for key, value in results[name].items()), flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, measurements in baseline.items():
+        for subsystem, base in measurements.items():
+            current = results.get(name, {}).get(subsystem)
+            if current is None:
+                continue
+            if subsystem == 'render_calls':
+                regressed = current > base * (1 + tolerance)
+            else:
+                regressed = current < base * (1 - tolerance)
+            if regressed:
+                regressions.append(f"{name} {subsystem}: {base:,.0f} -> {current:,.0f}")
+    return regressions
+
+def main(args):
+    if args.memory:
+        print("bytes per tick or frame, transient/retained (tracemalloc)")
+        run_memory(args)
+        return
+    print("throughput per second (ticks, frames, or level cache rebuilds) and render calls per frame")
+    results = run_benchmarks(args)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("no regressions against " + args.compare)
+
+if __name__ == '__main__':
+    main(ARGS)
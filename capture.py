@@ -0,0 +1,165 @@
+"""Offscreen frame capture from recorded sessions.
+
+Replays a recording (see replay.py) on an EGL pbuffer context, so no window or
+display is needed, and saves what Game.render draws. Readback is pipelined
+through a ring of pixel pack buffers: glReadPixels into a buffer returns at
+once, and each buffer is mapped only when the ring comes back round to it,
+after the renderer has moved on. A background thread flips and encodes the
+frames while the next ones render, so the session replays as fast as the
+software rasterizer allows rather than at 60 ticks a second.
+
+    python capture.py bug.chr frames/                       # frames/000000.png, ...
+    python capture.py bug.chr bug.rgb --format raw          # one raw RGB24 stream
+    python capture.py bug.chr thumbs/ --every 600 --limit 5
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 1024x768 -r 30 -i bug.rgb bug.mp4
+"""
+import argparse, collections, ctypes, os, queue, threading, time
+
+import offscreen
+
+import numpy as np
+from OpenGL.GL import (GL_PACK_ALIGNMENT, GL_PIXEL_PACK_BUFFER, GL_READ_ONLY, GL_RGB, GL_STREAM_READ,
+                       GL_UNSIGNED_BYTE, glBindBuffer, glBufferData, glDeleteBuffers, glGenBuffers, glMapBuffer,
+                       glPixelStorei, glReadPixels, glUnmapBuffer)
+
+import replay
+from game import FPS, WINDOW_HEIGHT, WINDOW_WIDTH
+from images import write_png
+
+class PixelReader:
+    # read() starts an asynchronous glReadPixels into the next buffer of the
+    # ring and, once the ring is full, returns the oldest pending frame as
+    # (tag, rows). Rows are bottom-up, as GL stores them.
+    def __init__(self, width, height, depth=3):
+        self.width, self.height, self.size = width, height, width * height * 3
+        self.buffers = [int(b) for b in np.atleast_1d(glGenBuffers(depth))]
+        for buffer in self.buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        self.pending, self.next = collections.deque(), 0
+
+    def read(self, tag):
+        done = self.collect() if len(self.pending) == len(self.buffers) else None
+        buffer = self.buffers[self.next]
+        self.next = (self.next + 1) % len(self.buffers)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        glReadPixels(0, 0, self.width, self.height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending.append((buffer, tag))
+        return done
+
+    def collect(self):
+        buffer, tag = self.pending.popleft()
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        pixels = np.frombuffer((ctypes.c_ubyte * self.size).from_address(address), dtype=np.uint8).copy()
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        return tag, pixels.reshape(self.height, self.width, 3)
+
+    def drain(self):
+        while self.pending:
+            yield self.collect()
+
+    def release(self):
+        glDeleteBuffers(len(self.buffers), self.buffers)
+
+class FrameWriter:
+    # Encodes frames on a background thread: numbered PNGs in a directory, or
+    # every frame appended to one raw RGB24 file. The queue is bounded, so a
+    # slow encoder holds back rendering instead of buffering the session.
+    def __init__(self, target, fmt='png', backlog=8, compression=1):
+        self.target, self.compression = target, compression
+        if fmt == 'png':
+            os.makedirs(target, exist_ok=True)
+            self.raw = None
+        else:
+            self.raw = open(target, 'wb')
+        self.queue, self.frames, self.error = queue.Queue(backlog), 0, None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, index, rows):
+        self.queue.put((index, rows))
+
+    def run(self):
+        # After a failure keep taking frames, so the renderer never blocks on a
+        # full queue; close() raises the error.
+        while (item := self.queue.get()) is not None:
+            if self.error is not None:
+                continue
+            index, rows = item
+            try:
+                if self.raw is not None:
+                    self.raw.write(rows[::-1].tobytes())
+                else:
+                    write_png(os.path.join(self.target, f"{index:06d}.png"), rows[::-1], self.compression)
+                self.frames += 1
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.raw is not None:
+            self.raw.close()
+        if self.error is not None:
+            raise self.error
+
+def capture(path, target, fmt='png', every=2, start=0, limit=None, depth=3, compression=1):
+    # Render every `every`th update of the recording from update `start` on, at
+    # most limit frames. Updates are counted here rather than read from the
+    # game clock, which stops on the game over and mission complete screens,
+    # so the frames follow the recording's own timeline whatever its outcome.
+    # Returns (frames written, updates replayed, outcome matched).
+    context = offscreen.create_context(WINDOW_WIDTH, WINDOW_HEIGHT)
+    reader = PixelReader(WINDOW_WIDTH, WINDOW_HEIGHT, depth)
+    writer = FrameWriter(target, fmt, compression=compression)
+    frames, updates = 0, 0
+    def on_tick(game):
+        nonlocal frames, updates
+        if not updates:
+            game.init_opengl()
+        updates += 1
+        if updates < start or (updates - start) % every or (limit is not None and frames >= limit):
+            return
+        game.render()
+        done = reader.read(frames)
+        frames += 1
+        if done is not None:
+            writer.put(*done)
+    try:
+        expected, actual = replay.replay(path, on_tick)
+        for done in reader.drain():
+            writer.put(*done)
+    finally:
+        writer.close()
+        reader.release()
+        context.release()
+    return writer.frames, actual[0], expected is None or expected == actual
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', help="recording made with game.py --record or replay.py --corpus")
+    parser.add_argument('target', help="directory for PNG frames, or file for --format raw")
+    parser.add_argument('--format', choices=('png', 'raw'), default='png')
+    parser.add_argument('--every', type=int, default=2, help="capture every Nth update (2 gives 30 fps)")
+    parser.add_argument('--start', type=int, default=0, help="first update to capture")
+    parser.add_argument('--limit', type=int, help="stop after this many frames")
+    parser.add_argument('--depth', type=int, default=3, help="pixel buffers in flight")
+    parser.add_argument('--compression', type=int, default=1, help="PNG zlib level, 0-9")
+    args = parser.parse_args()
+
+    begin = time.perf_counter()
+    frames, updates, matched = capture(args.recording, args.target, args.format, args.every, args.start, args.limit,
+                                     args.depth, args.compression)
+    elapsed = time.perf_counter() - begin
+    print(f"Captured {frames} frames of {WINDOW_WIDTH}x{WINDOW_HEIGHT} from {updates} updates to {args.target} "
+          f"in {elapsed:.2f}s ({frames / max(elapsed, 1e-9):.1f} frames/s, {updates / FPS / max(elapsed, 1e-9):.1f}x real time)")
+    if not matched:
+        print("warning: replayed outcome differs from the recording")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""Gym-style environments for training and evaluating automated playtesters.
+
+CyberHeistEnv wraps one headless Game with the Gymnasium reset()/step() API.
+Observations are flat float32 NumPy arrays (see OBSERVATION_FIELDS) and
+actions are bitmasks over ACTIONS: the movement keys Player.update reads, plus
+try_hack, typing the shown hack sequence, and cancelling. VectorEnv steps
+many environments in lock-step in one process. All of their observations live
+in one preallocated (envs, size) array that every step writes in place and
+returns, so nothing is copied per step.
+
+    python env.py --envs 64 --steps 200000      # random-action throughput
+"""
+import argparse, random, time
+
+import numpy as np
+
+from game import FPS, Game
+
+ACTIONS = ('forward', 'back', 'left', 'right', 'jump', 'hack', 'type', 'cancel')
+ACTION_KEYS = {'forward': b'w', 'back': b's', 'left': b'a', 'right': b'd', 'jump': b' '}
+ACTION_COUNT = 1 << len(ACTIONS)
+STATES = ('playing', 'hacking', 'game_over', 'won')
+
+PLAYER_FIELDS = ('x', 'y', 'z', 'rotation', 'velocity_y', 'on_ground')
+STATUS_FIELDS = ('time_left', 'hack_lives', 'hacking', 'camera_terminal_hacked', 'laser_terminal_hacked', 'level')
+TARGET_FIELDS = ('objective_x', 'objective_z', 'camera_terminal_x', 'camera_terminal_z',
+                 'laser_terminal_x', 'laser_terminal_z')
+CAMERA_FIELDS = ('present', 'online', 'x', 'z', 'angle', 'detection')
+LASER_FIELDS = ('present', 'active', 'x1', 'z1', 'x2', 'z2')
+
+def action_mask(*names):
+    mask = 0
+    for name in names:
+        mask |= 1 << ACTIONS.index(name)
+    return mask
+
+class ObservationLayout:
+    # Where each group sits in the flat observation. Cameras and lasers are
+    # padded to max_cameras/max_lasers rows; entities beyond that are left out.
+    def __init__(self, max_cameras=8, max_lasers=8):
+        self.max_cameras, self.max_lasers = max_cameras, max_lasers
+        self.slices, offset = {}, 0
+        for name, width in (('player', len(PLAYER_FIELDS)), ('status', len(STATUS_FIELDS)),
+                            ('targets', len(TARGET_FIELDS)), ('cameras', max_cameras * len(CAMERA_FIELDS)),
+                            ('lasers', max_lasers * len(LASER_FIELDS))):
+            self.slices[name] = slice(offset, offset + width)
+            offset += width
+        self.size = offset
+
+    def views(self, obs):
+        cameras = obs[self.slices['cameras']].reshape(self.max_cameras, len(CAMERA_FIELDS))
+        lasers = obs[self.slices['lasers']].reshape(self.max_lasers, len(LASER_FIELDS))
+        return obs[self.slices['player']], obs[self.slices['status']], obs[self.slices['targets']], cameras, lasers
+
+OBSERVATION_FIELDS = (PLAYER_FIELDS, STATUS_FIELDS, TARGET_FIELDS, CAMERA_FIELDS, LASER_FIELDS)
+
+class CyberHeistEnv:
+    # One episode is one attempt at `level`. Reward is the score gained this
+    # step / 1000 (0.5 per terminal hacked, the time bonus on a win) and -1
+    # when the mission fails. Episodes terminate on a win or a failure and
+    # are truncated after max_ticks steps.
+    def __init__(self, level=1, seed=None, max_ticks=FPS * 130, generator=None, max_cameras=8, max_lasers=8, out=None):
+        self.level, self.max_ticks, self.generator = level, max_ticks, generator
+        self.layout = ObservationLayout(max_cameras, max_lasers)
+        self.observation = np.zeros(self.layout.size, dtype=np.float32) if out is None else out
+        self.player_obs, self.status_obs, self.target_obs, self.camera_obs, self.laser_obs = self.layout.views(self.observation)
+        self.seeds = random.Random(seed)
+        self.keys = {key: False for key in ACTION_KEYS.values()}
+        self.game, self.ticks = None, 0
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seeds.seed(seed)
+        game = self.game = Game(headless=True, verbose=False, seed=self.seeds.randrange(2 ** 32), generator=self.generator)
+        # Enter the level the way a player does, as runner.py does.
+        for _ in range(self.level - 1):
+            game.next_level()
+        game.keys, self.ticks = self.keys, 0
+        self.cameras = game.cameras[:self.layout.max_cameras]
+        self.lasers = game.lasers[:self.layout.max_lasers]
+        self.camera_obs[:] = 0
+        self.laser_obs[:] = 0
+        self.camera_obs[:len(self.cameras), 0] = 1
+        self.camera_obs[:len(self.cameras), 2:4] = [(c.position.x, c.position.z) for c in self.cameras]
+        self.laser_obs[:len(self.lasers), 0] = 1
+        terminals = {t.type: t.position for t in game.terminals}
+        self.target_obs[:] = 0
+        self.target_obs[:2] = game.objective.position.x, game.objective.position.z
+        for i, kind in enumerate(('camera', 'laser')):
+            if kind in terminals:
+                self.target_obs[2 + 2 * i:4 + 2 * i] = terminals[kind].x, terminals[kind].z
+        self.observe()
+        return self.observation, {'seed': game.seed}
+
+    def observe(self):
+        game, p = self.game, self.game.player
+        position = p.position
+        self.player_obs[:] = position.x, position.y, position.z, p.rotation * (np.pi / 180), p.velocity_y, p.on_ground
+        self.status_obs[:] = (game.time_left, game.hack_lives, game.hacking, game.terminal_hacked('camera'),
+                              game.terminal_hacked('laser'), game.level)
+        cameras = self.cameras
+        if cameras:
+            if game.camera_schedule is not None:
+                game.camera_schedule.sync()
+            self.camera_obs[:len(cameras), 1] = [not c.disabled for c in cameras]
+            self.camera_obs[:len(cameras), 4] = [c.angle for c in cameras]
+            self.camera_obs[:len(cameras), 5] = [min(c.detection_time / c.detection_threshold, 1.0) for c in cameras]
+        lasers = self.lasers
+        if lasers:
+            if game.laser_array is not None and len(lasers) == len(game.lasers):
+                self.laser_obs[:, 1][:len(lasers)] = game.laser_array.active
+                self.laser_obs[:len(lasers), 2:6] = game.laser_array.segments.T
+            else:
+                self.laser_obs[:len(lasers), 1] = [l.active for l in lasers]
+                self.laser_obs[:len(lasers), 2:6] = [l.segment for l in lasers]
+
+    def apply(self, action):
+        game, keys = self.game, self.keys
+        for bit, key in enumerate(ACTION_KEYS.values()):
+            keys[key] = bool(action >> bit & 1)
+        if action >> 5 & 1 and game.state == 'playing':
+            game.try_hack()
+        if action >> 6 & 1 and game.hacking:
+            game.submit_hack(game.hack_sequence)
+        if action >> 7 & 1 and game.hacking:
+            game.cancel_hack()
+
+    def step(self, action):
+        game = self.game
+        score = game.score
+        self.apply(int(action))
+        state = game.step()
+        self.ticks += 1
+        self.observe()
+        reward = (game.score - score) / 1000
+        terminated = state in ('won', 'game_over')
+        if state == 'game_over':
+            reward -= 1.0
+        truncated = not terminated and self.ticks >= self.max_ticks
+        return self.observation, reward, terminated, truncated, {'state': state, 'reason': game.game_over_reason}
+
+class VectorEnv:
+    # count environments stepped in lock-step. observations[i] is env i's own
+    # observation buffer, so step() returns the same arrays every time. A
+    # finished environment is reset within the same step: its row then holds
+    # the new episode's first observation, and the last one is kept in
+    # final_observations with `done` set.
+    def __init__(self, count, seed=0, **kwargs):
+        self.count = count
+        self.layout = ObservationLayout(kwargs.get('max_cameras', 8), kwargs.get('max_lasers', 8))
+        self.observations = np.zeros((count, self.layout.size), dtype=np.float32)
+        self.final_observations = np.zeros_like(self.observations)
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.terminated = np.zeros(count, dtype=bool)
+        self.truncated = np.zeros(count, dtype=bool)
+        self.done = np.zeros(count, dtype=bool)
+        self.envs = [CyberHeistEnv(seed=seed + i, out=self.observations[i], **kwargs) for i in range(count)]
+
+    def reset(self, seed=None):
+        infos = [env.reset(None if seed is None else seed + i)[1] for i, env in enumerate(self.envs)]
+        return self.observations, infos
+
+    def step(self, actions):
+        rewards, terminated, truncated, done = self.rewards, self.terminated, self.truncated, self.done
+        for i, (env, action) in enumerate(zip(self.envs, np.asarray(actions).tolist())):
+            _, rewards[i], terminated[i], truncated[i], _ = env.step(action)
+        np.logical_or(terminated, truncated, out=done)
+        if done.any():
+            for i in np.nonzero(done)[0].tolist():
+                self.final_observations[i] = self.observations[i]
+                self.envs[i].reset()
+        return self.observations, rewards, terminated, truncated, done
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--envs', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=200000, help="total environment steps")
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    vec = VectorEnv(args.envs, seed=args.seed, level=args.level)
+    vec.reset()
+    rng = np.random.default_rng(args.seed)
+    # Mostly walking and turning, with the occasional hack attempt.
+    moves = np.array([action_mask('forward'), action_mask('forward', 'left'), action_mask('forward', 'right'),
+                      action_mask('left'), action_mask('hack', 'type')])
+    batches = max(1, args.steps // args.envs)
+    episodes, start = 0, time.perf_counter()
+    for _ in range(batches):
+        _, _, _, _, done = vec.step(moves[rng.integers(0, len(moves) - 1 + (rng.random() < 0.02), args.envs)])
+        episodes += int(done.sum())
+    elapsed = time.perf_counter() - start
+    steps = batches * args.envs
+    print(f"{args.envs} envs, {steps} steps in {elapsed:.2f}s ({steps / elapsed:.0f} steps/s), {episodes} episodes finished")
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,65 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL import GLUT as _glut_mod
-from OpenGL.GLUT import *
-GLUT_BITMAP_HELVETICA_18 = getattr(_glut_mod, 'GLUT_BITMAP_HELVETICA_18', None) or getattr(_glut_mod, 'GLUT_BITMAP_HELVETICA_12', None)
-import math, random, time, sys, signal
+try:
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+    from OpenGL import GLUT as _glut_mod
+    from OpenGL.GLUT import *
+    GLUT_BITMAP_HELVETICA_18 = getattr(_glut_mod, 'GLUT_BITMAP_HELVETICA_18', None) or getattr(_glut_mod, 'GLUT_BITMAP_HELVETICA_12', None)
+    GL_AVAILABLE = True
+except ImportError:
+    # Headless simulation only needs the game logic, never the draw code.
+    GLUT_BITMAP_HELVETICA_18 = None
+    GL_AVAILABLE = False
+import math, random, time, sys, signal, collections, heapq, json
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 WINDOW_WIDTH, WINDOW_HEIGHT, FPS = 1024, 768, 60
+VIEW_FOVY, VIEW_NEAR, VIEW_FAR = 75, 0.1, 1000
+# Round shapes lose half their segments past each distance from the eye.
+LOD_DISTANCES = (15.0, 35.0)
+BATCH_CAMERA_THRESHOLD = 128
+BATCH_LASER_THRESHOLD = 12
 BLACK, WHITE, GREEN, RED, BLUE, CYAN, YELLOW, ORANGE, GRAY, DARK_GRAY, PURPLE = (0,0,0), (1,1,1), (0,1,0), (1,0,0), (0,0,1), (0,1,1), (1,1,0), (1,0.5,0), (0.4,0.4,0.4), (0.2,0.2,0.2), (1,0,1)
+# HUD warning per camera: (minimum detection progress, label, color), highest first.
+DETECTION_LEVELS = ((0.8, "ALARM TRIGGERED!", RED), (0.6, "CRITICAL DANGER", (1, 0.3, 0)), (0.4, "DANGER", (1, 0.3, 0)),
+                    (0.2, "WARNING", ORANGE), (0.0, "DETECTED", YELLOW))
+
+class SimClock:
+    def __init__(self, dt=1.0 / FPS):
+        self.dt, self.ticks, self.time = dt, 0, 0.0
+    
+    def advance(self):
+        self.ticks += 1
+        self.time = self.ticks * self.dt
+        return self.dt
 
 class Vector3: 
+    __slots__ = ('x', 'y', 'z')
     def __init__(self, x=0, y=0, z=0):
         self.x, self.y, self.z = x, y, z
     def distance_to(self, other):
         return math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2 + (self.z - other.z)**2)
+    def within(self, other, radius):
+        dx, dy, dz = self.x - other.x, self.y - other.y, self.z - other.z
+        return dx * dx + dy * dy + dz * dz < radius * radius
     def copy(self):
         return Vector3(self.x, self.y, self.z)
+    def set(self, other):
+        self.x, self.y, self.z = other.x, other.y, other.z
     
 class Player:
+    __slots__ = ('position', 'previous_position', 'bounds', 'size', 'speed', 'rotation', 'velocity_y',
+                 'on_ground', 'gravity', 'jump_strength')
+    # Body parts as (x, y, z, sx, sy, sz); the second one is the head sphere.
+    PARTS = ((0, 0, 0, 0.3, 0.8, 0.2), (0, 0.6, 0, 0.2, 0.2, 0.2), (-0.25, 0.2, 0, 0.1, 0.5, 0.1),
+             (0.25, 0.2, 0, 0.1, 0.5, 0.1), (-0.1, -0.6, 0, 0.1, 0.6, 0.1), (0.1, -0.6, 0, 0.1, 0.6, 0.1))
+    
     def __init__(self):
         self.position = Vector3(-8, 0.5, -8)
+        self.previous_position = self.position.copy()
+        self.bounds = (-9.5, 9.5, -9.5, 9.5)
         self.size, self.speed = 0.5, 0.1
         self.rotation = 0  
         self.velocity_y = 0  
@@ -26,8 +67,9 @@ class Player:
         self.gravity = -0.008  
         self.jump_strength = 0.35  
         
-    def update(self, keys, walls):
-        old_pos = self.position.copy()
+    def update(self, keys, walls, grid=None):
+        old_pos = self.previous_position
+        old_pos.set(self.position)
         if keys.get(b'a', False) or keys.get(b'A', False):
             self.rotation = (self.rotation + 5) % 360 
         if keys.get(b'd', False) or keys.get(b'D', False):
@@ -72,70 +114,385 @@ class Player:
                 self.position.y = 0.5
                 self.velocity_y = 0
                 self.on_ground = True
-        if self.check_wall_collision(walls):
+        if self.check_wall_collision(walls, grid):
             self.position.x = old_pos.x
             self.position.z = old_pos.z
         
-        self.position.x = max(-9.5, min(9.5, self.position.x))
-        self.position.z = max(-9.5, min(9.5, self.position.z))
+        min_x, max_x, min_z, max_z = self.bounds
+        self.position.x = max(min_x, min(max_x, self.position.x))
+        self.position.z = max(min_z, min(max_z, self.position.z))
     
-    def check_wall_collision(self, walls):
-        return any(abs(self.position.x - w.position.x) < w.size.x/2 + self.size and
-                  abs(self.position.z - w.position.z) < w.size.z/2 + self.size for w in walls)
+    def check_wall_collision(self, walls, grid=None):
+        x, z, size = self.position.x, self.position.z, self.size
+        if grid is not None:
+            walls = grid.query(x - size, z - size, x + size, z + size)
+        for w in walls:
+            if abs(x - w.position.x) < w.size.x/2 + size and abs(z - w.position.z) < w.size.z/2 + size:
+                return True
+        return False
     
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y, self.position.z)
-        glRotatef(self.rotation, 0, 1, 0)  
-        glColor3f(*GREEN)
-        
-        parts = [(0, 0, 0, 0.3, 0.8, 0.2), (0, 0.6, 0, 0.2, 0.2, 0.2), (-0.25, 0.2, 0, 0.1, 0.5, 0.1),
-                (0.25, 0.2, 0, 0.1, 0.5, 0.1), (-0.1, -0.6, 0, 0.1, 0.6, 0.1), (0.1, -0.6, 0, 0.1, 0.6, 0.1)]
-        
-        for i, (x, y, z, sx, sy, sz) in enumerate(parts):
-            glPushMatrix()
-            glTranslatef(x, y, z)
+    def draw(self, r, frustum=None):
+        p = self.position
+        head, nose = (8, 4) if frustum is None else (frustum.detail(8, p.x, p.y, p.z), frustum.detail(4, p.x, p.y, p.z, 3))
+        r.begin()
+        r.push()
+        r.translate(p.x, p.y, p.z)
+        r.rotate(self.rotation, 0, 1, 0)  
+        r.mesh(('player', head, nose), self.model)
+        r.pop()
+    
+    @classmethod
+    def model(cls, r, head=8, nose=4):
+        r.color(*GREEN)
+        for i, (x, y, z, sx, sy, sz) in enumerate(cls.PARTS):
+            r.push()
+            r.translate(x, y, z)
             if i == 1:  
-                glutSolidSphere(0.2, 8, 8)
+                r.sphere(0.2, head, head)
             else:
-                glScalef(sx, sy, sz)
-                glutSolidCube(1.0)
-            glPopMatrix()
+                r.scale(sx, sy, sz)
+                r.cube(1.0)
+            r.pop()
         
-        glColor3f(1, 1, 1)
-        glPushMatrix()
-        glTranslatef(0, 0.8, 0.3)  
-        glScalef(0.1, 0.1, 0.3)
-        glutSolidCone(1.0, 1.0, 4, 1)
-        glPopMatrix()
-        glPopMatrix()
+        r.color(1, 1, 1)
+        r.push()
+        r.translate(0, 0.8, 0.3)  
+        r.scale(0.1, 0.1, 0.3)
+        r.cone(1.0, 1.0, nose, 1)
+        r.pop()
+
+class WallGrid:
+    # Uniform grid over static walls, built once per level. Each wall is stored
+    # in every cell its footprint touches (padded so boundary contacts count).
+    def __init__(self, walls, cell_size=2.0, cells=None):
+        # cells: the {cell: wall indices} map, when a compiled level (levelpack.py)
+        # has it precomputed.
+        self.walls, self.cell_size, self.cells = walls, cell_size, cells
+        if cells is None:
+            self.cells = {}
+            pad = 1e-6
+            for i, wall in enumerate(walls):
+                x0, z0, x1, z1 = self.cell_range(wall.position.x - wall.size.x / 2 - pad, wall.position.z - wall.size.z / 2 - pad,
+                                                 wall.position.x + wall.size.x / 2 + pad, wall.position.z + wall.size.z / 2 + pad)
+                for ix in range(x0, x1 + 1):
+                    for iz in range(z0, z1 + 1):
+                        self.cells.setdefault((ix, iz), []).append(i)
+        self.cell_walls = {cell: [walls[i] for i in indices] for cell, indices in self.cells.items()}
+    
+    def cell_range(self, min_x, min_z, max_x, max_z):
+        cs = self.cell_size
+        return math.floor(min_x / cs), math.floor(min_z / cs), math.floor(max_x / cs), math.floor(max_z / cs)
+    
+    def query(self, min_x, min_z, max_x, max_z):
+        # The single-cell result is the grid's own list; treat it as read-only.
+        x0, z0, x1, z1 = self.cell_range(min_x, min_z, max_x, max_z)
+        if x0 == x1 and z0 == z1:
+            return self.cell_walls.get((x0, z0), ())
+        found = set()
+        for ix in range(x0, x1 + 1):
+            for iz in range(z0, z1 + 1):
+                found.update(self.cells.get((ix, iz), ()))
+        return [self.walls[i] for i in sorted(found)]
+    
+    def walls_along(self, x1, z1, x2, z2):
+        # Amanatides-Woo traversal of the cells under the segment, yielding each
+        # wall the first time it is met.
+        cs = self.cell_size
+        ix, iz = math.floor(x1 / cs), math.floor(z1 / cs)
+        end_ix, end_iz = math.floor(x2 / cs), math.floor(z2 / cs)
+        dx, dz = x2 - x1, z2 - z1
+        step_x, step_z = (1 if dx > 0 else -1), (1 if dz > 0 else -1)
+        t_max_x = ((ix + (dx > 0)) * cs - x1) / dx if dx else math.inf
+        t_max_z = ((iz + (dz > 0)) * cs - z1) / dz if dz else math.inf
+        t_delta_x = cs / abs(dx) if dx else math.inf
+        t_delta_z = cs / abs(dz) if dz else math.inf
+        seen = set()
+        while True:
+            for i in self.cells.get((ix, iz), ()):
+                if i not in seen:
+                    seen.add(i)
+                    yield self.walls[i]
+            if ix == end_ix and iz == end_iz:
+                return
+            if t_max_x < t_max_z:
+                if t_max_x > 1:
+                    return
+                ix += step_x
+                t_max_x += t_delta_x
+            else:
+                if t_max_z > 1:
+                    return
+                iz += step_z
+                t_max_z += t_delta_z
+
+# Grid steps as (di, dj, length in cells); diagonals may not cut wall corners.
+NAV_STEPS = ((1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+             (1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)))
+class NavigationGrid:
+    # Walkable floor cells for bots and patrols: a cell is open when a player
+    # standing on its centre clears every wall (Player.check_wall_collision).
+    # Rasterized on first use, after which the walls are no longer needed;
+    # flow fields toward a goal are built on demand and cached, so any number
+    # of agents can follow one by table lookups. level_key names the level the
+    # grid was built for, so Game can keep it across restarts.
+    FIELD_CACHE_SIZE = 32
+
+    def __init__(self, walls, bounds, resolution=0.5, radius=0.5, level_key=None):
+        self.walls, self.bounds, self.resolution, self.radius = walls, bounds, resolution, radius
+        self.level_key = level_key
+        min_x, max_x, min_z, max_z = bounds
+        self.nx = max(1, math.ceil((max_x - min_x) / resolution))
+        self.nz = max(1, math.ceil((max_z - min_z) / resolution))
+        self.open, self.neighbours = None, None
+        self.fields = collections.OrderedDict()
+
+    def rasterize(self):
+        # Open cells keep the player clear of walls anywhere inside them, so
+        # walking between neighbouring open cells never collides. Cells that
+        # are only clear at their centre are not entered, but a player standing
+        # in one is still routed out of it.
+        res, nx, nz = self.resolution, self.nx, self.nz
+        clear, open_cells = self.free_cells(self.radius), self.free_cells(self.radius + res / 2)
+        neighbours = [()] * (nx * nz)
+        for i in range(nx):
+            for j in range(nz):
+                k = i * nz + j
+                if not open_cells[k]:
+                    continue
+                # Cells a player can step from into k.
+                links = []
+                for di, dj, length in NAV_STEPS:
+                    ni, nj = i + di, j + dj
+                    if 0 <= ni < nx and 0 <= nj < nz and clear[ni * nz + nj]:
+                        inner = open_cells[ni * nz + nj]
+                        if di and dj and not (open_cells[ni * nz + j] and open_cells[i * nz + nj]):
+                            continue
+                        if inner or not (di and dj):
+                            links.append((ni * nz + nj, length * res))
+                neighbours[k] = tuple(links)
+        self.open, self.neighbours, self.walls = open_cells, neighbours, None
+
+    def free_cells(self, radius):
+        # Cells whose centre is at least `radius` (per axis) from every wall
+        # and inside the area Player.update clamps to.
+        min_x, max_x, min_z, max_z = self.bounds
+        res, nx, nz = self.resolution, self.nx, self.nz
+        cells = bytearray(nx * nz)
+        for i in range(nx):
+            if min_x + radius <= min_x + (i + 0.5) * res <= max_x - radius:
+                for j in range(nz):
+                    if min_z + radius <= min_z + (j + 0.5) * res <= max_z - radius:
+                        cells[i * nz + j] = 1
+        for wall in self.walls:
+            reach_x, reach_z = wall.size.x / 2 + radius, wall.size.z / 2 + radius
+            x, z = wall.position.x, wall.position.z
+            for i in range(max(0, math.floor((x - reach_x - min_x) / res)), min(nx, math.ceil((x + reach_x - min_x) / res) + 1)):
+                if abs(min_x + (i + 0.5) * res - x) < reach_x:
+                    for j in range(max(0, math.floor((z - reach_z - min_z) / res)), min(nz, math.ceil((z + reach_z - min_z) / res) + 1)):
+                        if abs(min_z + (j + 0.5) * res - z) < reach_z:
+                            cells[i * nz + j] = 0
+        return cells
+
+    def cell(self, x, z):
+        # Index of the cell under (x, z), or None outside the grid.
+        min_x, _, min_z, _ = self.bounds
+        i, j = math.floor((x - min_x) / self.resolution), math.floor((z - min_z) / self.resolution)
+        if 0 <= i < self.nx and 0 <= j < self.nz:
+            return i * self.nz + j
+        return None
+
+    def center(self, k):
+        min_x, _, min_z, _ = self.bounds
+        i, j = divmod(k, self.nz)
+        return min_x + (i + 0.5) * self.resolution, min_z + (j + 0.5) * self.resolution
+
+    def field(self, x, z, reach=0.0):
+        # Flow field toward every open cell whose centre lies within `reach` of
+        # (x, z), or toward the nearest open cell when none does.
+        key = (x, z, reach)
+        field = self.fields.get(key)
+        if field is None:
+            if self.open is None:
+                self.rasterize()
+            field = self.fields[key] = FlowField(self, self.goal_cells(x, z, reach))
+            if len(self.fields) > self.FIELD_CACHE_SIZE:
+                self.fields.popitem(last=False)
+        self.fields.move_to_end(key)
+        return field
+
+    def goal_cells(self, x, z, reach):
+        res, min_x, min_z = self.resolution, self.bounds[0], self.bounds[2]
+        cells = math.ceil(reach / res) + 1
+        ci, cj = math.floor((x - min_x) / res), math.floor((z - min_z) / res)
+        goals, nearest, nearest_distance = [], None, math.inf
+        for radius in range(cells, max(self.nx, self.nz) + 1):
+            for i in range(max(0, ci - radius), min(self.nx, ci + radius + 1)):
+                for j in range(max(0, cj - radius), min(self.nz, cj + radius + 1)):
+                    k = i * self.nz + j
+                    if self.open[k]:
+                        gx, gz = self.center(k)
+                        distance = math.hypot(gx - x, gz - z)
+                        if distance <= reach:
+                            goals.append(k)
+                        elif distance < nearest_distance:
+                            nearest, nearest_distance = k, distance
+            if goals or nearest is not None:
+                break
+        return goals or ([nearest] if nearest is not None else [])
+
+    def next_point(self, x, z, goal_x, goal_z, reach=0.0):
+        return self.field(goal_x, goal_z, reach).next_point(x, z)
+
+class FlowField:
+    # Dijkstra distances from every open cell to the goal cells, and for each
+    # cell the neighbour one step closer (-1 at a goal or where no path exists).
+    # Both are kept as NumPy arrays when NumPy is available.
+    def __init__(self, grid, goals):
+        self.grid = grid
+        size = grid.nx * grid.nz
+        distance, toward = [math.inf] * size, [-1] * size
+        neighbours = grid.neighbours
+        heap = []
+        for k in goals:
+            distance[k] = 0.0
+            heap.append((0.0, k))
+        heapq.heapify(heap)
+        while heap:
+            d, k = heapq.heappop(heap)
+            if d > distance[k]:
+                continue
+            for n, length in neighbours[k]:
+                nd = d + length
+                if nd < distance[n]:
+                    distance[n], toward[n] = nd, k
+                    heapq.heappush(heap, (nd, n))
+        if np is not None:
+            distance, toward = np.array(distance), np.array(toward, dtype=np.int32)
+        self.goals, self.distance, self.toward = frozenset(goals), distance, toward
+        self.arrays = None
+
+    def distance_from(self, x, z):
+        k = self.grid.cell(x, z)
+        return math.inf if k is None else float(self.distance[k])
+
+    def next_point(self, x, z):
+        # Centre of the next cell on the way to the goal; None once at the goal
+        # or where the goal cannot be reached.
+        k = self.grid.cell(x, z)
+        if k is None:
+            return None
+        toward = int(self.toward[k])
+        return None if toward < 0 else self.grid.center(toward)
+
+    def directions(self, xs, zs):
+        # Unit step directions for many agents at once (NumPy arrays of
+        # positions); zero where next_point would return None.
+        if self.arrays is None:
+            grid, toward = self.grid, self.toward
+            k = np.arange(toward.size)
+            step = np.where(toward >= 0, toward, k)
+            di, dj = step // grid.nz - k // grid.nz, step % grid.nz - k % grid.nz
+            length = np.maximum(np.hypot(di, dj), 1)
+            self.arrays = (np.append(di / length, 0.0), np.append(dj / length, 0.0))
+        grid = self.grid
+        min_x, _, min_z, _ = grid.bounds
+        i = np.floor((xs - min_x) / grid.resolution).astype(np.int64)
+        j = np.floor((zs - min_z) / grid.resolution).astype(np.int64)
+        inside = (i >= 0) & (i < grid.nx) & (j >= 0) & (j < grid.nz)
+        k = np.where(inside, i * grid.nz + j, grid.nx * grid.nz)
+        return self.arrays[0][k], self.arrays[1][k]
+
+def steer_keys(player, point, keys=None):
+    # Movement keys that turn the player toward `point` and walk once roughly
+    # facing it (Player.update turns 5 degrees a tick).
+    keys = {} if keys is None else keys
+    if point is None:
+        keys[b'w'] = keys[b'a'] = keys[b'd'] = False
+        return keys
+    heading = math.degrees(math.atan2(point[0] - player.position.x, point[1] - player.position.z))
+    turn = (heading - player.rotation + 180) % 360 - 180
+    keys[b'a'], keys[b'd'] = turn > 2.5, turn < -2.5
+    keys[b'w'] = abs(turn) < 30
+    return keys
 
 class Wall:
+    __slots__ = ('position', 'size')
+    
     def __init__(self, x, y, z, sx, sy, sz):
         self.position = Vector3(x, y, z)
         self.size = Vector3(sx, sy, sz)
     
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y, self.position.z)
-        glColor3f(*GRAY)
-        glScalef(self.size.x, self.size.y, self.size.z)
-        glutSolidCube(1)
-        glPopMatrix()
+    def draw(self, r):
+        r.begin()
+        r.push()
+        r.translate(self.position.x, self.position.y, self.position.z)
+        r.color(*GRAY)
+        r.scale(self.size.x, self.size.y, self.size.z)
+        r.cube(1)
+        r.pop()
         
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y, self.position.z)
-        glColor3f(0.2, 0.2, 0.2)
-        glScalef(self.size.x, self.size.y, self.size.z)
-        glutWireCube(1)
-        glPopMatrix()
+        r.push()
+        r.translate(self.position.x, self.position.y, self.position.z)
+        r.color(0.2, 0.2, 0.2)
+        r.scale(self.size.x, self.size.y, self.size.z)
+        r.cube(1, wire=True)
+        r.pop()
 
 
 
 
 
+class ArrayField:
+    # Attribute stored in the object's '_<name>' slot until it is bound to a
+    # structure-of-arrays system, after which it reads and writes that
+    # system's array slot.
+    def __set_name__(self, owner, name):
+        self.name, self.slot = name, owner.__dict__['_' + name]
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        if obj.array is None:
+            return self.slot.__get__(obj, owner)
+        return getattr(obj.array, self.name)[obj.index].item()
+    
+    def __set__(self, obj, value):
+        if obj.array is None:
+            self.slot.__set__(obj, value)
+        else:
+            getattr(obj.array, self.name)[obj.index] = value
+
+def turn_toward(angle, target, step):
+    # One tick of camera rotation: returns the new angle and whether it arrived.
+    angle_diff = target - angle
+    
+    while angle_diff > math.pi:
+        angle_diff -= 2 * math.pi
+    while angle_diff < -math.pi:
+        angle_diff += 2 * math.pi
+    
+    arrived = abs(angle_diff) <= step
+    if arrived:
+        angle = target
+    else:
+        angle += step * (1 if angle_diff > 0 else -1)
+    return angle % (2 * math.pi), arrived
+
 class SecurityCamera:
+    ARRAY_FIELDS = ('angle', 'range', 'fov_degrees', 'disabled', 'detection_time', 'detection_threshold',
+                    'is_detecting', 'detection_start_time', 'rotation_timer', 'rotation_interval',
+                    'target_angle', 'rotating', 'rotation_speed')
+    __slots__ = ('array', 'index', 'occlusion_map', 'position', 'base_position', 'direction') + \
+                tuple('_' + name for name in ARRAY_FIELDS)
+    angle, range, fov_degrees, disabled = ArrayField(), ArrayField(), ArrayField(), ArrayField()
+    detection_time, detection_threshold = ArrayField(), ArrayField()
+    is_detecting, detection_start_time = ArrayField(), ArrayField()
+    rotation_timer, rotation_interval = ArrayField(), ArrayField()
+    target_angle, rotating, rotation_speed = ArrayField(), ArrayField(), ArrayField()
+    
     def __init__(self, x, z, direction=1):
+        self.array, self.index = None, None
+        self.occlusion_map = None
         self.position = Vector3(x, 2.0, z)
         self.base_position = Vector3(x, 0, z)
         self.angle = 0  
@@ -155,40 +512,23 @@ class SecurityCamera:
         self.rotating = False  
         self.rotation_speed = math.pi / 2  
         
-    def update(self):
+    def update(self, dt=1.0 / FPS):
         if not self.disabled:
-            import time
-            current_time = time.time()
-            if hasattr(self, 'last_update_time'):
-                dt = current_time - self.last_update_time
-            else:
-                dt = 0.016  
-            self.last_update_time = current_time
-            
             if not self.rotating:
                 self.rotation_timer += dt
                 if self.rotation_timer >= self.rotation_interval:
-                    self.rotating = True
-                    self.target_angle = self.angle + math.pi / 2  
-                    self.rotation_timer = 0.0
+                    self.start_rotation()
             else:
-                angle_diff = self.target_angle - self.angle
-                
-                while angle_diff > math.pi:
-                    angle_diff -= 2 * math.pi
-                while angle_diff < -math.pi:
-                    angle_diff += 2 * math.pi
-                
-                rotation_step = self.rotation_speed * dt
-                if abs(angle_diff) <= rotation_step:
-                    self.angle = self.target_angle
+                self.angle, arrived = turn_toward(self.angle, self.target_angle, self.rotation_speed * dt)
+                if arrived:
                     self.rotating = False
-                else:
-                    self.angle += rotation_step * (1 if angle_diff > 0 else -1)
-                
-                self.angle = self.angle % (2 * math.pi)
             
-    def can_see_player(self, player, walls):
+    def start_rotation(self):
+        self.rotating = True
+        self.target_angle = self.angle + math.pi / 2  
+        self.rotation_timer = 0.0
+    
+    def can_see_player(self, player, walls, grid=None):
         if self.disabled:
             return False
             
@@ -212,13 +552,21 @@ class SecurityCamera:
         fov_half_radians = math.radians(self.fov_degrees / 2)
         
         if angle_from_center <= fov_half_radians:
-            return self.has_clear_line_of_sight(player, walls)
+            return self.has_clear_line_of_sight(player, walls, grid)
             
         return False
     
-    def has_clear_line_of_sight(self, player, walls):
+    def has_clear_line_of_sight(self, player, walls, grid=None):
+        return self.clear_line_to(player.position.x, player.position.z, walls, grid)
+    
+    def clear_line_to(self, player_x, player_z, walls, grid=None):
         camera_x, camera_z = self.position.x, self.position.z
-        player_x, player_z = player.position.x, player.position.z
+        if self.occlusion_map is not None:
+            known = self.occlusion_map.lookup(player_x, player_z)
+            if known is not None:
+                return known
+        if grid is not None:
+            walls = grid.walls_along(camera_x, camera_z, player_x, player_z)
         
         for wall in walls:
             if self.line_intersects_wall(camera_x, camera_z, player_x, player_z, wall):
@@ -245,9 +593,8 @@ class SecurityCamera:
                 
         return False
     
-    def update_detection(self, player, walls):
-        current_time = time.time()
-        player_visible = self.can_see_player(player, walls)
+    def update_detection(self, player, walls, current_time, grid=None):
+        player_visible = self.can_see_player(player, walls, grid)
         
         if player_visible:
             if not self.is_detecting:
@@ -270,87 +617,496 @@ class SecurityCamera:
                 self.detection_start_time = 0.0
             return 'none'
     
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.base_position.x, 0.15, self.base_position.z)
-        glColor3f(0.4, 0.4, 0.4) if not self.disabled else glColor3f(0.2, 0.2, 0.2)
-        glScalef(0.6, 0.3, 0.6)
-        glutSolidCube(1.0)
-        glPopMatrix()
-        
-        glPushMatrix()
-        glTranslatef(self.base_position.x, 1.0, self.base_position.z)
-        glColor3f(0.5, 0.5, 0.5) if not self.disabled else glColor3f(0.3, 0.3, 0.3)
-        glScalef(0.1, 2.0, 0.1)
-        glutSolidCube(1.0)
-        glPopMatrix()
+    FOV_SEGMENTS = 16
+    
+    def draw(self, r, segments=FOV_SEGMENTS):
+        disabled = self.disabled
+        r.begin()
+        r.push()
+        r.translate(self.base_position.x, 0, self.base_position.z)
+        r.mesh(('camera_stand', disabled), self.stand)
+        r.pop()
 
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y, self.position.z)
+        r.push()
+        r.translate(self.position.x, self.position.y, self.position.z)
         
         if self.disabled:
-            glColor3f(0.3, 0.3, 0.3)
+            r.color(0.3, 0.3, 0.3)
         elif self.is_detecting:
             detection_progress = min(self.detection_time / self.detection_threshold, 1.0)
-            glColor3f(1.0, 1.0 - detection_progress, 0.0)
+            r.color(1.0, 1.0 - detection_progress, 0.0)
         else:
-            glColor3f(0.6, 0, 0)
+            r.color(0.6, 0, 0)
             
-        glScalef(0.8, 0.5, 0.8)
-        glutSolidCube(1.0)
-        glPopMatrix()
+        r.scale(0.8, 0.5, 0.8)
+        r.cube(1.0)
+        r.pop()
         
-        if not self.disabled:
-            glPushMatrix()
-            glTranslatef(self.position.x, self.position.y, self.position.z)
-            glRotatef(math.degrees(self.angle), 0, 1, 0)
+        if not disabled:
+            view_range, fov_degrees, angle = self.range, self.fov_degrees, math.degrees(self.angle)
+            r.begin(lighting=False, blend=True)
+            r.push()
+            r.translate(self.position.x, self.position.y, self.position.z)
+            r.rotate(angle, 0, 1, 0)
             
             if self.is_detecting:
-                glColor4f(1, 0.5, 0, 0.6)
+                r.color(1, 0.5, 0, 0.6)
             else:
-                glColor4f(1, 0, 0, 0.4)
-                
-            glEnable(GL_BLEND)
-            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-            glDisable(GL_LIGHTING)
-            
-            glBegin(GL_TRIANGLES)
-            num_segments = 16
-            for i in range(num_segments):
-                angle1 = math.radians(-self.fov_degrees/2 + (i * self.fov_degrees / num_segments))
-                angle2 = math.radians(-self.fov_degrees/2 + ((i + 1) * self.fov_degrees / num_segments))
-                
-                glVertex3f(0, 0, 0)  
-                glVertex3f(self.range * math.cos(angle1), -2.0, self.range * math.sin(angle1))
-                glVertex3f(self.range * math.cos(angle2), -2.0, self.range * math.sin(angle2))
-            glEnd()
-            
-            glColor3f(1, 0, 0)
-            glLineWidth(2.0)
-            glBegin(GL_LINES)
-            fov_half = math.radians(self.fov_degrees / 2)
-            glVertex3f(0, 0, 0)
-            glVertex3f(self.range * math.cos(-fov_half), -2.0, self.range * math.sin(-fov_half))
-            glVertex3f(0, 0, 0)
-            glVertex3f(self.range * math.cos(fov_half), -2.0, self.range * math.sin(fov_half))
+                r.color(1, 0, 0, 0.4)
+            r.mesh(('fov_cone', view_range, fov_degrees, segments), self.fov_cone)
+            r.pop()
             
-            glColor3f(1, 1, 1)
-            glVertex3f(0, 0, 0)
-            glVertex3f(self.range, -2.0, 0)
-            glEnd()
-            glLineWidth(1.0)
+            r.begin(lighting=False, blend=True, line_width=2.0)
+            r.push()
+            r.translate(self.position.x, self.position.y, self.position.z)
+            r.rotate(angle, 0, 1, 0)
+            r.mesh(('fov_edges', view_range, fov_degrees), self.fov_edges)
+            r.pop()
+    
+    # Mesh builders for RenderRecorder.mesh; the parameters are the cache key.
+    @staticmethod
+    def stand(r, disabled):
+        r.push()
+        r.translate(0, 0.15, 0)
+        r.color(0.4, 0.4, 0.4) if not disabled else r.color(0.2, 0.2, 0.2)
+        r.scale(0.6, 0.3, 0.6)
+        r.cube(1.0)
+        r.pop()
+        
+        r.push()
+        r.translate(0, 1.0, 0)
+        r.color(0.5, 0.5, 0.5) if not disabled else r.color(0.3, 0.3, 0.3)
+        r.scale(0.1, 2.0, 0.1)
+        r.cube(1.0)
+        r.pop()
+    
+    @staticmethod
+    def fov_cone(r, view_range, fov_degrees, num_segments):
+        vertices = []
+        for i in range(num_segments):
+            angle1 = math.radians(-fov_degrees/2 + (i * fov_degrees / num_segments))
+            angle2 = math.radians(-fov_degrees/2 + ((i + 1) * fov_degrees / num_segments))
             
-            glEnable(GL_LIGHTING)
-            glDisable(GL_BLEND)
-            glPopMatrix()
+            vertices.append((0, 0, 0))
+            vertices.append((view_range * math.cos(angle1), -2.0, view_range * math.sin(angle1)))
+            vertices.append((view_range * math.cos(angle2), -2.0, view_range * math.sin(angle2)))
+        r.primitive('triangles', vertices)
+    
+    @staticmethod
+    def fov_edges(r, view_range, fov_degrees):
+        r.color(1, 0, 0)
+        fov_half = math.radians(fov_degrees / 2)
+        r.primitive('lines', [(0, 0, 0), (view_range * math.cos(-fov_half), -2.0, view_range * math.sin(-fov_half)),
+                              (0, 0, 0), (view_range * math.cos(fov_half), -2.0, view_range * math.sin(fov_half))])
+        r.color(1, 1, 1)
+        r.primitive('lines', [(0, 0, 0), (view_range, -2.0, 0)])
+
+
+class CameraArray:
+    # Structure-of-arrays view over a level's cameras. Rotation, range, FOV cone
+    # and wall occlusion are evaluated for every camera in one batched pass with
+    # the same rules as SecurityCamera.update/update_detection.
+    DTYPES = {'disabled': bool, 'is_detecting': bool, 'rotating': bool}
+    
+    def __init__(self, cameras):
+        self.cameras = cameras
+        self.x = np.array([c.position.x for c in cameras], dtype=float)
+        self.z = np.array([c.position.z for c in cameras], dtype=float)
+        for name in SecurityCamera.ARRAY_FIELDS:
+            values = [getattr(c, name) for c in cameras]
+            setattr(self, name, np.array(values, dtype=self.DTYPES.get(name, float)))
+        for i, camera in enumerate(cameras):
+            camera.array, camera.index = self, i
+        self._walls, self._wall_arrays, self._atlas, self._camera_walls = None, None, None, {}
+    
+    def __len__(self):
+        return len(self.cameras)
+    
+    def rotate(self, dt):
+        angle, target = self.angle.copy(), self.target_angle.copy()
+        timer, rotating = self.rotation_timer.copy(), self.rotating.copy()
+        active = ~self.disabled
+        
+        waiting = active & ~rotating
+        timer[waiting] += dt
+        start = waiting & (timer >= self.rotation_interval)
+        rotating[start] = True
+        target[start] = angle[start] + math.pi / 2
+        timer[start] = 0.0
+        
+        turning = active & self.rotating
+        diff = target - angle
+        diff = np.where(diff > math.pi, math.pi - (math.pi - diff) % (2 * math.pi),
+                        np.where(diff < -math.pi, (diff + math.pi) % (2 * math.pi) - math.pi, diff))
+        step = self.rotation_speed * dt
+        arrived = turning & (np.abs(diff) <= step)
+        moving = turning & ~arrived
+        angle[arrived] = target[arrived]
+        rotating[arrived] = False
+        angle[moving] += np.where(diff[moving] > 0, step[moving], -step[moving])
+        angle[turning] %= 2 * math.pi
+        return angle, target, timer, rotating
+    
+    def visible(self, px, pz, walls, angle=None, grid=None):
+        angle = self.angle if angle is None else angle
+        dx, dz = px - self.x, pz - self.z
+        in_range = ~self.disabled & (np.sqrt(dx * dx + dz * dz) <= self.range)
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        local_x = dx * cos_a - dz * sin_a
+        local_z = dx * sin_a + dz * cos_a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            in_cone = in_range & (local_x > 0) & (np.arctan2(np.abs(local_z), local_x) <= np.radians(self.fov_degrees / 2))
+        candidates = np.nonzero(in_cone)[0]
+        if len(candidates) and (grid is not None or self.cameras[candidates[0]].occlusion_map is not None):
+            for i in candidates:
+                in_cone[i] = self.cameras[i].clear_line_to(px, pz, walls, grid)
+        elif len(candidates) and walls:
+            in_cone[candidates] = ~self.occluded(self.x[candidates], self.z[candidates], px, pz, walls)
+        return in_cone
+    
+    def visible_pairs(self, ci, px, pz, walls, grid=None):
+        # visible() for many points at once: point k is tested against camera
+        # ci[k] only, so callers pass just the pairs that share a CameraGrid cell.
+        dx, dz = px - self.x[ci], pz - self.z[ci]
+        in_range = ~self.disabled[ci] & (np.sqrt(dx * dx + dz * dz) <= self.range[ci])
+        angle = self.angle[ci]
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        local_x = dx * cos_a - dz * sin_a
+        local_z = dx * sin_a + dz * cos_a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            in_cone = in_range & (local_x > 0) & (np.arctan2(np.abs(local_z), local_x) <= np.radians(self.fov_degrees[ci] / 2))
+        candidates = np.nonzero(in_cone)[0]
+        if not len(candidates):
+            return in_cone
+        if self.cameras[0].occlusion_map is not None:
+            state = self.occlusion_states(ci[candidates], px[candidates], pz[candidates])
+            in_cone[candidates] = state == OcclusionMap.VISIBLE
+            candidates = candidates[state == OcclusionMap.MIXED]
+        if len(candidates):
+            in_cone[candidates] = ~self.occluded_pairs(ci[candidates], px[candidates], pz[candidates], walls, grid)
+        return in_cone
+    
+    def occluded_pairs(self, ci, px, pz, walls, grid=None):
+        # Exact raycasts for many pairs, grouped by camera and tested against the
+        # walls inside that camera's range square (all a ray in range can hit).
+        blocked = np.zeros(len(ci), dtype=bool)
+        order = np.argsort(ci, kind='stable')
+        cameras, starts = np.unique(ci[order], return_index=True)
+        for c, members in zip(cameras.tolist(), np.split(order, starts[1:])):
+            if c not in self._camera_walls:
+                camera, reach = self.cameras[c], self.range[c]
+                near = walls if grid is None else grid.query(self.x[c] - reach, self.z[c] - reach, self.x[c] + reach, self.z[c] + reach)
+                self._camera_walls[c] = (np.array([w.position.x for w in near]), np.array([w.position.z for w in near]),
+                                         np.array([w.size.x / 2 for w in near]), np.array([w.size.z / 2 for w in near]))
+            boxes = self._camera_walls[c]
+            if len(boxes[0]):
+                blocked[members] = segments_hit_boxes(self.x[c], self.z[c], px[members][:, None], pz[members][:, None],
+                                                      *boxes).any(axis=1)
+        return blocked
+    
+    def occlusion_states(self, ci, px, pz):
+        # OcclusionMap.lookup for many points: every camera's map is baked and
+        # packed into one flat array, so all points are classified by one gather.
+        if self._atlas is None:
+            maps = [camera.occlusion_map for camera in self.cameras]
+            for occlusion in maps:
+                if occlusion.cells is None:
+                    occlusion.bake()
+            sizes = np.array([occlusion.cells.shape[0] for occlusion in maps])
+            offsets = np.concatenate(([0], np.cumsum(sizes * sizes)[:-1]))
+            self._atlas = (np.concatenate([occlusion.cells.ravel() for occlusion in maps]), offsets, sizes,
+                           np.array([occlusion.x0 for occlusion in maps]), np.array([occlusion.z0 for occlusion in maps]),
+                           np.array([occlusion.resolution for occlusion in maps]))
+        cells, offsets, sizes, x0, z0, resolution = self._atlas
+        i = np.floor((px - x0[ci]) / resolution[ci]).astype(np.int64)
+        j = np.floor((pz - z0[ci]) / resolution[ci]).astype(np.int64)
+        n = sizes[ci]
+        inside = (i >= 0) & (i < n) & (j >= 0) & (j < n)
+        state = np.full(len(ci), OcclusionMap.MIXED, dtype=np.int8)
+        state[inside] = cells[offsets[ci[inside]] + i[inside] * n[inside] + j[inside]]
+        return state
+    
+    def occluded(self, x1, z1, x2, z2, walls):
+        if self._walls is not walls:
+            self._walls = walls
+            self._wall_arrays = (np.array([w.position.x for w in walls]), np.array([w.position.z for w in walls]),
+                                 np.array([w.size.x / 2 for w in walls]), np.array([w.size.z / 2 for w in walls]))
+        return segments_hit_boxes(x1[:, None], z1[:, None], x2, z2, *self._wall_arrays).any(axis=1)
+    
+    def advance(self, dt):
+        # Rotation only, for callers that run detection themselves.
+        self.angle[:], self.target_angle[:], self.rotation_timer[:], self.rotating[:] = self.rotate(dt)
+    
+    def update(self, dt, player, walls, current_time, grid=None):
+        angle, target, timer, rotating = self.rotate(dt)
+        seen = self.visible(player.position.x, player.position.z, walls, angle, grid)
+        
+        started = seen & ~self.is_detecting
+        continuing = seen & self.is_detecting
+        detection_time = np.where(continuing, current_time - self.detection_start_time, 0.0)
+        start_time = np.where(started, current_time, np.where(continuing, self.detection_start_time, 0.0))
+        alarms = np.nonzero(continuing & (detection_time / self.detection_threshold >= 0.8))[0]
+        
+        # The scalar loop stops at the first camera that raises the alarm, so
+        # cameras after it keep their previous state for this tick.
+        commit = slice(None) if not len(alarms) else slice(0, alarms[0] + 1)
+        self.angle[commit], self.target_angle[commit] = angle[commit], target[commit]
+        self.rotation_timer[commit], self.rotating[commit] = timer[commit], rotating[commit]
+        self.is_detecting[commit] = seen[commit]
+        self.detection_time[commit], self.detection_start_time[commit] = detection_time[commit], start_time[commit]
+        return len(alarms) > 0
+
+class TimerWheel:
+    # Hashed timing wheel: an event due on tick t sits in slot t % size, so each
+    # tick only looks at one slot. Events more than a revolution away stay in
+    # their slot until their tick comes round.
+    def __init__(self, size=512):
+        self.slots = [[] for _ in range(size)]
+        self.tick = 0
+    
+    def schedule(self, delay, item):
+        due = self.tick + max(1, delay)
+        self.slots[due % len(self.slots)].append((due, item))
+    
+    def advance(self):
+        self.tick += 1
+        slot = self.slots[self.tick % len(self.slots)]
+        if not slot:
+            return ()
+        due = [item for tick, item in slot if tick == self.tick]
+        if len(due) == len(slot):
+            slot.clear()
+        else:
+            slot[:] = [entry for entry in slot if entry[0] != self.tick]
+        return due
+
+class CameraGrid:
+    # Uniform grid of camera ranges: each camera is listed in every cell its
+    # range square touches, so the cameras that could see a point are those in
+    # the point's cell. Built once per level, like WallGrid.
+    def __init__(self, cameras, cell_size=4.0):
+        self.cell_size, self.cells = cell_size, {}
+        for i, camera in enumerate(cameras):
+            camera_range = camera.range + 1e-6
+            x0, z0 = self.cell(camera.position.x - camera_range, camera.position.z - camera_range)
+            x1, z1 = self.cell(camera.position.x + camera_range, camera.position.z + camera_range)
+            for ix in range(x0, x1 + 1):
+                for iz in range(z0, z1 + 1):
+                    self.cells.setdefault((ix, iz), []).append(i)
+    
+    def cell(self, x, z):
+        return math.floor(x / self.cell_size), math.floor(z / self.cell_size)
+    
+    def near(self, x, z):
+        return self.cells.get(self.cell(x, z), ())
+    
+    def crowding(self):
+        return max(map(len, self.cells.values()), default=0)
+
+class CameraSchedule:
+    # Event-driven camera updates for the scalar path. Cameras only change state
+    # when a rotation starts or ends, and both are events on a TimerWheel, on
+    # exactly the tick polling would have reached them. A turning camera's angles
+    # are computed once per rotation and applied lazily by sync(), so per tick
+    # the only cameras touched are those whose range covers the player's grid
+    # cell, plus any camera still detecting (it needs the update to reset).
+    # rotation_timer is not advanced while a camera sleeps, and anything reading
+    # camera angles outside update() must call sync() first; Game.render does.
+    def __init__(self, cameras, dt, grid):
+        self.cameras, self.dt, self.grid = cameras, dt, grid
+        self.wheel, self.turning, self.waits, self.paths = TimerWheel(), {}, {}, {}
+        self.detecting = set()
+        for i, camera in enumerate(cameras):
+            if camera.is_detecting:
+                self.detecting.add(i)
+            if camera.disabled:
+                continue
+            if camera.rotating:
+                self.turn(i)
+            else:
+                self.sleep(i, camera.rotation_timer)
+    
+    def ticks_until_rotation(self, timer, interval):
+        # Replays update()'s float accumulation so the wake tick is exactly the
+        # tick on which polling would have started the rotation.
+        key = (timer, interval)
+        if key not in self.waits:
+            ticks = 0
+            while True:
+                ticks += 1
+                timer += self.dt
+                if timer >= interval:
+                    break
+            self.waits[key] = ticks
+        return self.waits[key]
+    
+    def rotation_path(self, angle, target, step):
+        # The angle after each tick of a rotation, ending where it arrives.
+        # Cameras settle on a handful of headings, so paths are shared.
+        key = (angle, target, step)
+        if key not in self.paths:
+            path, arrived = [], False
+            while not arrived:
+                angle, arrived = turn_toward(angle, target, step)
+                path.append(angle)
+            self.paths[key] = path
+        return self.paths[key]
+    
+    def sleep(self, i, timer=0.0):
+        interval = self.cameras[i].rotation_interval
+        if math.isfinite(interval):
+            self.wheel.schedule(self.ticks_until_rotation(timer, interval), i)
+    
+    def turn(self, i):
+        camera = self.cameras[i]
+        path = self.rotation_path(camera.angle, camera.target_angle, camera.rotation_speed * self.dt)
+        self.turning[i] = self.wheel.tick, path
+        self.wheel.schedule(len(path), i)
+    
+    def sync(self, i=None):
+        # Bring turning cameras (or just camera i) to the current tick's angle.
+        for j in (self.turning if i is None else (i,) if i in self.turning else ()):
+            start, path = self.turning[j]
+            elapsed = self.wheel.tick - start
+            if elapsed:
+                self.cameras[j].angle = path[elapsed - 1]
+    
+    def update(self, player, walls, current_time, grid=None):
+        cameras = self.cameras
+        for i in self.wheel.advance():
+            camera = cameras[i]
+            if i in self.turning:
+                camera.angle, camera.rotating = self.turning.pop(i)[1][-1], False
+                self.sleep(i)
+            else:
+                camera.start_rotation()
+                self.turn(i)
+        
+        nearby = self.grid.near(player.position.x, player.position.z)
+        if self.detecting:
+            nearby = sorted(self.detecting.union(nearby))
+        for i in nearby:
+            self.sync(i)
+            status = cameras[i].update_detection(player, walls, current_time, grid)
+            if status == 'none':
+                self.detecting.discard(i)
+            else:
+                self.detecting.add(i)
+                if status == 'alarm':
+                    return True
+        return False
+
+class OcclusionMap:
+    # Per-camera visibility bitmap over the floor square covered by its range.
+    # Walls are static, so each cell is classified once: VISIBLE when no wall
+    # touches the hull of the camera and the cell, BLOCKED when all four corners
+    # sit in the same wall's (convex) shadow, and MIXED otherwise, in which case
+    # the caller falls back to an exact raycast. Baked lazily on first lookup.
+    MIXED, VISIBLE, BLOCKED = 0, 1, 2
+    
+    def __init__(self, camera, walls, grid=None, resolution=0.25):
+        self.camera, self.walls, self.grid, self.resolution = camera, walls, grid, resolution
+        self.cells = None
+    
+    @property
+    def nbytes(self):
+        return 0 if self.cells is None else self.cells.nbytes
+    
+    def lookup(self, x, z):
+        if self.cells is None:
+            self.bake()
+        i = math.floor((x - self.x0) / self.resolution)
+        j = math.floor((z - self.z0) / self.resolution)
+        if 0 <= i < self.cells.shape[0] and 0 <= j < self.cells.shape[1]:
+            state = self.cells[i, j]
+            if state != self.MIXED:
+                return state == self.VISIBLE
+        return None
+    
+    def bake(self):
+        cx, cz, res = self.camera.position.x, self.camera.position.z, self.resolution
+        n = max(1, math.ceil(2 * self.camera.range / res))
+        self.x0, self.z0 = cx - n * res / 2, cz - n * res / 2
+        corners_x = self.x0 + np.arange(n + 1) * res
+        corners_z = self.z0 + np.arange(n + 1) * res
+        px, pz = np.meshgrid(corners_x, corners_z, indexing='ij')
+        if self.grid is not None:
+            walls = self.grid.query(self.x0, self.z0, self.x0 + n * res, self.z0 + n * res)
+        else:
+            walls = self.walls
+        
+        clear = np.ones((n, n), dtype=bool)
+        blocked = np.zeros((n, n), dtype=bool)
+        a = (px[:-1, :-1], pz[:-1, :-1]), (px[1:, :-1], pz[1:, :-1]), (px[1:, 1:], pz[1:, 1:]), (px[:-1, 1:], pz[:-1, 1:])
+        for wall in walls:
+            left, right = wall.position.x - wall.size.x / 2, wall.position.x + wall.size.x / 2
+            top, bottom = wall.position.z - wall.size.z / 2, wall.position.z + wall.size.z / 2
+            touched = (a[0][0] <= right) & (a[2][0] >= left) & (a[0][1] <= bottom) & (a[2][1] >= top)
+            for k in range(4):
+                touched |= triangle_touches_box(cx, cz, a[k], a[(k + 1) % 4], left, right, top, bottom)
+            clear &= ~touched
+            for shadow in wall_shadows(cx, cz, px, pz, wall, left, right, top, bottom):
+                blocked |= shadow[:-1, :-1] & shadow[1:, :-1] & shadow[1:, 1:] & shadow[:-1, 1:]
+        
+        self.cells = np.full((n, n), self.MIXED, dtype=np.int8)
+        self.cells[clear] = self.VISIBLE
+        self.cells[blocked & ~clear] = self.BLOCKED
+    
+    def load(self, x0, z0, cells):
+        # A map baked ahead of time, e.g. a read-only view into a compiled level.
+        self.x0, self.z0, self.cells = x0, z0, cells
 
+def wall_shadows(cx, cz, px, pz, wall, left, right, top, bottom):
+    # The two cases of SecurityCamera.line_intersects_wall evaluated for every
+    # grid corner. With the camera fixed, each case covers a convex region.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_x = ((cx < left) & (px > right)) | ((cx > right) & (px < left))
+        z_intersect = cz + (wall.position.x - cx) / (px - cx) * (pz - cz)
+        cross_z = ((cz < top) & (pz > bottom)) | ((cz > bottom) & (pz < top))
+        x_intersect = cx + (wall.position.z - cz) / (pz - cz) * (px - cx)
+    return (cross_x & (top <= z_intersect) & (z_intersect <= bottom),
+            cross_z & (left <= x_intersect) & (x_intersect <= right))
 
+def triangle_touches_box(cx, cz, a, b, left, right, top, bottom):
+    # Separating-axis test of triangles (camera, a, b) against one box; touching
+    # counts as overlap so the result is conservative.
+    xs, zs = (np.full_like(a[0], cx), a[0], b[0]), (np.full_like(a[1], cz), a[1], b[1])
+    overlap = ((np.minimum(np.minimum(xs[0], xs[1]), xs[2]) <= right) & (np.maximum(np.maximum(xs[0], xs[1]), xs[2]) >= left) &
+               (np.minimum(np.minimum(zs[0], zs[1]), zs[2]) <= bottom) & (np.maximum(np.maximum(zs[0], zs[1]), zs[2]) >= top))
+    box = ((left, top), (right, top), (right, bottom), (left, bottom))
+    for i in range(3):
+        nx, nz = zs[i] - zs[(i + 1) % 3], xs[(i + 1) % 3] - xs[i]
+        tri = [nx * xs[k] + nz * zs[k] for k in range(3)]
+        corners = [nx * bx + nz * bz for bx, bz in box]
+        overlap &= (np.minimum(np.minimum(tri[0], tri[1]), tri[2]) <= np.maximum(np.maximum(corners[0], corners[1]), np.maximum(corners[2], corners[3])))
+        overlap &= (np.maximum(np.maximum(tri[0], tri[1]), tri[2]) >= np.minimum(np.minimum(corners[0], corners[1]), np.minimum(corners[2], corners[3])))
+    return overlap
 
+def segments_hit_boxes(x1, z1, x2, z2, wx, wz, hx, hz):
+    # Batched SecurityCamera.line_intersects_wall over broadcast segment/box arrays.
+    left, right, top, bottom = wx - hx, wx + hx, wz - hz, wz + hz
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_x = ((x1 < left) & (x2 > right)) | ((x1 > right) & (x2 < left))
+        t = np.where(x2 != x1, (wx - x1) / (x2 - x1), 0)
+        z_intersect = z1 + t * (z2 - z1)
+        hit = cross_x & (top <= z_intersect) & (z_intersect <= bottom)
+        cross_z = ((z1 < top) & (z2 > bottom)) | ((z1 > bottom) & (z2 < top))
+        t = np.where(z2 != z1, (wz - z1) / (z2 - z1), 0)
+        x_intersect = x1 + t * (x2 - x1)
+        hit |= cross_z & (left <= x_intersect) & (x_intersect <= right)
+    return hit
 
 class Laser:
+    ARRAY_FIELDS = ('movement_time', 'active')
+    __slots__ = ('array', 'index', 'original_start', 'original_end', '_segment', '_previous_segment',
+                 'movement_type', 'movement_speed', 'movement_range', 'rotation_center', 'swing_angle',
+                 'original_length', 'original_angle', '_movement_time', '_active')
+    movement_time, active = ArrayField(), ArrayField()
+    
     def __init__(self, x1, z1, x2, z2, movement_type='static'):
+        self.array, self.index = None, None
         self.original_start, self.original_end = Vector3(x1, 0, z1), Vector3(x2, 0, z2)
-        self.start, self.end = Vector3(x1, 0, z1), Vector3(x2, 0, z2)
+        self._segment = self._previous_segment = (x1, z1, x2, z2)
         self.active = True
         self.movement_type = movement_type
         self.movement_speed, self.movement_time, self.movement_range = 0.02, 0, 3.0
@@ -359,111 +1115,423 @@ class Laser:
         self.original_length = math.sqrt((x2 - x1)**2 + (z2 - z1)**2)
         self.original_angle = math.atan2(z2 - z1, x2 - x1)
     
+    # The beam as (x1, z1, x2, z2) now and before the last update; read from
+    # the LaserArray once the laser is bound to one.
+    @property
+    def segment(self):
+        if self.array is None:
+            return self._segment
+        return tuple(self.array.segments[:, self.index].tolist())
+    
+    @segment.setter
+    def segment(self, value):
+        if self.array is None:
+            self._segment = value
+        else:
+            self.array.segments[:, self.index] = value
+    
+    @property
+    def previous_segment(self):
+        if self.array is None:
+            return self._previous_segment
+        return tuple(self.array.previous_segments[:, self.index].tolist())
+    
+    @previous_segment.setter
+    def previous_segment(self, value):
+        if self.array is None:
+            self._previous_segment = value
+        else:
+            self.array.previous_segments[:, self.index] = value
+    
+    @property
+    def start(self):
+        x1, z1, x2, z2 = self.segment
+        return Vector3(x1, 0, z1)
+    
+    @property
+    def end(self):
+        x1, z1, x2, z2 = self.segment
+        return Vector3(x2, 0, z2)
+    
     def update(self):
-        self.movement_time += self.movement_speed
+        self.previous_segment = x1, z1, x2, z2 = self.segment
+        self.movement_time = movement_time = self.movement_time + self.movement_speed
         
         if self.movement_type == 'rotating':
-            angle = self.original_angle + self.movement_time
+            angle = self.original_angle + movement_time
             half_length = self.original_length / 2
             center_x, center_z = self.rotation_center.x, self.rotation_center.z
-            self.start.x = center_x - half_length * math.cos(angle)
-            self.start.z = center_z - half_length * math.sin(angle)
-            self.end.x = center_x + half_length * math.cos(angle)
-            self.end.z = center_z + half_length * math.sin(angle)
+            x1 = center_x - half_length * math.cos(angle)
+            z1 = center_z - half_length * math.sin(angle)
+            x2 = center_x + half_length * math.cos(angle)
+            z2 = center_z + half_length * math.sin(angle)
             
         elif self.movement_type == 'sliding':
-            slide_offset = math.sin(self.movement_time) * self.movement_range
+            slide_offset = math.sin(movement_time) * self.movement_range
             perp_angle = self.original_angle + math.pi / 2
             offset_x, offset_z = slide_offset * math.cos(perp_angle), slide_offset * math.sin(perp_angle)
-            self.start.x, self.start.z = self.original_start.x + offset_x, self.original_start.z + offset_z
-            self.end.x, self.end.z = self.original_end.x + offset_x, self.original_end.z + offset_z
+            x1, z1 = self.original_start.x + offset_x, self.original_start.z + offset_z
+            x2, z2 = self.original_end.x + offset_x, self.original_end.z + offset_z
             
         elif self.movement_type in ['horizontal_fixed', 'vertical_fixed']:
-            offset = math.sin(self.movement_time) * self.movement_range
-            self.start.x, self.start.z = self.original_start.x, self.original_start.z
+            offset = math.sin(movement_time) * self.movement_range
+            x1, z1 = self.original_start.x, self.original_start.z
             if self.movement_type == 'horizontal_fixed':
-                self.end.x, self.end.z = self.original_end.x, self.original_end.z + offset
+                x2, z2 = self.original_end.x, self.original_end.z + offset
             else:
-                self.end.x, self.end.z = self.original_end.x + offset, self.original_end.z
+                x2, z2 = self.original_end.x + offset, self.original_end.z
+        self.segment = (x1, z1, x2, z2)
     
     def check_collision(self, player):
         if not self.active:
             return False
-        if player.position.y > 0.8: 
-            return False
-            
-        px, pz = player.position.x, player.position.z
-        x1, z1, x2, z2 = self.start.x, self.start.z, self.end.x, self.end.z
-        A, B, C = z2 - z1, x1 - x2, x2 * z1 - x1 * z2
-        distance = abs(A * px + B * pz + C) / math.sqrt(A * A + B * B)
-        if distance < 0.3:
-            min_x, max_x, min_z, max_z = min(x1, x2), max(x1, x2), min(z1, z2), max(z1, z2)
-            return px >= min_x - 0.3 and px <= max_x + 0.3 and pz >= min_z - 0.3 and pz <= max_z + 0.3
-        return False
+        return laser_hits_player(player.previous_position, player.position, self.previous_segment, self.segment)
     
-    def draw(self):
+    def draw(self, r):
         if not self.active:
             return
-        for pos in [self.start, self.end]:
-            glPushMatrix()
-            glTranslatef(pos.x, pos.y + 0.05, pos.z)  
-            glColor3f(*ORANGE)
-            glutSolidCube(0.3)
-            glPopMatrix()
-        glColor3f(*RED)
-        glLineWidth(3.0)
-        glBegin(GL_LINES)
-        glVertex3f(self.start.x, self.start.y + 0.05, self.start.z)  
-        glVertex3f(self.end.x, self.end.y + 0.05, self.end.z)  
-        glEnd()
-        glLineWidth(1.0)
+        start, end = self.start, self.end
+        r.begin()
+        for pos in [start, end]:
+            r.push()
+            r.translate(pos.x, pos.y + 0.05, pos.z)  
+            r.color(*ORANGE)
+            r.cube(0.3)
+            r.pop()
+        r.begin(line_width=3.0)
+        r.color(*RED)
+        r.primitive('lines', [(start.x, start.y + 0.05, start.z),
+                              (end.x, end.y + 0.05, end.z)])
+
+def laser_touches(px, pz, x1, z1, x2, z2):
+    # Within 0.3 of the beam line and of its bounding box. The box test is the
+    # cheaper of the two, so it runs first.
+    if x1 < x2:
+        if px < x1 - 0.3 or px > x2 + 0.3:
+            return False
+    elif px < x2 - 0.3 or px > x1 + 0.3:
+        return False
+    if z1 < z2:
+        if pz < z1 - 0.3 or pz > z2 + 0.3:
+            return False
+    elif pz < z2 - 0.3 or pz > z1 + 0.3:
+        return False
+    A, B, C = z2 - z1, x1 - x2, x2 * z1 - x1 * z2
+    norm = math.sqrt(A * A + B * B)
+    if norm == 0:
+        return False
+    return abs(A * px + B * pz + C) / norm < 0.3
+
+def polynomial_value(coefficients, t):
+    value = 0.0
+    for c in coefficients:
+        value = value * t + c
+    return value
+
+def polynomial_roots(coefficients, lo, hi):
+    # Real roots in [lo, hi] of a polynomial, highest power first. The
+    # derivative's roots split the interval into monotone pieces and each
+    # piece whose ends differ in sign is bisected.
+    n = len(coefficients) - 1
+    if n < 1:
+        return []
+    slope = [c * (n - i) for i, c in enumerate(coefficients[:-1])]
+    points = [lo] + polynomial_roots(slope, lo, hi) + [hi]
+    roots = []
+    for a, b in zip(points, points[1:]):
+        fa, fb = polynomial_value(coefficients, a), polynomial_value(coefficients, b)
+        if fa == 0:
+            roots.append(a)
+        elif (fa < 0) != (fb < 0) and fb != 0:
+            for _ in range(48):
+                m = (a + b) / 2
+                fm = polynomial_value(coefficients, m)
+                if (fm < 0) == (fa < 0):
+                    a, fa = m, fm
+                else:
+                    b = m
+            roots.append((a + b) / 2)
+    return roots
+
+def laser_sweep(p0x, p0y, p0z, p1x, p1y, p1z, a0x, a0z, b0x, b0z, a1x, a1z, b1x, b1z):
+    # Whether laser_touches holds at any time in the tick, with the player and
+    # both beam ends moving linearly. The height and bounding box conditions
+    # only change where a coordinate difference crosses its limit, and those
+    # times split the tick into cells. Within a cell the player is inside the
+    # band somewhere exactly when g(t) = 0.09 |B - A|^2 - cross(B - A, P - A)^2,
+    # a quartic, is positive at the cell's ends or at one of its critical points.
+    dx0, dz0 = b0x - a0x, b0z - a0z
+    ddx, ddz = (b1x - a1x) - dx0, (b1z - a1z) - dz0
+    qx0, qz0 = p0x - a0x, p0z - a0z
+    dqx, dqz = (p1x - a1x) - qx0, (p1z - a1z) - qz0
+    c0 = dx0 * qz0 - dz0 * qx0
+    c1 = dx0 * dqz + ddx * qz0 - dz0 * dqx - ddz * qx0
+    c2 = ddx * dqz - ddz * dqx
+    l0, l1, l2 = dx0 * dx0 + dz0 * dz0, 2 * (dx0 * ddx + dz0 * ddz), ddx * ddx + ddz * ddz
+    # |B - A|^2 is convex in t, so its largest value is at an end of the tick.
+    # If cross() never gets near zero against that, the player never reaches
+    # the band and the cells need not be built.
+    ends = (c0, c0 + c1 + c2)
+    if c2 != 0 and 0 < -c1 / (2 * c2) < 1:
+        ends += (c0 - c1 * c1 / (4 * c2),)
+    if (min(ends) > 0 or max(ends) < 0) and min(c * c for c in ends) >= 0.09 * max(l0, l0 + l1 + l2):
+        return False
+    times = [0.0, 1.0]
+    for d0, d1, limits in ((p0x - a0x, p1x - a1x, (-0.3, 0.3)), (p0x - b0x, p1x - b1x, (-0.3, 0.3)),
+                           (p0z - a0z, p1z - a1z, (-0.3, 0.3)), (p0z - b0z, p1z - b1z, (-0.3, 0.3)),
+                           (p0y, p1y, (0.8,))):
+        if d1 != d0:
+            for limit in limits:
+                t = (limit - d0) / (d1 - d0)
+                if 0 < t < 1:
+                    times.append(t)
+    times.sort()
+    g = (-c2 * c2, -2 * c1 * c2, 0.09 * l2 - c1 * c1 - 2 * c0 * c2, 0.09 * l1 - 2 * c0 * c1, 0.09 * l0 - c0 * c0)
+    slope = (4 * g[0], 3 * g[1], 2 * g[2], g[3])
+    for lo, hi in zip(times, times[1:]):
+        if lo == hi:
+            continue
+        t = (lo + hi) / 2
+        if p0y + t * (p1y - p0y) > 0.8:
+            continue
+        px, pz = p0x + t * (p1x - p0x), p0z + t * (p1z - p0z)
+        ax, az = a0x + t * (a1x - a0x), a0z + t * (a1z - a0z)
+        bx, bz = b0x + t * (b1x - b0x), b0z + t * (b1z - b0z)
+        if not (min(ax, bx) - 0.3 <= px <= max(ax, bx) + 0.3 and min(az, bz) - 0.3 <= pz <= max(az, bz) + 0.3):
+            continue
+        for t in [lo, hi] + polynomial_roots(slope, lo, hi):
+            if polynomial_value(g, t) > 0:
+                return True
+    return False
+
+def laser_hits_player(p0, p1, previous, current):
+    # Swept collision: the player moves from p0 to p1 while the beam moves from
+    # previous to current. The end of the tick is tested first as a single
+    # snapshot. Otherwise a hit anywhere in the tick needs the player within
+    # the beam's half extent, plus everything that moved and the half-width, of
+    # its midpoint on each axis (LaserArray.collides' broad phase), and
+    # laser_sweep covers the rest of the tick so beams and players cannot pass
+    # through each other.
+    a0x, a0z, b0x, b0z = previous
+    a1x, a1z, b1x, b1z = current
+    p0x, p0z, p1x, p1z = p0.x, p0.z, p1.x, p1.z
+    if p1.y <= 0.8 and laser_touches(p1x, p1z, a1x, a1z, b1x, b1z):
+        return True
+    if (abs(p1x - (a1x + b1x) * 0.5) > abs(b1x - a1x) * 0.5 + abs(a1x - a0x) + abs(b1x - b0x) + abs(p1x - p0x) + 0.3 or
+            abs(p1z - (a1z + b1z) * 0.5) > abs(b1z - a1z) * 0.5 + abs(a1z - a0z) + abs(b1z - b0z) + abs(p1z - p0z) + 0.3):
+        return False
+    return laser_sweep(p0x, p0.y, p0z, p1x, p1.y, p1z, a0x, a0z, b0x, b0z, a1x, a1z, b1x, b1z)
+
+def laser_touches_many(px, pz, x1, z1, x2, z2):
+    # laser_touches over arrays.
+    A, B, C = z2 - z1, x1 - x2, x2 * z1 - x1 * z2
+    norm = np.sqrt(A * A + B * B)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distance = np.abs(A * px + B * pz + C) / norm
+    return ((norm != 0) & (distance < 0.3) & (px >= np.minimum(x1, x2) - 0.3) & (px <= np.maximum(x1, x2) + 0.3) &
+            (pz >= np.minimum(z1, z2) - 0.3) & (pz <= np.maximum(z1, z2) + 0.3))
+
+def laser_hits_many(p0x, p0y, p0z, p1x, p1y, p1z, a0x, a0z, b0x, b0z, a1x, a1z, b1x, b1z):
+    # laser_hits_player over arrays of player/beam pairs. The box reject, the
+    # end-of-tick snapshot and laser_sweep's band reject run as one batch; only
+    # pairs left undecided go through laser_sweep itself.
+    hit = (p1y <= 0.8) & laser_touches_many(p1x, p1z, a1x, a1z, b1x, b1z)
+    beam_x0 = np.minimum(np.minimum(a0x, b0x), np.minimum(a1x, b1x))
+    beam_x1 = np.maximum(np.maximum(a0x, b0x), np.maximum(a1x, b1x))
+    beam_z0 = np.minimum(np.minimum(a0z, b0z), np.minimum(a1z, b1z))
+    beam_z1 = np.maximum(np.maximum(a0z, b0z), np.maximum(a1z, b1z))
+    undecided = (~hit & (np.minimum(p0x, p1x) - 0.3 <= beam_x1) & (np.maximum(p0x, p1x) + 0.3 >= beam_x0) &
+                 (np.minimum(p0z, p1z) - 0.3 <= beam_z1) & (np.maximum(p0z, p1z) + 0.3 >= beam_z0))
+    # laser_sweep's band reject, for every pair at once.
+    dx0, dz0 = b0x - a0x, b0z - a0z
+    ddx, ddz = (b1x - a1x) - dx0, (b1z - a1z) - dz0
+    qx0, qz0 = p0x - a0x, p0z - a0z
+    dqx, dqz = (p1x - a1x) - qx0, (p1z - a1z) - qz0
+    c0 = dx0 * qz0 - dz0 * qx0
+    c1 = dx0 * dqz + ddx * qz0 - dz0 * dqx - ddz * qx0
+    c2 = ddx * dqz - ddz * dqx
+    l0, l1, l2 = dx0 * dx0 + dz0 * dz0, 2 * (dx0 * ddx + dz0 * ddz), ddx * ddx + ddz * ddz
+    c_end = c0 + c1 + c2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vertex = -c1 / (2 * c2)
+        c_vertex = np.where((c2 != 0) & (0 < vertex) & (vertex < 1), c0 - c1 * c1 / (4 * c2), c0)
+    low, high = np.minimum(np.minimum(c0, c_end), c_vertex), np.maximum(np.maximum(c0, c_end), c_vertex)
+    nearest = np.minimum(np.minimum(c0 * c0, c_end * c_end), c_vertex * c_vertex)
+    undecided &= ~(((low > 0) | (high < 0)) & (nearest >= 0.09 * np.maximum(l0, l0 + l1 + l2)))
+    pairs = np.nonzero(undecided)[0]
+    if len(pairs):
+        columns = np.stack(np.broadcast_arrays(p0x, p0y, p0z, p1x, p1y, p1z, a0x, a0z, b0x, b0z, a1x, a1z, b1x, b1z))
+        for i, row in zip(pairs.tolist(), columns[:, pairs].T.tolist()):
+            hit[i] = laser_sweep(*row)
+    return hit
+
+class LaserArray:
+    # Structure-of-arrays view over a level's lasers. Every beam moves in one
+    # batched pass; collision applies a cheap per-axis reject to all beams at
+    # once and the exact swept test only to the few near the player.
+    DTYPES = {'active': bool}
+    
+    def __init__(self, lasers):
+        self.lasers = lasers
+        for name in Laser.ARRAY_FIELDS:
+            values = [getattr(laser, name) for laser in lasers]
+            setattr(self, name, np.array(values, dtype=self.DTYPES.get(name, float)))
+        self.segments = np.array([laser.segment for laser in lasers], dtype=float).reshape(-1, 4).T.copy()
+        self.previous_segments = np.array([laser.previous_segment for laser in lasers], dtype=float).reshape(-1, 4).T.copy()
+        for i, laser in enumerate(lasers):
+            laser.array, laser.index = self, i
+        
+        # Every movement type as base + scale * (cos, sin) of the beam angle +
+        # offset * direction, where offset = sin(movement_time) * range.
+        n = len(lasers)
+        self.base, self.scale, self.direction = np.zeros((4, n)), np.zeros((4, n)), np.zeros((4, n))
+        self.base_angle = np.array([laser.original_angle for laser in lasers], dtype=float)
+        self.speed = np.array([laser.movement_speed for laser in lasers], dtype=float)
+        self.range = np.array([laser.movement_range for laser in lasers], dtype=float)
+        for i, laser in enumerate(lasers):
+            start, end = laser.original_start, laser.original_end
+            self.base[:, i] = start.x, start.z, end.x, end.z
+            if laser.movement_type == 'rotating':
+                half_length = laser.original_length / 2
+                center = laser.rotation_center
+                self.base[:, i] = center.x, center.z, center.x, center.z
+                self.scale[:, i] = -half_length, -half_length, half_length, half_length
+            elif laser.movement_type == 'sliding':
+                perp_angle = laser.original_angle + math.pi / 2
+                self.direction[:, i] = (math.cos(perp_angle), math.sin(perp_angle)) * 2
+            elif laser.movement_type == 'horizontal_fixed':
+                self.direction[3, i] = 1.0
+            elif laser.movement_type == 'vertical_fixed':
+                self.direction[2, i] = 1.0
+            else:
+                self.base[:, i] = laser.segment
+        self.rotates = self.scale.any(axis=0)
+        # Scratch buffers so a tick allocates no arrays.
+        self.trig, self.swing = np.zeros((4, n)), np.zeros((4, n))
+        self.angle, self.offset, self.reach, self.gap = np.zeros(n), np.zeros(n), np.zeros(n), np.zeros(n)
+        self.near, self.within = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        self.rows, self.previous_rows = tuple(self.segments), tuple(self.previous_segments)
+    
+    def __len__(self):
+        return len(self.lasers)
+    
+    def update(self):
+        self.previous_segments[:] = self.segments
+        self.movement_time += self.speed
+        angle, trig, offset = self.angle, self.trig, self.offset
+        np.add(self.base_angle, self.movement_time, out=angle)
+        np.cos(angle, out=trig[0], where=self.rotates)
+        np.sin(angle, out=trig[1], where=self.rotates)
+        trig[2:] = trig[:2]
+        np.sin(self.movement_time, out=offset)
+        offset *= self.range
+        np.multiply(self.scale, trig, out=self.segments)
+        self.segments += self.base
+        np.multiply(offset, self.direction, out=self.swing)
+        self.segments += self.swing
+    
+    def collides(self, player):
+        p0, p1 = player.previous_position, player.position
+        a0x, a0z, b0x, b0z = self.previous_rows
+        a1x, a1z, b1x, b1z = self.rows
+        reach, gap, near, within = self.reach, self.gap, self.near, self.within
+        np.copyto(near, self.active)
+        # A hit anywhere in the tick needs the player within the beam's half
+        # extent, plus everything that moved, of its midpoint on each axis.
+        for a0, b0, a1, b1, q0, q1 in ((a0x, b0x, a1x, b1x, p0.x, p1.x), (a0z, b0z, a1z, b1z, p0.z, p1.z)):
+            np.subtract(b1, a1, out=reach)
+            np.abs(reach, out=reach)
+            reach *= 0.5
+            np.subtract(a1, a0, out=gap)
+            np.abs(gap, out=gap)
+            reach += gap
+            np.subtract(b1, b0, out=gap)
+            np.abs(gap, out=gap)
+            reach += gap
+            reach += abs(q1 - q0)
+            reach += 0.3
+            np.add(a1, b1, out=gap)
+            gap *= 0.5
+            np.subtract(q1, gap, out=gap)
+            np.abs(gap, out=gap)
+            np.less_equal(gap, reach, out=within)
+            near &= within
+        if not near.any():
+            return False
+        for i in np.nonzero(near)[0]:
+            if laser_hits_player(p0, p1, tuple(self.previous_segments[:, i].tolist()), tuple(self.segments[:, i].tolist())):
+                return True
+        return False
+    
+    def hits(self, p0x, p0y, p0z, p1x, p1y, p1z, alive):
+        # collides() for many players: the same broad phase as a lasers x players
+        # matrix, then the exact swept test on the near pairs as one batch.
+        # Returns the indices hit.
+        near = self.active[:, None] & alive[None, :]
+        a0x, a0z, b0x, b0z = self.previous_rows
+        a1x, a1z, b1x, b1z = self.rows
+        for a0, b0, a1, b1, q0, q1 in ((a0x, b0x, a1x, b1x, p0x, p1x), (a0z, b0z, a1z, b1z, p0z, p1z)):
+            reach = (np.abs(b1 - a1) * 0.5 + np.abs(a1 - a0) + np.abs(b1 - b0))[:, None] + np.abs(q1 - q0)[None, :] + 0.3
+            near &= np.abs(q1[None, :] - ((a1 + b1) * 0.5)[:, None]) <= reach
+        li, ai = np.nonzero(near)
+        if not len(li):
+            return []
+        previous, current = self.previous_segments[:, li], self.segments[:, li]
+        hit = laser_hits_many(p0x[ai], p0y[ai], p0z[ai], p1x[ai], p1y[ai], p1z[ai], *previous, *current)
+        return np.unique(ai[hit]).tolist()
 
 class Terminal:
+    __slots__ = ('position', 'hacked', 'type')
+    
     def __init__(self, x, z, terminal_type):
         self.position = Vector3(x, 0.75, z)
         self.hacked = False
         self.type = terminal_type
     
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y, self.position.z)
+    def draw(self, r, light=6):
+        r.begin()
+        r.push()
+        r.translate(self.position.x, self.position.y, self.position.z)
         
         if self.hacked:
-            glColor3f(*GREEN)
+            r.color(*GREEN)
         else:
-            glColor3f(*RED) if self.type == 'camera' else glColor3f(*ORANGE)
+            r.color(*RED) if self.type == 'camera' else r.color(*ORANGE)
         
-        glScalef(1.0, 1.5, 0.3)
-        glutSolidCube(1.0)
-        glPopMatrix()
+        r.scale(1.0, 1.5, 0.3)
+        r.cube(1.0)
+        r.pop()
         
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y - 0.5, self.position.z)
-        glColor3f(0.3, 0.3, 0.3)
-        glScalef(0.8, 0.5, 0.6)
-        glutSolidCube(1.0)
-        glPopMatrix()
+        r.push()
+        r.translate(self.position.x, self.position.y - 0.5, self.position.z)
+        r.color(0.3, 0.3, 0.3)
+        r.scale(0.8, 0.5, 0.6)
+        r.cube(1.0)
+        r.pop()
         
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y + 0.2, self.position.z + 0.16)
+        r.push()
+        r.translate(self.position.x, self.position.y + 0.2, self.position.z + 0.16)
         if self.hacked:
-            glColor3f(0.8, 1, 0.8)
+            r.color(0.8, 1, 0.8)
         else:
-            glColor3f(1, 0.6, 0.6) if self.type == 'camera' else glColor3f(1, 0.8, 0.6)
-        glScalef(0.8, 1.0, 0.1)
-        glutSolidCube(1.0)
-        glPopMatrix()
+            r.color(1, 0.6, 0.6) if self.type == 'camera' else r.color(1, 0.8, 0.6)
+        r.scale(0.8, 1.0, 0.1)
+        r.cube(1.0)
+        r.pop()
         
-        glPushMatrix()
-        glTranslatef(self.position.x + 0.3, self.position.y + 0.6, self.position.z + 0.16)
+        r.push()
+        r.translate(self.position.x + 0.3, self.position.y + 0.6, self.position.z + 0.16)
         if self.hacked:
-            glColor3f(0, 1, 0)
+            r.color(0, 1, 0)
         else:
-            glColor3f(1, 0, 0) if self.type == 'camera' else glColor3f(1, 0.5, 0)
-        glutSolidSphere(0.1, 6, 6)
-        glPopMatrix()
+            r.color(1, 0, 0) if self.type == 'camera' else r.color(1, 0.5, 0)
+        r.sphere(0.1, light, light)
+        r.pop()
 
 class Objective:
+    __slots__ = ('position', 'pulse_time')
+    DIAMOND_SIZE = 0.5
+    
     def __init__(self, x, z):
         self.position = Vector3(x, 1, z)
         self.pulse_time = 0
@@ -471,59 +1539,880 @@ class Objective:
     def update(self):
         pass
     
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.position.x, self.position.y, self.position.z)
-        glColor3f(*GREEN)
-        
-        diamond_size = 0.5
-        glEnable(GL_LIGHTING)
+    def draw(self, r):
+        r.begin()
+        r.push()
+        r.translate(self.position.x, self.position.y, self.position.z)
+        r.color(*GREEN)
+        r.mesh(('diamond', self.DIAMOND_SIZE), self.diamond)
+        r.pop()
         
+        r.begin(lighting=False, line_width=2.0)
+        r.push()
+        r.translate(self.position.x, self.position.y, self.position.z)
+        r.color(0.8, 1.0, 0.8)
+        r.mesh(('diamond_edges', self.DIAMOND_SIZE), self.diamond_edges)
+        r.pop()
+    
+    @staticmethod
+    def diamond_points(diamond_size):
         top = (0, diamond_size, 0)
         corners = [(diamond_size, 0, 0), (0, 0, diamond_size), (-diamond_size, 0, 0), (0, 0, -diamond_size)]
-        
-        glBegin(GL_TRIANGLES)
+        bottom = (0, -diamond_size, 0)
+        return top, corners, bottom
+    
+    @classmethod
+    def diamond(cls, r, diamond_size):
+        top, corners, bottom = cls.diamond_points(diamond_size)
+        vertices, normals = [], []
         for i in range(4):
             next_i = (i + 1) % 4
-            glNormal3f(0, 1, 0)
-            glVertex3f(*top)
-            glVertex3f(*corners[i])
-            glVertex3f(*corners[next_i])
-        
-        bottom = (0, -diamond_size, 0)
+            vertices.extend([top, corners[i], corners[next_i]])
+            normals.extend([(0, 1, 0)] * 3)
         for i in range(4):
             next_i = (i + 1) % 4
-            glNormal3f(0, -1, 0)
-            glVertex3f(*bottom)
-            glVertex3f(*corners[next_i])
-            glVertex3f(*corners[i])
-        glEnd()
-        
-        glDisable(GL_LIGHTING)
-        glColor3f(0.8, 1.0, 0.8)
-        glLineWidth(2.0)
-        
-        glBegin(GL_LINES)
+            vertices.extend([bottom, corners[next_i], corners[i]])
+            normals.extend([(0, -1, 0)] * 3)
+        r.primitive('triangles', vertices, normals)
+    
+    @classmethod
+    def diamond_edges(cls, r, diamond_size):
+        top, corners, bottom = cls.diamond_points(diamond_size)
+        edges = []
         for corner in corners:
-            glVertex3f(*top)
-            glVertex3f(*corner)
+            edges.extend([top, corner])
         for corner in corners:
-            glVertex3f(*bottom)
-            glVertex3f(*corner)
+            edges.extend([bottom, corner])
         for i in range(4):
-            next_i = (i + 1) % 4
-            glVertex3f(*corners[i])
-            glVertex3f(*corners[next_i])
-        glEnd()
+            edges.extend([corners[i], corners[(i + 1) % 4]])
+        r.primitive('lines', edges)
+
+DEFAULT_RENDER_STATE = (False, False, True, 1.0)
+
+# Plain-GL versions of the GLUT solids, for contexts where glutInit cannot run
+# (offscreen EGL). Each returns (mode, vertices, normals) for a primitive op.
+def cube_mesh(size, wire=False):
+    h = size / 2
+    corners = [(x, y, z) for x in (-h, h) for y in (-h, h) for z in (-h, h)]
+    if wire:
+        edges = [(a, b) for a in range(8) for b in range(a + 1, 8) if bin(a ^ b).count('1') == 1]
+        return 'lines', [corners[i] for edge in edges for i in edge], None
+    faces = [((1, 0, 0), (4, 6, 7, 5)), ((-1, 0, 0), (0, 1, 3, 2)), ((0, 1, 0), (2, 3, 7, 6)),
+             ((0, -1, 0), (0, 4, 5, 1)), ((0, 0, 1), (1, 5, 7, 3)), ((0, 0, -1), (0, 2, 6, 4))]
+    return ('quads', [corners[i] for _, face in faces for i in face],
+            [normal for normal, _ in faces for _ in range(4)])
+
+def sphere_mesh(radius, slices, stacks):
+    vertices, normals = [], []
+    def point(i, j):
+        lat, lon = math.pi * (i / stacks - 0.5), 2 * math.pi * j / slices
+        return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+    for i in range(stacks):
+        for j in range(slices):
+            for n in (point(i, j), point(i, j + 1), point(i + 1, j + 1), point(i + 1, j)):
+                normals.append(n)
+                vertices.append((n[0] * radius, n[1] * radius, n[2] * radius))
+    return 'quads', vertices, normals
+
+def cone_mesh(base, height, slices, stacks):
+    vertices, normals = [], []
+    slant = math.hypot(base, height)
+    for j in range(slices):
+        a0, a1 = 2 * math.pi * j / slices, 2 * math.pi * (j + 1) / slices
+        for a, point in ((a0, (0, 0, height)), (a0, (base * math.cos(a0), base * math.sin(a0), 0)),
+                         (a1, (base * math.cos(a1), base * math.sin(a1), 0))):
+            normals.append((height * math.cos(a) / slant, height * math.sin(a) / slant, base / slant))
+            vertices.append(point)
+        vertices.extend([(0, 0, 0), (base * math.cos(a1), base * math.sin(a1), 0), (base * math.cos(a0), base * math.sin(a0), 0)])
+        normals.extend([(0, 0, -1)] * 3)
+    return 'triangles', vertices, normals
+
+class RenderRecorder:
+    # Collects draw commands into items. Each item carries the GL state it needs
+    # (overlay, blend, lighting, line width) and balanced matrix ops, so items can
+    # be reordered freely: submit() sorts them by state (blended and overlay items
+    # land last) and the backend only issues the state changes that differ.
+    def __init__(self):
+        self.items, self.ops = [], None
+    
+    def begin(self, lighting=True, blend=False, line_width=1.0, overlay=False):
+        self.ops = []
+        self.items.append(((overlay, blend, lighting, line_width), len(self.items), self.ops))
+    
+    def push(self):
+        self.ops.append(('push',))
+    
+    def pop(self):
+        self.ops.append(('pop',))
+    
+    def translate(self, x, y, z):
+        self.ops.append(('translate', x, y, z))
+    
+    def rotate(self, angle, x, y, z):
+        self.ops.append(('rotate', angle, x, y, z))
+    
+    def scale(self, x, y, z):
+        self.ops.append(('scale', x, y, z))
+    
+    def color(self, r, g, b, a=1.0):
+        self.ops.append(('color', r, g, b, a))
+    
+    def cube(self, size=1.0, wire=False):
+        self.ops.append(('cube', size, wire))
+    
+    def sphere(self, radius, slices, stacks):
+        self.ops.append(('sphere', radius, slices, stacks))
+    
+    def cone(self, base, height, slices, stacks):
+        self.ops.append(('cone', base, height, slices, stacks))
+    
+    def primitive(self, mode, vertices, normals=None):
+        self.ops.append(('primitive', mode, vertices, normals))
+    
+    def text(self, x, y, text):
+        self.ops.append(('text', x, y, text))
+    
+    def call_list(self, key, build):
+        self.ops.append(('call_list', key, build))
+    
+    def mesh(self, key, build):
+        # key is (name, *params); build(recorder, *params) records the shape once
+        # per backend, without state changes, and every later draw reuses it.
+        self.ops.append(('mesh', key, build))
+    
+    def submit(self, backend):
+        # Sequence numbers are unique, so tuple order never reaches the op lists.
+        self.items.sort()
+        for state, _, ops in self.items:
+            backend.set_state(state)
+            for op in ops:
+                backend.run(op)
+        self.items, self.ops = [], None
+
+class RenderBackend:
+    # Shared state tracking and call accounting. Subclasses implement the set_*
+    # state hooks and op_* commands.
+    STATE_FIELDS = ('overlay', 'blend', 'lighting', 'line_width')
+    MESH_CACHE_SIZE = 256
+    
+    def __init__(self):
+        self.state, self.current_color = None, None
+        self.lists, self.list_generation = {}, None
+        self.meshes = collections.OrderedDict()
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.frames = self.calls = self.state_changes = self.redundant = 0
+    
+    def stats(self):
+        return {'frames': self.frames, 'calls': self.calls, 'state_changes': self.state_changes,
+                'redundant_skipped': self.redundant}
+    
+    def set_state(self, state):
+        previous = self.state or (False, None, None, None)
+        for field, old, new in zip(self.STATE_FIELDS, previous, state):
+            if old == new:
+                self.redundant += 1
+                continue
+            self.state_changes += 1
+            getattr(self, 'set_' + field)(new)
+        self.state = state
+    
+    def run(self, op):
+        name = op[0]
+        if name == 'color':
+            if op[1:] == self.current_color:
+                self.redundant += 1
+                return
+            self.current_color = op[1:]
+        if name == 'primitive':
+            self.calls += 2 + len(op[2]) + (len(op[3]) if op[3] else 0)
+        else:
+            self.calls += 1
+        getattr(self, 'op_' + name)(*op[1:])
+    
+    def op_call_list(self, key, build):
+        # Keys start with the StaticGeometry generation; a new generation means
+        # the level changed and every older list can go.
+        if key[0] != self.list_generation:
+            self.release_lists()
+            self.lists, self.list_generation = {}, key[0]
+        if key not in self.lists:
+            recorder = RenderRecorder()
+            build(recorder)
+            self.lists[key] = self.compile_list(recorder)
+        self.call_list(self.lists[key])
+        self.state, self.current_color = DEFAULT_RENDER_STATE, None
+    
+    def op_mesh(self, key, build):
+        # Meshes depend only on their parameters, so they outlive level changes;
+        # the least recently used one is released past MESH_CACHE_SIZE.
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            recorder = RenderRecorder()
+            recorder.begin()
+            build(recorder, *key[1:])
+            mesh = self.meshes[key] = self.compile_list(recorder, inherit_state=True)
+            if len(self.meshes) > self.MESH_CACHE_SIZE:
+                self.delete_list(self.meshes.popitem(last=False)[1])
+        else:
+            self.meshes.move_to_end(key)
+        self.call_list(mesh)
+        self.current_color = None
+    
+    def begin_frame(self, eye, center):
+        self.frames += 1
+    
+    def end_frame(self):
+        self.set_state(DEFAULT_RENDER_STATE)
+
+class NullBackend(RenderBackend):
+    # Counts calls and state changes without a GL context, for measuring render
+    # cost headlessly.
+    def reset_stats(self):
+        super().reset_stats()
+        self.compiled_calls = 0
+    
+    def stats(self):
+        return dict(super().stats(), compiled_calls=self.compiled_calls)
+    
+    def set_overlay(self, enabled): pass
+    def set_blend(self, enabled): pass
+    def set_lighting(self, enabled): pass
+    def set_line_width(self, width): pass
+    def op_push(self): pass
+    def op_pop(self): pass
+    def op_translate(self, x, y, z): pass
+    def op_rotate(self, angle, x, y, z): pass
+    def op_scale(self, x, y, z): pass
+    def op_color(self, r, g, b, a): pass
+    def op_cube(self, size, wire): pass
+    def op_sphere(self, radius, slices, stacks): pass
+    def op_cone(self, base, height, slices, stacks): pass
+    def op_primitive(self, mode, vertices, normals): pass
+    def op_text(self, x, y, text): pass
+    
+    def compile_list(self, recorder, inherit_state=False):
+        compiler = NullBackend()
+        if inherit_state:
+            compiler.state = DEFAULT_RENDER_STATE
+        recorder.submit(compiler)
+        if not inherit_state:
+            compiler.set_state(DEFAULT_RENDER_STATE)
+        self.compiled_calls += compiler.calls + compiler.state_changes
+        return len(self.lists) + len(self.meshes) + 1
+    
+    def call_list(self, list_id): pass
+    def delete_list(self, list_id): pass
+    def release_lists(self): pass
+
+# The X11 misc-fixed 8x13 font (public domain) for characters 32-126: 14 rows
+# of 8 pixels per character, top row first, most significant bit leftmost.
+# The baseline is under row FIXED_FONT_ASCENT - 1.
+FIXED_FONT_HEIGHT, FIXED_FONT_ASCENT = 14, 11
+FIXED_FONT = bytes.fromhex(
+    "0000000000000000000000000000 0000101010101010100010000000 0000242424000000000000000000 00000024247e247e242400000000"
+    "0000103c50503814147810000000 0000225224080810242a44000000 00000000304848304a443a000000 0000383040000000000000000000"
+    "0000040808101010080804000000 0000201010080808101020000000 0000000024187e18240000000000 0000000010107c10100000000000"
+    "0000000000000000003830400000 0000000000007e00000000000000 0000000000000000001038100000 0000020204081020408080000000"
+    "0000182442424242422418000000 000010305010101010107c000000 00003c424202041820407e000000 00007e0204081c0202423c000000"
+    "0000040c142444447e0404000000 00007e40405c620202423c000000 00001c2040405c6242423c000000 00007e0204080810102020000000"
+    "00003c4242423c4242423c000000 00003c4242463a02020438000000 0000000010381000001038100000 0000000010381000003830400000"
+    "0000020408102010080402000000 00000000007e00007e0000000000 0000402010080408102040000000 00003c4242020408080008000000"
+    "00003c42424e52564a403c000000 000018244242427e424242000000 0000fc4242427c424242fc000000 00003c424040404040423c000000"
+    "0000fc42424242424242fc000000 00007e404040784040407e000000 00007e4040407840404040000000 00003c424040404e42463a000000"
+    "0000424242427e42424242000000 00007c101010101010107c000000 00001f0404040404044438000000 0000424448506050484442000000"
+    "000040404040404040407e000000 00008282c6aa9292828282000000 0000424262524a46424242000000 00003c424242424242423c000000"
+    "00007c4242427c40404040000000 00003c4242424242524a3c020000 00007c4242427c50484442000000 00003c4240403c0202423c000000"
+    "0000fe1010101010101010000000 000042424242424242423c000000 0000828244444428282810000000 000082828282929292aa44000000"
+    "0000828244281028448282000000 0000828244281010101010000000 00007e020408102040407e000000 00003c202020202020203c000000"
+    "0000808040201008040202000000 0000780808080808080878000000 0000102844000000000000000000 0000000000000000000000fe0000"
+    "0000381804000000000000000000 00000000003c023e42463a000000 00004040405c624242625c000000 00000000003c424040423c000000"
+    "00000202023a464242463a000000 00000000003c427e40423c000000 00001c2220207c20202020000000 00000000003a444438403c423c00"
+    "00004040405c6242424242000000 000000100030101010107c000000 00000004000c0404040444443800 0000404040444870484442000000"
+    "000030101010101010107c000000 0000000000ec9292929282000000 00000000005c6242424242000000 00000000003c424242423c000000"
+    "00000000005c6242625c40404000 00000000003a4642463a02020200 00000000005c2220202020000000 00000000003c42300c423c000000"
+    "00000020207c202020221c000000 000000000044444444443a000000 0000000000444444282810000000 000000000082829292aa44000000"
+    "0000000000422418182442000000 0000000000424242463a02423c00 00000000007e040810207e000000 00000e101008300810100e000000"
+    "0000101010101010101010000000 0000700808100c10080870000000 0000245448000000000000000000"
+)
+
+class GlyphAtlas:
+    # A bitmap font rasterized once into an alpha texture. Strings become a
+    # batch of textured quads; alpha testing keeps the 1-bit glyph edges exact
+    # without needing blending in the overlay. from_glut() draws a GLUT bitmap
+    # font, which needs glutInit and so a window; fixed() uses FIXED_FONT and
+    # needs nothing but a GL context.
+    FIRST, LAST, PADDING = 32, 127, 3
+    
+    def __init__(self, advances, rasterize, width=512, cell_height=24, ascent=18):
+        # advances maps character codes to their widths. rasterize(places,
+        # width, height) returns the atlas as alpha bytes, top row first, with
+        # each glyph's baseline origin at places[code] moved down by ascent.
+        self.cell_height, self.ascent, self.advances = cell_height, ascent, advances
+        places = {}
+        x, y = self.PADDING, 0
+        for code, advance in advances.items():
+            if x + advance + self.PADDING > width:
+                x, y = self.PADDING, y + cell_height
+            places[code] = (x, y)
+            x += advance + self.PADDING
+        height = y + cell_height
+        self.size = width, height
+        pixels = rasterize(places, width, height)
         
-        glLineWidth(1.0)
-        glEnable(GL_LIGHTING)
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, width, height, 0, GL_ALPHA, GL_UNSIGNED_BYTE, pixels)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        
+        # Each glyph quad covers its advance plus a pixel either side, for glyphs
+        # that overhang their origin.
+        self.glyphs = {}
+        for code, (gx, gy) in places.items():
+            left, right = gx - 1, gx + advances[code] + 1
+            self.glyphs[code] = (left / width, gy / height, right / width, (gy + cell_height) / height,
+                                 right - left)
+    
+    @classmethod
+    def from_glut(cls, font, width=512, cell_height=24, ascent=18):
+        def rasterize(places, width, height):
+            # Draw the glyphs into the top-left of the back buffer and read them
+            # back. Called before a frame is cleared, so nothing on screen is
+            # disturbed.
+            glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_CURRENT_BIT)
+            glMatrixMode(GL_PROJECTION)
+            glPushMatrix()
+            glLoadIdentity()
+            glOrtho(0, WINDOW_WIDTH, WINDOW_HEIGHT, 0, -1, 1)
+            glMatrixMode(GL_MODELVIEW)
+            glPushMatrix()
+            glLoadIdentity()
+            glDisable(GL_DEPTH_TEST)
+            glDisable(GL_LIGHTING)
+            glClearColor(0, 0, 0, 0)
+            glClear(GL_COLOR_BUFFER_BIT)
+            glColor3f(1, 1, 1)
+            for code, (gx, gy) in places.items():
+                glRasterPos2f(gx, gy + ascent)
+                glutBitmapCharacter(font, code)
+            glPixelStorei(GL_PACK_ALIGNMENT, 1)
+            pixels = bytes(glReadPixels(0, WINDOW_HEIGHT - height, width, height, GL_RED, GL_UNSIGNED_BYTE))
+            glPopMatrix()
+            glMatrixMode(GL_PROJECTION)
+            glPopMatrix()
+            glMatrixMode(GL_MODELVIEW)
+            glPopAttrib()
+            # glReadPixels returns bottom row first; flip so atlas row 0 is the top.
+            return b''.join(pixels[row * width:(row + 1) * width] for row in reversed(range(height)))
+        advances = {code: glutBitmapWidth(font, code) for code in range(cls.FIRST, cls.LAST)}
+        return cls(advances, rasterize, width, cell_height, ascent)
+    
+    @classmethod
+    def fixed(cls, width=512, cell_height=16, ascent=12):
+        def rasterize(places, width, height):
+            pixels = bytearray(width * height)
+            for code, (gx, gy) in places.items():
+                offset = (code - cls.FIRST) * FIXED_FONT_HEIGHT
+                top = gy + ascent - FIXED_FONT_ASCENT
+                for row, bits in enumerate(FIXED_FONT[offset:offset + FIXED_FONT_HEIGHT]):
+                    for column in range(8):
+                        if bits & (0x80 >> column):
+                            pixels[(top + row) * width + gx + column] = 255
+            return bytes(pixels)
+        return cls(dict.fromkeys(range(cls.FIRST, cls.LAST), 8), rasterize, width, cell_height, ascent)
+    
+    def draw(self, x, y, text):
+        # (x, y) is the baseline origin, as with glRasterPos2f in the overlay.
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_ALPHA_TEST)
+        glAlphaFunc(GL_GREATER, 0.5)
+        glBegin(GL_QUADS)
+        top, bottom = y - self.ascent, y - self.ascent + self.cell_height
+        for char in text:
+            code = ord(char)
+            if code not in self.glyphs:
+                code = ord('?')
+            u0, v0, u1, v1, w = self.glyphs[code]
+            left = x - 1
+            glTexCoord2f(u0, v0); glVertex2f(left, top)
+            glTexCoord2f(u1, v0); glVertex2f(left + w, top)
+            glTexCoord2f(u1, v1); glVertex2f(left + w, bottom)
+            glTexCoord2f(u0, v1); glVertex2f(left, bottom)
+            x += self.advances[code]
+        glEnd()
+        glDisable(GL_ALPHA_TEST)
+        glDisable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+class GLBackend(RenderBackend):
+    TEXT_CACHE_SIZE = 128
+    
+    def __init__(self, swap_buffers=True, glut_shapes=True, font='glut'):
+        # font picks the HUD text: 'glut' (Helvetica 18, needs glutInit),
+        # 'fixed' (the built-in 8x13 font, any GL context) or None for no text.
+        super().__init__()
+        self.swap_buffers, self.glut_shapes, self.font_source = swap_buffers, glut_shapes, font
+        self.modes = {'triangles': GL_TRIANGLES, 'lines': GL_LINES, 'quads': GL_QUADS}
+        self.font, self.texts = None, collections.OrderedDict()
+    
+    def set_overlay(self, enabled):
+        if enabled:
+            glMatrixMode(GL_PROJECTION)
+            glPushMatrix()
+            glLoadIdentity()
+            glOrtho(0, WINDOW_WIDTH, WINDOW_HEIGHT, 0, -1, 1)
+            glMatrixMode(GL_MODELVIEW)
+            glPushMatrix()
+            glLoadIdentity()
+            glDisable(GL_DEPTH_TEST)
+        else:
+            glEnable(GL_DEPTH_TEST)
+            glPopMatrix()
+            glMatrixMode(GL_PROJECTION)
+            glPopMatrix()
+            glMatrixMode(GL_MODELVIEW)
+    
+    def set_blend(self, enabled):
+        if enabled:
+            glEnable(GL_BLEND)
+            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        else:
+            glDisable(GL_BLEND)
+    
+    def set_lighting(self, enabled):
+        glEnable(GL_LIGHTING) if enabled else glDisable(GL_LIGHTING)
+    
+    def set_line_width(self, width):
+        glLineWidth(width)
+    
+    def op_push(self):
+        glPushMatrix()
+    
+    def op_pop(self):
         glPopMatrix()
+    
+    def op_translate(self, x, y, z):
+        glTranslatef(x, y, z)
+    
+    def op_rotate(self, angle, x, y, z):
+        glRotatef(angle, x, y, z)
+    
+    def op_scale(self, x, y, z):
+        glScalef(x, y, z)
+    
+    def op_color(self, r, g, b, a):
+        glColor4f(r, g, b, a)
+    
+    def op_cube(self, size, wire):
+        if not self.glut_shapes:
+            return self.op_primitive(*cube_mesh(size, wire))
+        glutWireCube(size) if wire else glutSolidCube(size)
+    
+    def op_sphere(self, radius, slices, stacks):
+        if not self.glut_shapes:
+            return self.op_primitive(*sphere_mesh(radius, slices, stacks))
+        glutSolidSphere(radius, slices, stacks)
+    
+    def op_cone(self, base, height, slices, stacks):
+        if not self.glut_shapes:
+            return self.op_primitive(*cone_mesh(base, height, slices, stacks))
+        glutSolidCone(base, height, slices, stacks)
+    
+    def op_primitive(self, mode, vertices, normals):
+        glBegin(self.modes[mode])
+        if normals:
+            for normal, vertex in zip(normals, vertices):
+                glNormal3f(*normal)
+                glVertex3f(*vertex)
+        else:
+            for vertex in vertices:
+                glVertex3f(*vertex)
+        glEnd()
+    
+    def op_text(self, x, y, text):
+        # Each string is laid out once into a display list of atlas quads, so a
+        # HUD line costs one call however long it is.
+        if self.font is None:
+            return
+        if self.texts is None:
+            return self.font.draw(x, y, text)
+        key = (x, y, text)
+        list_id = self.texts.get(key)
+        if list_id is None:
+            list_id = self.texts[key] = glGenLists(1)
+            glNewList(list_id, GL_COMPILE)
+            self.font.draw(x, y, text)
+            glEndList()
+            if len(self.texts) > self.TEXT_CACHE_SIZE:
+                glDeleteLists(self.texts.popitem(last=False)[1], 1)
+        else:
+            self.texts.move_to_end(key)
+        glCallList(list_id)
+    
+    def compile_list(self, recorder, inherit_state=False):
+        # inherit_state compiles the ops against whatever state is current when
+        # the list is called (meshes); otherwise the list sets its own state and
+        # leaves the default behind.
+        list_id = glGenLists(1)
+        compiler = GLBackend(swap_buffers=False, glut_shapes=self.glut_shapes, font=None)
+        compiler.font, compiler.texts = self.font, None
+        if inherit_state:
+            compiler.state = DEFAULT_RENDER_STATE
+        glNewList(list_id, GL_COMPILE)
+        recorder.submit(compiler)
+        if not inherit_state:
+            compiler.set_state(DEFAULT_RENDER_STATE)
+        glEndList()
+        return list_id
+    
+    def call_list(self, list_id):
+        glCallList(list_id)
+    
+    def delete_list(self, list_id):
+        glDeleteLists(list_id, 1)
+    
+    def release_lists(self):
+        for list_id in self.lists.values():
+            glDeleteLists(list_id, 1)
+    
+    def begin_frame(self, eye, center):
+        super().begin_frame(eye, center)
+        if self.font is None and self.font_source is not None:
+            if self.font_source == 'glut' and GLUT_BITMAP_HELVETICA_18 is not None:
+                self.font = GlyphAtlas.from_glut(GLUT_BITMAP_HELVETICA_18)
+            else:
+                self.font = GlyphAtlas.fixed()
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        gluLookAt(*eye, *center, 0, 1, 0)
+    
+    def end_frame(self):
+        super().end_frame()
+        if self.swap_buffers:
+            glutSwapBuffers()
 
-class Game:
+class ViewFrustum:
+    # The view volume of camera_view() under the init_opengl projection, for
+    # culling bounding spheres before they are recorded. look() starts a frame
+    # and resets the per-kind (drawn, culled) counts that stats() reports.
+    def __init__(self, fovy=VIEW_FOVY, aspect=WINDOW_WIDTH / WINDOW_HEIGHT, near=VIEW_NEAR, far=VIEW_FAR):
+        self.tan_v = math.tan(math.radians(fovy) / 2)
+        self.tan_h = self.tan_v * aspect
+        # A sphere is outside a side plane once it is this much further out per unit radius.
+        self.slack_v, self.slack_h = math.sqrt(1 + self.tan_v ** 2), math.sqrt(1 + self.tan_h ** 2)
+        self.near, self.far = near, far
+        self.eye, self.axes, self.counts = (0, 0, 0), None, {}
+    
+    def look(self, eye, center, up=(0, 1, 0)):
+        fx, fy, fz = center[0] - eye[0], center[1] - eye[1], center[2] - eye[2]
+        length = math.sqrt(fx * fx + fy * fy + fz * fz)
+        fx, fy, fz = fx / length, fy / length, fz / length
+        sx, sy, sz = fy * up[2] - fz * up[1], fz * up[0] - fx * up[2], fx * up[1] - fy * up[0]
+        length = math.sqrt(sx * sx + sy * sy + sz * sz)
+        sx, sy, sz = sx / length, sy / length, sz / length
+        ux, uy, uz = sy * fz - sz * fy, sz * fx - sx * fz, sx * fy - sy * fx
+        self.eye, self.axes = eye, ((sx, sy, sz), (ux, uy, uz), (fx, fy, fz))
+        self.counts = {}
+    
+    def visible(self, x, y, z, radius, kind):
+        dx, dy, dz = x - self.eye[0], y - self.eye[1], z - self.eye[2]
+        (sx, sy, sz), (ux, uy, uz), (fx, fy, fz) = self.axes
+        depth = dx * fx + dy * fy + dz * fz
+        inside = (self.near - radius <= depth <= self.far + radius and
+                  depth * self.tan_h - abs(dx * sx + dy * sy + dz * sz) >= -radius * self.slack_h and
+                  depth * self.tan_v - abs(dx * ux + dy * uy + dz * uz) >= -radius * self.slack_v)
+        counts = self.counts.get(kind)
+        if counts is None:
+            counts = self.counts[kind] = [0, 0]
+        counts[not inside] += 1
+        return inside
+    
+    def detail(self, segments, x, y, z, minimum=4):
+        # Segment count for a round shape at (x, y, z): halved past each of
+        # LOD_DISTANCES, never below minimum.
+        distance = math.sqrt((x - self.eye[0]) ** 2 + (y - self.eye[1]) ** 2 + (z - self.eye[2]) ** 2)
+        for limit in LOD_DISTANCES:
+            if distance <= limit:
+                break
+            segments = max(minimum, segments // 2)
+        return segments
+    
+    def stats(self):
+        drawn = sum(counts[0] for counts in self.counts.values())
+        culled = sum(counts[1] for counts in self.counts.values())
+        return dict({kind: tuple(counts) for kind, counts in self.counts.items()}, drawn=drawn, culled=culled)
+
+class StaticGeometry:
+    # Display lists for geometry that only changes with the level: the floor,
+    # walls in TILE_SIZE tiles that are culled as a unit, and each terminal per
+    # hacked flag and light detail. invalidate() just moves to a new generation;
+    # backends drop stale lists on the next render, so it is safe to call
+    # before a GL context exists.
+    TILE_SIZE = 10.0
+    generations = 0
+    
     def __init__(self):
+        self.invalidate()
+    
+    def invalidate(self):
+        StaticGeometry.generations += 1
+        self.generation = StaticGeometry.generations
+        self.tiles = None
+    
+    def build_tiles(self, walls):
+        # Walls grouped by the tile holding their centre, each group bounded by
+        # the sphere around its walls' combined box.
+        groups = {}
+        for i, wall in enumerate(walls):
+            tile = (math.floor(wall.position.x / self.TILE_SIZE), math.floor(wall.position.z / self.TILE_SIZE))
+            groups.setdefault(tile, []).append(i)
+        self.tiles = []
+        for tile, indices in sorted(groups.items()):
+            boxes = [walls[i] for i in indices]
+            x0, x1 = min(w.position.x - w.size.x / 2 for w in boxes), max(w.position.x + w.size.x / 2 for w in boxes)
+            y0, y1 = min(w.position.y - w.size.y / 2 for w in boxes), max(w.position.y + w.size.y / 2 for w in boxes)
+            z0, z1 = min(w.position.z - w.size.z / 2 for w in boxes), max(w.position.z + w.size.z / 2 for w in boxes)
+            radius = math.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2 + (z1 - z0) ** 2) / 2
+            self.tiles.append((tile, ((x0 + x1) / 2, (y0 + y1) / 2, (z0 + z1) / 2, radius), indices))
+    
+    def draw(self, r, game, frustum):
+        if self.tiles is None:
+            self.build_tiles(game.walls)
+        r.begin()
+        r.call_list((self.generation, 'floor'), game.draw_floor)
+        walls = game.walls
+        for tile, bound, indices in self.tiles:
+            if frustum.visible(*bound, 'wall tiles'):
+                r.call_list((self.generation, 'walls', tile), lambda rec, indices=indices: [walls[i].draw(rec) for i in indices])
+        for i, terminal in enumerate(game.terminals):
+            p = terminal.position
+            if frustum.visible(p.x, p.y, p.z, 1.0, 'terminals'):
+                light = frustum.detail(6, p.x, p.y, p.z, 3)
+                r.call_list((self.generation, 'terminal', i, terminal.hacked, light),
+                            lambda rec, terminal=terminal, light=light: terminal.draw(rec, light))
+
+class AgentGroup:
+    # Multi-agent mode: N players in one level. Agent 0 is game.player and is
+    # driven by game.keys; the others read keys[i]. Detection timers are kept
+    # per (camera, agent) pair, and cameras x agents and lasers x agents are
+    # checked as NumPy batches; only pairs sharing a CameraGrid cell are tested
+    # against cameras. A caught agent is out for the rest of the level, and the
+    # mission fails once every agent is out.
+    def __init__(self, game, count):
+        if np is None:
+            raise ImportError("multi-agent mode needs NumPy")
+        self.count = count
+        self.players = [game.player] + [Player() for _ in range(count - 1)]
+        self.keys = [game.keys] + [{} for _ in range(count - 1)]
+        self.alive = np.ones(count, dtype=bool)
+        self.reasons = [None] * count
+        self.pairs, self.pair_start = np.zeros(0, dtype=np.int64), np.zeros(0)
+    
+    def start_level(self, game):
+        for player in self.players[1:]:
+            player.position = game.player_start.copy()
+            player.previous_position = player.position.copy()
+            player.bounds = game.player.bounds
+        self.alive[:] = True
+        self.reasons = [None] * self.count
+        self.pairs, self.pair_start = np.zeros(0, dtype=np.int64), np.zeros(0)
+        self.x = np.full(self.count, game.player_start.x)
+        self.y = np.full(self.count, game.player_start.y)
+        self.z = np.full(self.count, game.player_start.z)
+    
+    def update_players(self, game):
+        self.keys[0] = game.keys
+        players, keys = self.players, self.keys
+        for i in np.nonzero(self.alive)[0].tolist():
+            players[i].update(keys[i], game.walls, game.wall_grid)
+        # Positions only change here, so last tick's are this tick's previous ones.
+        count = self.count
+        self.p0x, self.p0y, self.p0z = self.x, self.y, self.z
+        self.x = np.fromiter((p.position.x for p in players), float, count)
+        self.y = np.fromiter((p.position.y for p in players), float, count)
+        self.z = np.fromiter((p.position.z for p in players), float, count)
+    
+    def camera_pairs(self, grid):
+        # (camera, agent) pairs where the agent stands in a cell the camera's
+        # range reaches; agents are grouped by cell so each lookup is done once.
+        cs = grid.cell_size
+        ix, iz = np.floor(self.x / cs).astype(np.int64), np.floor(self.z / cs).astype(np.int64)
+        by_cell = {}
+        for a, cell in zip(np.nonzero(self.alive)[0].tolist(), zip(ix.tolist(), iz.tolist())):
+            by_cell.setdefault(cell, []).append(a)
+        cameras, agents = [], []
+        for cell, members in by_cell.items():
+            covering = grid.cells.get(cell)
+            if covering:
+                cameras.append(np.repeat(covering, len(members)))
+                agents.append(np.tile(members, len(covering)))
+        if not cameras:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(cameras), np.concatenate(agents)
+    
+    def update_cameras(self, cameras, grid, walls, current_time, wall_grid=None):
+        # Same rules as CameraArray.update, per pair. Returns the agents caught.
+        ci, ai = self.camera_pairs(grid)
+        seen = cameras.visible_pairs(ci, self.x[ai], self.z[ai], walls, wall_grid)
+        ci, ai = ci[seen], ai[seen]
+        keys = ci * self.count + ai
+        order = np.argsort(keys)
+        ci, ai, keys = ci[order], ai[order], keys[order]
+        
+        slot = np.searchsorted(self.pairs, keys)
+        continuing = slot < len(self.pairs)
+        continuing[continuing] = self.pairs[slot[continuing]] == keys[continuing]
+        start = np.where(continuing, self.pair_start[np.minimum(slot, len(self.pairs) - 1)] if len(self.pairs) else 0.0,
+                         current_time)
+        detection_time = np.where(continuing, current_time - start, 0.0)
+        self.pairs, self.pair_start = keys, start
+        
+        # Cameras show the furthest any agent has got, for the HUD and drawing.
+        cameras.is_detecting[:] = False
+        cameras.is_detecting[ci] = True
+        cameras.detection_time[:] = 0.0
+        np.maximum.at(cameras.detection_time, ci, detection_time)
+        return np.unique(ai[continuing & (detection_time / cameras.detection_threshold[ci] >= 0.8)]).tolist()
+    
+    def eliminate(self, agents, reason):
+        for a in agents:
+            self.alive[a] = False
+            self.reasons[a] = reason
+        return not self.alive.any()
+    
+    def reached(self, position, radius):
+        dx, dy, dz = self.x - position.x, self.y - position.y, self.z - position.z
+        return bool((self.alive & (dx * dx + dy * dy + dz * dz < radius * radius)).any())
+
+class FrameProfiler:
+    # Per-phase frame timings with rolling percentiles and an optional per-frame
+    # trace (CSV when the path ends in .csv, JSON lines otherwise). Game only
+    # calls into it when game.profiler is set, so a disabled profiler costs one
+    # attribute check per phase.
+    PHASES = ('input', 'timer', 'player', 'cameras', 'lasers', 'objective', 'world', 'ui', 'submit')
+    
+    def __init__(self, window=300, trace_path=None):
+        self.samples = {phase: collections.deque(maxlen=window) for phase in self.PHASES + ('frame', 'interval')}
+        self.current = {}
+        self.frames, self.frame_start, self.last_end = 0, None, None
+        self.overlay, self.overlay_frame = [], -1
+        self.trace = open(trace_path, 'w') if trace_path else None
+        self.trace_csv = bool(trace_path) and trace_path.endswith('.csv')
+        if self.trace_csv:
+            self.trace.write(','.join(('frame',) + self.PHASES + ('frame_ms', 'interval_ms')) + '\n')
+    
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+    
+    def add(self, phase, seconds):
+        self.current[phase] = self.current.get(phase, 0.0) + seconds
+    
+    def end_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.current['frame'] = now - self.frame_start
+        if self.last_end is not None:
+            self.current['interval'] = now - self.last_end
+        self.last_end, self.frame_start = now, None
+        for phase, samples in self.samples.items():
+            samples.append(self.current.get(phase, 0.0))
+        if self.trace:
+            self.write_trace()
+        self.frames += 1
+        self.current = {}
+    
+    def write_trace(self):
+        row = [self.current.get(phase, 0.0) * 1000 for phase in self.PHASES + ('frame', 'interval')]
+        if self.trace_csv:
+            self.trace.write(','.join([str(self.frames)] + [f"{ms:.4f}" for ms in row]) + '\n')
+        else:
+            names = self.PHASES + ('frame_ms', 'interval_ms')
+            self.trace.write(json.dumps(dict(zip(('frame',) + names, [self.frames] + [round(ms, 4) for ms in row]))) + '\n')
+    
+    def percentiles(self, phase):
+        values = sorted(self.samples[phase])
+        if not values:
+            return 0.0, 0.0, 0.0
+        pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+        return pick(0.50), pick(0.95), pick(0.99)
+    
+    def overlay_lines(self):
+        # Percentiles are recomputed twice a second, not every frame.
+        if self.frames - self.overlay_frame >= FPS // 2 or not self.overlay:
+            self.overlay_frame = self.frames
+            self.overlay = ["PHASE       p50    p95    p99 ms"]
+            for phase in self.PHASES + ('frame', 'interval'):
+                p50, p95, p99 = self.percentiles(phase)
+                self.overlay.append(f"{phase:<9}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        return self.overlay
+    
+    def close(self):
+        if self.trace:
+            self.trace.close()
+            self.trace = None
+
+class FrameScheduler:
+    # Fixed-rate simulation decoupled from the render rate. Each frame runs the
+    # ticks owed since the last one, at most MAX_CATCH_UP; any further backlog is
+    # dropped so a slow machine runs the game slower instead of spiralling. The
+    # frame is then drawn between the last two ticks. Frames are paced by timer
+    # deadlines, so the process sleeps in between.
+    MAX_CATCH_UP = 5
+    
+    def __init__(self, game, render_fps=FPS, timer=time.perf_counter):
+        self.game, self.timer = game, timer
+        self.frame_interval = 1.0 / render_fps
+        self.accumulator, self.previous, self.dropped = 0.0, None, 0
+        self.last = self.next_frame = timer()
+    
+    def advance(self):
+        # Run the owed ticks and return how far the frame lies between the last
+        # two, for Game.render.
+        game, dt = self.game, self.game.clock.dt
+        now = self.timer()
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = min(int(self.accumulator / dt), self.MAX_CATCH_UP)
+        for i in range(ticks):
+            if i == ticks - 1:
+                self.previous = game.render_snapshot()
+            game.update()
+        self.accumulator -= ticks * dt
+        if self.accumulator >= dt:
+            self.dropped += int(self.accumulator / dt)
+            self.accumulator %= dt
+        return self.accumulator / dt
+    
+    def delay(self):
+        # Milliseconds until the next frame. Deadlines advance by a fixed step so
+        # pacing does not drift with how long each frame took; after a stall the
+        # schedule restarts from now rather than bursting to catch up.
+        now = self.timer()
+        self.next_frame += self.frame_interval
+        if self.next_frame < now:
+            self.next_frame = now
+        return int((self.next_frame - now) * 1000)
+
+def lerp_angle(a, b, t, period):
+    return a + ((b - a + period / 2) % period - period / 2) * t
+
+class Game:
+    def __init__(self, headless=False, verbose=True, seed=None, clock=None, generator=None, agents=1):
+        self.headless, self.verbose = headless, verbose
+        self.generator = generator
+        self.bounds, self.player_start = (-10, 10, -10, 10), Vector3(-8, 0.5, -8)
+        self.clock = clock or SimClock()
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.input_log = None
+        self.game_over_reason, self.time_bonus = None, 0
         self.state, self.level, self.score = 'playing', 1, 0
-        self.time_left, self.start_time = 120, time.time()
+        self.time_left, self.start_time = 120, self.clock.time
         self.keys, self.hacking = {}, False
         self.hack_sequence, self.hack_attempts, self.hack_target, self.hack_input = "", 0, None, ""
         self.hack_lives = 2
@@ -531,10 +2420,25 @@ class Game:
         self.first_person_mode = False 
         
         self.player = Player()
+        self.agents = AgentGroup(self, agents) if agents > 1 else None
         self.walls, self.cameras, self.lasers, self.terminals = [], [], [], []
+        self.camera_array, self.camera_schedule, self.laser_array, self.wall_grid = None, None, None, None
+        self.camera_grid, self.navigation = None, None
+        self.static_geometry = StaticGeometry()
+        self.profiler = None
+        self.hud = None, []
+        self.backend, self.recorder = NullBackend(), RenderRecorder()
+        self.frustum = ViewFrustum()
         self.objective = None
+        self.update_phases = (self.update_timer, self.update_player, self.update_cameras, self.update_lasers,
+                              self.update_objective)
         self.create_level(self.level)
+        self.player.position = self.player_start.copy()
         
+    def log(self, message):
+        if self.verbose:
+            print(message)
+    
     def init_opengl(self):
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_LIGHTING)
@@ -545,11 +2449,23 @@ class Game:
         glEnable(GL_COLOR_MATERIAL)
         glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
         glMatrixMode(GL_PROJECTION)
-        gluPerspective(75, WINDOW_WIDTH / WINDOW_HEIGHT, 0.1, 1000)
+        gluPerspective(VIEW_FOVY, WINDOW_WIDTH / WINDOW_HEIGHT, VIEW_NEAR, VIEW_FAR)
         glMatrixMode(GL_MODELVIEW)
         glClearColor(0.0, 0.0, 0.0, 1.0)
+        # A headless game has no GLUT window: it draws into whatever context
+        # the caller made current (capture.py's EGL pbuffer) without GLUT
+        # shapes, fonts or buffer swaps.
+        if self.headless:
+            self.backend = GLBackend(swap_buffers=False, glut_shapes=False, font='fixed')
+        else:
+            self.backend = GLBackend()
     
     def create_level(self, level_num):
+        if self.generator is not None:
+            self.load_layout(self.generator(level_num), (self.generator, level_num))
+            return
+        self.bounds, self.player_start = (-10, 10, -10, 10), Vector3(-8, 0.5, -8)
+        self.player.bounds = (-9.5, 9.5, -9.5, 9.5)
         self.walls.clear()
         self.cameras.clear()
         self.lasers.clear()
@@ -571,10 +2487,55 @@ class Game:
         
         self.terminals = [Terminal(-7, 7, 'camera'), Terminal(7, -7, 'laser')]
         self.objective = Objective(8, 8)
+        # Every built-in level has the same walls.
+        self.rebuild_level_caches(level_key='builtin')
     
-    def update_camera(self):
-        glLoadIdentity()
-        
+    def load_layout(self, layout, level_key=None):
+        # Level described as plain data (see levelgen.FacilityLayout).
+        self.bounds = layout.bounds
+        self.player_start = Vector3(layout.player_start[0], 0.5, layout.player_start[1])
+        min_x, max_x, min_z, max_z = layout.bounds
+        self.player.bounds = (min_x + 0.5, max_x - 0.5, min_z + 0.5, max_z - 0.5)
+        self.walls = [Wall(*wall) for wall in layout.walls]
+        self.cameras = [SecurityCamera(*camera) for camera in layout.cameras]
+        self.lasers = [Laser(*laser) for laser in layout.lasers]
+        self.terminals = [Terminal(*terminal) for terminal in layout.terminals]
+        self.objective = Objective(*layout.objective)
+        self.rebuild_level_caches(getattr(layout, 'baked', None), level_key)
+    
+    def rebuild_level_caches(self, baked=None, level_key=None):
+        # Everything derived from static level geometry; call again whenever
+        # walls or cameras are replaced. `baked` supplies the wall grid and
+        # occlusion maps precomputed by a compiled level (levelpack.py).
+        # level_key identifies a level whose geometry never changes, such as
+        # (generator, level number); restarting it keeps the navigation grid
+        # and its flow fields.
+        self.wall_grid = baked.wall_grid(self.walls) if baked is not None else WallGrid(self.walls)
+        if level_key is None or self.navigation is None or self.navigation.level_key != level_key:
+            self.navigation = NavigationGrid(self.walls, self.bounds, level_key=level_key)
+        self.static_geometry.invalidate()
+        # Per-tick camera cost follows how many cameras can reach the player at
+        # once, so the batched path is only worth it where they crowd together.
+        self.camera_grid = CameraGrid(self.cameras)
+        self.camera_array, self.camera_schedule = None, None
+        if np is not None and (self.camera_grid.crowding() >= BATCH_CAMERA_THRESHOLD or self.agents is not None):
+            self.camera_array = CameraArray(self.cameras)
+        else:
+            self.camera_schedule = CameraSchedule(self.cameras, self.clock.dt, self.camera_grid)
+        self.laser_array = None
+        if np is not None and self.lasers and (len(self.lasers) >= BATCH_LASER_THRESHOLD or self.agents is not None):
+            self.laser_array = LaserArray(self.lasers)
+        if self.agents is not None:
+            self.agents.start_level(self)
+        for i, camera in enumerate(self.cameras):
+            camera.occlusion_map = OcclusionMap(camera, self.walls, self.wall_grid) if np is not None else None
+            if baked is not None:
+                camera.occlusion_map.load(*baked.occlusion(i))
+    
+    def occlusion_memory(self):
+        return sum(camera.occlusion_map.nbytes for camera in self.cameras if camera.occlusion_map is not None)
+    
+    def camera_view(self):
         if self.first_person_mode:
             cam_x = self.player.position.x
             cam_y = self.player.position.y + 0.4  
@@ -583,75 +2544,193 @@ class Game:
             look_x = cam_x + look_distance * math.sin(math.radians(self.player.rotation))
             look_y = cam_y
             look_z = cam_z + look_distance * math.cos(math.radians(self.player.rotation)) 
-            
-            gluLookAt(cam_x, cam_y, cam_z, look_x, look_y, look_z, 0, 1, 0)
         else:
             cam_x = self.player.position.x
             cam_y = self.camera_distance
             cam_z = self.player.position.z + 3
             look_x, look_y, look_z = self.player.position.x, 0, self.player.position.z
-            gluLookAt(cam_x, cam_y, cam_z, look_x, look_y, look_z, 0, 1, 0)
+        return (cam_x, cam_y, cam_z), (look_x, look_y, look_z)
     
     def update(self):
-        if self.state == 'playing':
-            elapsed = time.time() - self.start_time
-            self.time_left = max(0, 120 - int(elapsed))
-            if self.time_left <= 0:
-                self.game_over("TIME LIMIT EXCEEDED")
-                return
-            
-            self.player.update(self.keys, self.walls)
-            
-            cameras_disabled = any(t.hacked and t.type == 'camera' for t in self.terminals)
-            if not cameras_disabled:
-                for i, camera in enumerate(self.cameras):
-                    camera.update()
-                    detection_status = camera.update_detection(self.player, self.walls)
-                    
-                    if detection_status == 'alarm':
-                        self.game_over("CAUGHT IN CAMERA'S RED VISION CONE!")
-                        return
-                    elif detection_status == 'detecting':
-                        pass
+        if self.input_log is not None:
+            self.input_log.tick(self.keys)
+        if self.state in ('playing', 'hacking'):
+            self.clock.advance()
+        if self.state != 'playing':
+            return
+        profiler = self.profiler
+        for phase in self.update_phases:
+            if profiler is None:
+                phase()
             else:
-                for camera in self.cameras:
-                    camera.disabled = True
-                    camera.update()
-            
+                start = time.perf_counter()
+                phase()
+                profiler.add(phase.__name__[len('update_'):], time.perf_counter() - start)
+            if self.state != 'playing':
+                return
+    
+    def update_timer(self):
+        elapsed = self.clock.time - self.start_time
+        self.time_left = max(0, 120 - int(elapsed))
+        if self.time_left <= 0:
+            self.game_over("TIME LIMIT EXCEEDED")
+    
+    def update_player(self):
+        if self.agents is not None:
+            self.agents.update_players(self)
+            return
+        self.player.update(self.keys, self.walls, self.wall_grid)
+    
+    def update_cameras(self):
+        dt = self.clock.dt
+        cameras_disabled = self.terminal_hacked('camera')
+        if not cameras_disabled and self.agents is not None:
+            self.camera_array.advance(dt)
+            caught = self.agents.update_cameras(self.camera_array, self.camera_grid, self.walls, self.clock.time, self.wall_grid)
+            if caught and self.agents.eliminate(caught, "CAUGHT IN CAMERA'S RED VISION CONE!"):
+                self.game_over("CAUGHT IN CAMERA'S RED VISION CONE!")
+        elif not cameras_disabled and self.camera_array is not None:
+            if self.camera_array.update(dt, self.player, self.walls, self.clock.time, self.wall_grid):
+                self.game_over("CAUGHT IN CAMERA'S RED VISION CONE!")
+        elif not cameras_disabled:
+            if self.camera_schedule.update(self.player, self.walls, self.clock.time, self.wall_grid):
+                self.game_over("CAUGHT IN CAMERA'S RED VISION CONE!")
+        else:
+            if self.camera_schedule is not None:
+                self.camera_schedule.sync()
+            for camera in self.cameras:
+                camera.disabled = True
+                camera.update(dt)
+    
+    def update_lasers(self):
+        lasers = self.laser_array
+        if lasers is not None:
+            lasers.update()
+        else:
             for laser in self.lasers:
                 laser.update()
-            
-            lasers_disabled = any(t.hacked and t.type == 'laser' for t in self.terminals)
-            if not lasers_disabled:
-                for laser in self.lasers:
-                    if laser.check_collision(self.player):
-                        self.game_over("HIT BY LASER SECURITY")
-                        return
+        
+        lasers_disabled = self.terminal_hacked('laser')
+        if not lasers_disabled and self.agents is not None:
+            agents = self.agents
+            hit = lasers.hits(agents.p0x, agents.p0y, agents.p0z, agents.x, agents.y, agents.z, agents.alive) if lasers else ()
+            if hit and agents.eliminate(hit, "HIT BY LASER SECURITY"):
+                self.game_over("HIT BY LASER SECURITY")
+        elif not lasers_disabled:
+            if lasers is not None:
+                if lasers.collides(self.player):
+                    self.game_over("HIT BY LASER SECURITY")
+                return
+            for laser in self.lasers:
+                if laser.check_collision(self.player):
+                    self.game_over("HIT BY LASER SECURITY")
+                    return
+        elif lasers is not None:
+            lasers.active[:] = False
+        else:
+            for laser in self.lasers:
+                laser.active = False
+    
+    def update_objective(self):
+        self.objective.update()
+        
+        if self.agents is not None:
+            reached = self.agents.reached(self.objective.position, 1.5)
+        else:
+            reached = self.player.position.within(self.objective.position, 1.5)
+        if reached:
+            if all(terminal.hacked for terminal in self.terminals):
+                self.win_level()
             else:
-                for laser in self.lasers:
-                    laser.active = False
-            
-            self.objective.update()
+                camera_terminal_hacked = self.terminal_hacked('camera')
+                laser_terminal_hacked = self.terminal_hacked('laser')
+                if not camera_terminal_hacked and not laser_terminal_hacked:
+                    self.log("Need to hack BOTH terminals: Camera (Red) and Laser (Orange)")
+                elif not camera_terminal_hacked:
+                    self.log("Still need to hack the Camera terminal (Red)")
+                elif not laser_terminal_hacked:
+                    self.log("Still need to hack the Laser terminal (Orange)")
+    
+    def terminal_hacked(self, terminal_type):
+        for terminal in self.terminals:
+            if terminal.hacked and terminal.type == terminal_type:
+                return True
+        return False
+    
+    def step(self, keys=None):
+        if keys is not None:
+            self.keys = keys
+        self.update()
+        if self.profiler is not None:
+            self.profiler.end_frame()
+        return self.state
+    
+    def toggle_profiler(self, trace_path=None):
+        if self.profiler is None:
+            self.profiler = FrameProfiler(trace_path=trace_path)
+            self.log("Profiler ON")
+        else:
+            self.profiler.close()
+            self.profiler = None
+            self.log("Profiler OFF")
+    
+    def key_down(self, key):
+        # Keyboard input from GLUT. Returns False when the key asks to quit the game.
+        self.keys[key] = True
+        
+        if key == b'e' or key == b'E':
+            if not self.hacking:
+                self.try_hack()
+                return True
+        elif key == b'\x1b':
+            if self.hacking:
+                if self.input_log is not None:
+                    self.input_log.command('cancel')
+                self.cancel_hack()
+            else:
+                return False
+        elif key == b'r' or key == b'R':
+            if self.state == 'game_over':
+                self.restart_game()
+            elif self.state == 'won':
+                self.next_level() 
+        elif key == b'n' or key == b'N':
+            if self.state == 'won':
+                self.next_level() 
+        
+        if self.hacking and key.isalnum():
+            char = key.decode('ascii').upper()
+            self.hack_input += char
+            self.log(f"Input: {self.hack_input}")
             
-            if self.player.position.distance_to(self.objective.position) < 1.5:
-                if all(terminal.hacked for terminal in self.terminals):
-                    self.win_level()
-                else:
-                    camera_terminal_hacked = any(t.hacked and t.type == 'camera' for t in self.terminals)
-                    laser_terminal_hacked = any(t.hacked and t.type == 'laser' for t in self.terminals)
-                    if not camera_terminal_hacked and not laser_terminal_hacked:
-                        print("Need to hack BOTH terminals: Camera (Red) and Laser (Orange)")
-                    elif not camera_terminal_hacked:
-                        print("Still need to hack the Camera terminal (Red)")
-                    elif not laser_terminal_hacked:
-                        print("Still need to hack the Laser terminal (Orange)")
-    
-    def try_hack(self):
+            if len(self.hack_input) >= len(self.hack_sequence):
+                self.submit_hack(self.hack_input)
+                self.hack_input = ""
+        return True
+    
+    def key_up(self, key):
+        if key in self.keys:
+            self.keys[key] = False
+    
+    def special_key(self, name, pressed):
+        self.keys[name] = pressed
+    
+    def toggle_view(self):
+        if self.input_log is not None:
+            self.input_log.command('toggle_view')
+        self.first_person_mode = not self.first_person_mode
+        mode_text = "first-person" if self.first_person_mode else "third-person"
+        self.log(f"Camera switched to {mode_text} mode")
+    
+    def try_hack(self, agent=0):
+        if self.input_log is not None:
+            self.input_log.command('try_hack')
+        position = self.player.position if agent == 0 else self.agents.players[agent].position
         nearest_terminal = None
         min_distance = float('inf')
         for terminal in self.terminals:
             if not terminal.hacked:
-                distance = self.player.position.distance_to(terminal.position)
+                distance = position.distance_to(terminal.position)
                 if distance < min_distance and distance < 2:
                     min_distance = distance
                     nearest_terminal = terminal
@@ -661,214 +2740,246 @@ class Game:
     def start_hacking(self, terminal):
         self.hacking, self.state, self.hack_target, self.hack_input = True, 'hacking', terminal, ""
         chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-        sequence_length = random.randint(4, 6)
-        self.hack_sequence = ''.join(random.choice(chars) for _ in range(sequence_length))
+        sequence_length = self.rng.randint(4, 6)
+        self.hack_sequence = ''.join(self.rng.choice(chars) for _ in range(sequence_length))
         terminal_name = "CAMERA CONTROL" if terminal.type == 'camera' else "LASER CONTROL"
-        print(f"HACKING {terminal_name} TERMINAL")
-        print(f"Enter sequence: {self.hack_sequence}")
-        print(f"Hack Lives Remaining: {self.hack_lives}")
-        print(f"Current input: {self.hack_input}")
+        self.log(f"HACKING {terminal_name} TERMINAL")
+        self.log(f"Enter sequence: {self.hack_sequence}")
+        self.log(f"Hack Lives Remaining: {self.hack_lives}")
+        self.log(f"Current input: {self.hack_input}")
     
     def submit_hack(self, input_sequence):
+        if self.input_log is not None:
+            self.input_log.command('submit_hack', input_sequence)
         if input_sequence.upper() == self.hack_sequence:
             self.score += 500
             self.hack_target.hacked = True
             if self.hack_target.type == 'camera':
                 for camera in self.cameras:
                     camera.disabled = True
-                print("CAMERA SYSTEM DISABLED! All cameras are now offline.")
+                self.log("CAMERA SYSTEM DISABLED! All cameras are now offline.")
             else:
                 for laser in self.lasers:
                     laser.active = False
-                print("LASER SYSTEM DISABLED! All laser barriers are now offline.")
-            print("HACK SUCCESSFUL!")
+                self.log("LASER SYSTEM DISABLED! All laser barriers are now offline.")
+            self.log("HACK SUCCESSFUL!")
             self.cancel_hack()
         else:
             self.hack_lives -= 1
-            print(f"INCORRECT SEQUENCE! Lives remaining: {self.hack_lives}")
-            print(f"Target sequence: {self.hack_sequence}")
+            self.log(f"INCORRECT SEQUENCE! Lives remaining: {self.hack_lives}")
+            self.log(f"Target sequence: {self.hack_sequence}")
             
             if self.hack_lives <= 0:
                 self.cancel_hack()
                 self.game_over("OUT OF HACKING LIVES - MISSION FAILED")
             else:
-                print(f"Try again! You have {self.hack_lives} lives left for all terminal hacking.")
+                self.log(f"Try again! You have {self.hack_lives} lives left for all terminal hacking.")
                 self.hack_input = ""
     
     def cancel_hack(self):
         self.hacking, self.state, self.hack_target, self.hack_input = False, 'playing', None, ""
-        print("Hacking cancelled.")
+        self.log("Hacking cancelled.")
     
     def game_over(self, reason):
         self.state = 'game_over'
-        print(f"MISSION FAILED: {reason}\nPress R to restart or ESC to exit")
+        self.game_over_reason = reason
+        self.log(f"MISSION FAILED: {reason}\nPress R to restart or ESC to exit")
     
     def win_level(self):
         self.state = 'won'
         time_bonus = max(0, self.time_left * 10)
         self.score += time_bonus
-        print(f"MISSION COMPLETE! Score: {self.score}, Time Bonus: {time_bonus}\nPress N for next level or R to restart")
+        self.time_bonus = time_bonus
+        self.log(f"MISSION COMPLETE! Score: {self.score}, Time Bonus: {time_bonus}\nPress N for next level or R to restart")
     
     def next_level(self):
+        if self.input_log is not None:
+            self.input_log.command('next_level')
         self.level += 1
         self.time_left = max(90, 120 - (self.level - 1) * 10)
-        self.start_time = time.time()-10
+        self.start_time = self.clock.time - 10
         self.state = 'playing'
         self.hack_lives = 2
-        self.player.position = Vector3(-8, 0.5, -8)
         self.create_level(self.level)
-        print(f"Level {self.level} started!\nCameras: {len(self.cameras)}, Lasers: {len(self.lasers)}")
-        print(f"Hack Lives: {self.hack_lives}")
+        self.player.position = self.player_start.copy()
+        self.log(f"Level {self.level} started!\nCameras: {len(self.cameras)}, Lasers: {len(self.lasers)}")
+        self.log(f"Hack Lives: {self.hack_lives}")
     
     def restart_game(self):
+        if self.input_log is not None:
+            self.input_log.command('restart_game')
         self.level, self.score = 1, 0
-        self.time_left, self.start_time, self.state = 120, time.time(), 'playing'
+        self.time_left, self.start_time, self.state = 120, self.clock.time, 'playing'
+        self.game_over_reason, self.time_bonus = None, 0
         self.hack_lives = 2 
-        self.player.position = Vector3(-8, 0.5, -8)
         self.create_level(self.level)
-        print(f"Game restarted!\nLevel {self.level}: Cameras: {len(self.cameras)}, Lasers: {len(self.lasers)}")
-        print(f"Hack Lives: {self.hack_lives}")
+        self.player.position = self.player_start.copy()
+        self.log(f"Game restarted!\nLevel {self.level}: Cameras: {len(self.cameras)}, Lasers: {len(self.lasers)}")
+        self.log(f"Hack Lives: {self.hack_lives}")
     
-    def draw_floor(self):
-        glColor3f(*DARK_GRAY)
-        glBegin(GL_QUADS)
-        glVertex3f(-10, 0, -10)
-        glVertex3f(10, 0, -10)
-        glVertex3f(10, 0, 10)
-        glVertex3f(-10, 0, 10)
-        glEnd()
+    def draw_floor(self, r):
+        min_x, max_x, min_z, max_z = self.bounds
+        r.begin()
+        r.color(*DARK_GRAY)
+        r.primitive('quads', [(min_x, 0, min_z), (max_x, 0, min_z), (max_x, 0, max_z), (min_x, 0, max_z)])
         
-        glColor3f(0.3, 0.3, 0.3)
-        glLineWidth(1.0)
-        glBegin(GL_LINES)
-        for i in range(-10, 11, 2):
-            glVertex3f(i, 0.01, -10)
-            glVertex3f(i, 0.01, 10)
-            glVertex3f(-10, 0.01, i)
-            glVertex3f(10, 0.01, i)
-        glEnd()
+        r.color(0.3, 0.3, 0.3)
+        grid = []
+        for x in range(math.ceil(min_x / 2) * 2, int(max_x) + 1, 2):
+            grid.extend([(x, 0.01, min_z), (x, 0.01, max_z)])
+        for z in range(math.ceil(min_z / 2) * 2, int(max_z) + 1, 2):
+            grid.extend([(min_x, 0.01, z), (max_x, 0.01, z)])
+        r.primitive('lines', grid)
         
-        glColor3f(0.5, 0.5, 0.5)
-        glLineWidth(2.0)
-        glBegin(GL_LINES)
-        glVertex3f(-1, 0.02, 0)
-        glVertex3f(1, 0.02, 0)
-        glVertex3f(0, 0.02, -1)
-        glVertex3f(0, 0.02, 1)
-        glEnd()
-        glLineWidth(1.0)
+        r.begin(line_width=2.0)
+        r.color(0.5, 0.5, 0.5)
+        r.primitive('lines', [(-1, 0.02, 0), (1, 0.02, 0), (0, 0.02, -1), (0, 0.02, 1)])
     
-    def draw_text(self, x, y, text, color=None):
-        if GLUT_BITMAP_HELVETICA_18 is None:
-            return
+    def draw_text(self, r, x, y, text, color=None):
         if color:
-            glColor3f(*color)
+            r.color(*color)
         else:
-            glColor3f(1, 1, 1)
-        glRasterPos2f(x, y)
-        for char in text:
-            glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(char))
+            r.color(1, 1, 1)
+        r.text(x, y, text)
     
-    def draw_ui(self):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        glOrtho(0, WINDOW_WIDTH, WINDOW_HEIGHT, 0, -1, 1)
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
-        glDisable(GL_DEPTH_TEST)
-        glDisable(GL_LIGHTING)
-        
-        texts = [f"Level: {self.level}", f"Score: {self.score}", f"Time: {self.time_left}",
-                f"Hack Lives: {self.hack_lives}",
-                f"Cameras: {len(self.cameras)} | Lasers: {len(self.lasers)}"]
-        
-        camera_terminal_hacked = any(t.hacked and t.type == 'camera' for t in self.terminals)
-        laser_terminal_hacked = any(t.hacked and t.type == 'laser' for t in self.terminals)
-        
-        detecting_cameras = []
-        if not camera_terminal_hacked:
+    def hud_key(self):
+        # Everything the HUD text depends on. Detection progress enters as the
+        # percentage and warning level shown, so a camera that is watching the
+        # player re-lays-out the HUD only when its readout changes.
+        camera_hacked, laser_hacked = self.terminal_hacked('camera'), self.terminal_hacked('laser')
+        detecting = ()
+        if not camera_hacked:
+            detecting = []
             for i, camera in enumerate(self.cameras):
                 if camera.is_detecting:
-                    detection_progress = min(camera.detection_time / camera.detection_threshold, 1.0)
-                    detecting_cameras.append((i+1, detection_progress))
-        
-        texts.extend([f"Camera System: {'OFFLINE' if camera_terminal_hacked else 'ACTIVE'}",
-                     f"Laser System: {'OFFLINE' if laser_terminal_hacked else 'ACTIVE'}"])
-        
-        if detecting_cameras:
-            for cam_id, progress in detecting_cameras:
-                if progress >= 0.8:
-                    warning_level = "ALARM TRIGGERED!"
-                elif progress >= 0.6:
-                    warning_level = "CRITICAL DANGER"
-                elif progress >= 0.4:
-                    warning_level = "DANGER"
-                elif progress >= 0.2:
-                    warning_level = "WARNING"
-                else:
-                    warning_level = "DETECTED"
-                texts.append(f"Camera {cam_id}: {warning_level} - {progress*100:.0f}%")
-        
-        for i, text in enumerate(texts):
-            if "Camera" in text and any(word in text for word in ["DETECTED", "WARNING", "DANGER", "ALARM"]):
-                if "ALARM TRIGGERED!" in text:
-                    glColor3f(1, 0, 0)  
-                elif "DANGER" in text:
-                    glColor3f(1, 0.3, 0) 
-                elif "WARNING" in text:
-                    glColor3f(1, 0.5, 0)  
-                else:
-                    glColor3f(1, 1, 0)  
-            else:
-                glColor3f(1, 1, 1)  
-            self.draw_text(20, 30 + i * 20, text)
-        
-        if self.hacking:
-            hack_type = "CAMERA CONTROL" if self.hack_target.type == 'camera' else "LASER CONTROL"
-            hack_texts = [f"HACKING {hack_type}", "HACKING...", f"Enter: {self.hack_sequence}", f"Input: {self.hack_input}"]
-            for i, text in enumerate(hack_texts):
-                glColor3f(1, 1, 1) 
-                self.draw_text(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 - 70 + i * 30, text)
-        
-        if self.state == 'game_over':
-            glColor3f(1, 0, 0)
-            self.draw_text(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2, "MISSION FAILED!")
-            glColor3f(1, 1, 1)
-            self.draw_text(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 30, "Press R to restart")
+                    progress = min(camera.detection_time / camera.detection_threshold, 1.0)
+                    warning = next(level for level in DETECTION_LEVELS if progress >= level[0])
+                    detecting.append((i + 1, f"{progress*100:.0f}%", warning))
+            detecting = tuple(detecting)
+        hacking = (self.hack_target.type, self.hack_sequence, self.hack_input) if self.hacking else None
+        return (self.level, self.score, self.time_left, self.hack_lives, len(self.cameras), len(self.lasers),
+                camera_hacked, laser_hacked, detecting, hacking, self.state)
+    
+    def layout_hud(self, key):
+        level, score, time_left, hack_lives, cameras, lasers, camera_hacked, laser_hacked, detecting, hacking, state = key
+        texts = [f"Level: {level}", f"Score: {score}", f"Time: {time_left}", f"Hack Lives: {hack_lives}",
+                 f"Cameras: {cameras} | Lasers: {lasers}",
+                 f"Camera System: {'OFFLINE' if camera_hacked else 'ACTIVE'}",
+                 f"Laser System: {'OFFLINE' if laser_hacked else 'ACTIVE'}"]
+        lines = [(20, 30 + i * 20, text, WHITE) for i, text in enumerate(texts)]
+        for cam_id, percent, (_, warning_level, color) in detecting:
+            lines.append((20, 30 + len(lines) * 20, f"Camera {cam_id}: {warning_level} - {percent}", color))
         
-        if self.state == 'won':
-            glColor3f(0, 1, 0)  
-            self.draw_text(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2, "MISSION COMPLETE!")
-            glColor3f(1, 1, 1)
-            self.draw_text(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 30, "Press N for next level")
+        cx, cy = WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2
+        if hacking:
+            target, sequence, typed = hacking
+            hack_type = "CAMERA CONTROL" if target == 'camera' else "LASER CONTROL"
+            hack_texts = [f"HACKING {hack_type}", "HACKING...", f"Enter: {sequence}", f"Input: {typed}"]
+            lines.extend((cx, cy - 70 + i * 30, text, WHITE) for i, text in enumerate(hack_texts))
+        if state == 'game_over':
+            lines += [(cx, cy, "MISSION FAILED!", RED), (cx, cy + 30, "Press R to restart", WHITE)]
+        if state == 'won':
+            lines += [(cx, cy, "MISSION COMPLETE!", GREEN), (cx, cy + 30, "Press N for next level", WHITE)]
+        return lines
+    
+    def draw_ui(self, r):
+        r.begin(lighting=False, overlay=True)
         
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_LIGHTING)
-        glPopMatrix()
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
+        key = self.hud_key()
+        if key != self.hud[0]:
+            self.hud = key, self.layout_hud(key)
+        for x, y, text, color in self.hud[1]:
+            self.draw_text(r, x, y, text, color)
+        
+        if self.profiler:
+            lines = self.profiler.overlay_lines()
+            for i, text in enumerate(lines):
+                self.draw_text(r, WINDOW_WIDTH - 300, 30 + i * 20, text, (0, 1, 1))
+            cull = self.frustum.stats()
+            self.draw_text(r, WINDOW_WIDTH - 300, 30 + len(lines) * 20,
+                           f"culled {cull['culled']}/{cull['drawn'] + cull['culled']}", (0, 1, 1))
     
-    def render(self):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        self.update_camera()
-        self.draw_floor()
+    def render_snapshot(self):
+        # The state render interpolates: player pose, camera angles and laser
+        # beams, tagged with the static geometry generation so frames never blend
+        # across a level change.
+        if self.camera_schedule is not None:
+            self.camera_schedule.sync()
+        p = self.player
+        return (self.static_geometry.generation, (p.position.x, p.position.y, p.position.z), p.rotation,
+                [camera.angle for camera in self.cameras], [laser.segment for laser in self.lasers])
+    
+    def apply_snapshot(self, snapshot):
+        _, (x, y, z), rotation, angles, segments = snapshot
+        p = self.player
+        p.position.x, p.position.y, p.position.z, p.rotation = x, y, z, rotation
+        for camera, angle in zip(self.cameras, angles):
+            camera.angle = angle
+        for laser, segment in zip(self.lasers, segments):
+            laser.segment = segment
+    
+    def render(self, backend=None, previous=None, alpha=1.0):
+        # With a previous snapshot, draw alpha of the way from it to the current
+        # tick, then put the simulation state back exactly as it was.
+        if previous is None or alpha >= 1.0 or previous[0] != self.static_geometry.generation:
+            return self.draw_frame(backend)
+        current = self.render_snapshot()
+        _, p0, r0, angles0, segments0 = previous
+        _, p1, r1, angles1, segments1 = current
+        lerp = lambda a, b: a + (b - a) * alpha
+        self.apply_snapshot((None, tuple(map(lerp, p0, p1)), lerp_angle(r0, r1, alpha, 360),
+                             [lerp_angle(a, b, alpha, 2 * math.pi) for a, b in zip(angles0, angles1)],
+                             [tuple(map(lerp, a, b)) for a, b in zip(segments0, segments1)]))
+        try:
+            self.draw_frame(backend)
+        finally:
+            self.apply_snapshot(current)
+    
+    def draw_frame(self, backend=None):
+        backend = backend or self.backend
+        if self.camera_schedule is not None:
+            self.camera_schedule.sync()
+        r, profiler, frustum = self.recorder, self.profiler, self.frustum
+        start = time.perf_counter() if profiler else 0
+        eye, center = self.camera_view()
+        frustum.look(eye, center)
+        backend.begin_frame(eye, center)
+        self.static_geometry.draw(r, self, frustum)
         
-        objects_to_draw = self.walls + self.cameras + self.lasers + self.terminals + [self.objective]
+        # Vision cones reach camera.range from the camera, so that bounds the whole camera.
+        for camera in self.cameras:
+            p = camera.position
+            if frustum.visible(p.x, 1.0, p.z, camera.range + 1.0, 'cameras'):
+                camera.draw(r, frustum.detail(camera.FOV_SEGMENTS, p.x, p.y, p.z))
+        for laser in self.lasers:
+            x1, z1, x2, z2 = laser.segment
+            if laser.active and frustum.visible((x1 + x2) / 2, 0.05, (z1 + z2) / 2,
+                                                math.hypot(x2 - x1, z2 - z1) / 2 + 0.3, 'lasers'):
+                laser.draw(r)
+        p = self.objective.position
+        if frustum.visible(p.x, p.y, p.z, Objective.DIAMOND_SIZE, 'objective'):
+            self.objective.draw(r)
         if not self.first_person_mode:
-            objects_to_draw.append(self.player)
-            
-        for obj in objects_to_draw:
-            obj.draw()
+            self.player.draw(r, frustum)
+        if self.agents is not None:
+            for i in np.nonzero(self.agents.alive[1:])[0].tolist():
+                agent = self.agents.players[i + 1]
+                if frustum.visible(agent.position.x, agent.position.y, agent.position.z, 1.2, 'agents'):
+                    agent.draw(r, frustum)
         
-        self.draw_ui()
-        glutSwapBuffers()
+        if profiler:
+            world = time.perf_counter()
+            profiler.add('world', world - start)
+        self.draw_ui(r)
+        if profiler:
+            ui = time.perf_counter()
+            profiler.add('ui', ui - world)
+        r.submit(backend)
+        backend.end_frame()
+        if profiler:
+            profiler.add('submit', time.perf_counter() - ui)
 
-game = None
-FRAME_INTERVAL = 1.0 / FPS
-_last_frame_time = 0.0
+game, scheduler = None, None
 
 def _handle_sigint(sig, frame):
     print("\nCtrl+C detected, shutting down cleanly...")
@@ -878,79 +2989,164 @@ def _handle_sigint(sig, frame):
         pass
     sys.exit(0)
 
-signal.signal(signal.SIGINT, _handle_sigint)
-
 def display():
-    game.update()
-    game.render()
+    if game.profiler:
+        game.profiler.begin_frame()
+    alpha = scheduler.advance()
+    game.render(previous=scheduler.previous, alpha=alpha)
+    if game.profiler:
+        game.profiler.end_frame()
+
+def profiled_input(callback):
+    def handler(*args):
+        if game.profiler is None:
+            return callback(*args)
+        start = time.perf_counter()
+        callback(*args)
+        game.profiler.add('input', time.perf_counter() - start)
+    return handler
 
-def idle():
-    global _last_frame_time
-    now = time.time()
-    if now - _last_frame_time >= FRAME_INTERVAL:
-        glutPostRedisplay()
-        _last_frame_time = now
+def frame_timer(value):
+    glutPostRedisplay()
+    glutTimerFunc(scheduler.delay(), frame_timer, 0)
 
+@profiled_input
 def keyboard(key, x, y):
-    game.keys[key] = True
-    
-    if key == b'e' or key == b'E':
-        if not game.hacking:
-            game.try_hack()
-            return
-    elif key == b'\x1b':
-        if game.hacking:
-            game.cancel_hack()
-        else:
-            sys.exit(0)
-    elif key == b'r' or key == b'R':
-        if game.state == 'game_over':
-            game.restart_game()
-        elif game.state == 'won':
-            game.next_level() 
-    elif key == b'n' or key == b'N':
-        if game.state == 'won':
-            game.next_level() 
-    
-    if game.hacking and key.isalnum():
-        char = key.decode('ascii').upper()
-        game.hack_input += char
-        print(f"Input: {game.hack_input}")
-        
-        if len(game.hack_input) >= len(game.hack_sequence):
-            game.submit_hack(game.hack_input)
-            game.hack_input = ""
+    if (key == b'p' or key == b'P') and not game.hacking:
+        game.toggle_profiler()
+    if not game.key_down(key):
+        sys.exit(0)
 
+@profiled_input
 def mouse(button, state, x, y):
     if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
-        game.first_person_mode = not game.first_person_mode
-        mode_text = "first-person" if game.first_person_mode else "third-person"
-        print(f"Camera switched to {mode_text} mode")
+        game.toggle_view()
 
+@profiled_input
 def keyboard_up(key, x, y):
-    if key in game.keys:
-        game.keys[key] = False
+    game.key_up(key)
 
+SPECIAL_KEYS = {GLUT_KEY_UP: 'up', GLUT_KEY_DOWN: 'down', GLUT_KEY_LEFT: 'left', GLUT_KEY_RIGHT: 'right'} if GL_AVAILABLE else {}
+
+@profiled_input
 def special_keys(key, x, y):
-    special_map = {GLUT_KEY_UP: 'up', GLUT_KEY_DOWN: 'down', GLUT_KEY_LEFT: 'left', GLUT_KEY_RIGHT: 'right'}
-    if key in special_map:
-        game.keys[special_map[key]] = True
+    if key in SPECIAL_KEYS:
+        game.special_key(SPECIAL_KEYS[key], True)
 
+@profiled_input
 def special_keys_up(key, x, y):
-    special_map = {GLUT_KEY_UP: 'up', GLUT_KEY_DOWN: 'down', GLUT_KEY_LEFT: 'left', GLUT_KEY_RIGHT: 'right'}
-    if key in special_map:
-        game.keys[special_map[key]] = False
+    if key in SPECIAL_KEYS:
+        game.special_key(SPECIAL_KEYS[key], False)
+
+MOVE_KEYS = [b'w', b's', b'a', b'd', 'up', 'down', 'left', 'right', b' ']
+
+def make_random_policy(seed=None):
+    rng = random.Random(seed)
+    def policy(game):
+        if rng.random() < 0.1:
+            game.keys = {key: rng.random() < 0.3 for key in MOVE_KEYS}
+        if game.state == 'playing' and rng.random() < 0.05:
+            game.try_hack()
+        if game.hacking:
+            game.submit_hack(game.hack_sequence if rng.random() < 0.7 else "")
+        return game.keys
+    return policy
+
+def make_navigator_policy(seed=None):
+    # Follows the level's flow fields to each unhacked terminal, hacks it, then
+    # heads for the objective. Cameras and lasers are ignored.
+    keys = {}
+    def policy(game):
+        if game.hacking:
+            game.submit_hack(game.hack_sequence)
+            return keys
+        p, navigation = game.player.position, game.navigation
+        targets = [t for t in game.terminals if not t.hacked]
+        if targets:
+            target = min(targets, key=lambda t: navigation.field(t.position.x, t.position.z, 1.5).distance_from(p.x, p.z))
+            point = navigation.next_point(p.x, p.z, target.position.x, target.position.z, 1.5)
+            if point is None:
+                game.try_hack()
+        else:
+            point = navigation.next_point(p.x, p.z, game.objective.position.x, game.objective.position.z, 0.8)
+        return steer_keys(game.player, point, keys)
+    return policy
+
+def run_mission(game, policy, max_ticks=FPS * 130):
+    ticks = 0
+    while ticks < max_ticks and game.state in ('playing', 'hacking'):
+        game.step(policy(game))
+        ticks += 1
+    return {'state': game.state, 'reason': game.game_over_reason, 'score': game.score,
+            'time_bonus': game.time_bonus, 'level': game.level, 'ticks': ticks,
+            'occlusion_bytes': game.occlusion_memory()}
+
+def run_headless(missions=100, max_ticks=FPS * 130, seed=0, generator=None, profiler=None):
+    results = []
+    start = time.perf_counter()
+    for i in range(missions):
+        game = Game(headless=True, verbose=False, seed=seed + i, generator=generator)
+        game.profiler = profiler
+        results.append(run_mission(game, make_random_policy(seed + i), max_ticks))
+    elapsed = time.perf_counter() - start
+    ticks = sum(r['ticks'] for r in results)
+    outcomes = {}
+    for r in results:
+        key = r['reason'] or r['state'].upper()
+        outcomes[key] = outcomes.get(key, 0) + 1
+    print(f"{missions} missions, {ticks} ticks in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    for outcome, count in sorted(outcomes.items(), key=lambda item: -item[1]):
+        print(f"  {outcome}: {count}")
+    print(f"Peak occlusion map memory per level: {max(r['occlusion_bytes'] for r in results) / 1024:.1f} KB")
+    if profiler:
+        for line in profiler.overlay_lines():
+            print("  " + line)
+    return results
 
 def main():
-    global game
+    global game, scheduler
+    
+    generator, profile_path = None, None
+    if '--profile' in sys.argv:
+        idx = sys.argv.index('--profile')
+        profile_path = sys.argv[idx + 1] if len(sys.argv) > idx + 1 and not sys.argv[idx + 1].startswith('--') else None
+    if '--facility' in sys.argv:
+        import levelgen
+        idx = sys.argv.index('--facility')
+        facility_seed = int(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 and sys.argv[idx + 1].isdigit() else 0
+        generator = levelgen.FacilityGenerator(facility_seed)
+    if '--levels' in sys.argv:
+        import levelpack
+        generator = levelpack.LevelPack(sys.argv[sys.argv.index('--levels') + 1])
+    if '--headless' in sys.argv:
+        idx = sys.argv.index('--headless')
+        missions = int(sys.argv[idx + 1]) if len(sys.argv) > idx + 1 and sys.argv[idx + 1].isdigit() else 100
+        seed = int(sys.argv[sys.argv.index('--seed') + 1]) if '--seed' in sys.argv else 0
+        profiler = FrameProfiler(trace_path=profile_path) if '--profile' in sys.argv else None
+        run_headless(missions, seed=seed, generator=generator, profiler=profiler)
+        if profiler:
+            profiler.close()
+        return
+    if not GL_AVAILABLE:
+        sys.exit("PyOpenGL is required to play. Use --headless to run the simulation without a window.")
+    signal.signal(signal.SIGINT, _handle_sigint)
     
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
     glutCreateWindow(b"Cyber Heist 3D - Strategic Terminal System")
     
-    game = Game()
+    game = Game(generator=generator)
     game.init_opengl()
+    render_fps = int(sys.argv[sys.argv.index('--render-fps') + 1]) if '--render-fps' in sys.argv else FPS
+    scheduler = FrameScheduler(game, render_fps)
+    if '--profile' in sys.argv:
+        game.toggle_profiler(profile_path)
+    if '--record' in sys.argv:
+        import replay
+        record_path = sys.argv[sys.argv.index('--record') + 1]
+        replay.record(record_path, game)
+        print(f"Recording input to {record_path}")
     
     glutDisplayFunc(display)
     glutKeyboardFunc(keyboard)
@@ -958,11 +3154,12 @@ def main():
     glutSpecialFunc(special_keys)
     glutSpecialUpFunc(special_keys_up)
     glutMouseFunc(mouse)  
-    glutIdleFunc(idle)
+    glutTimerFunc(scheduler.delay(), frame_timer, 0)
 
     print("CYBER HEIST 3D - STRATEGIC TERMINAL SYSTEM")
     print("Controls:\nWASD - Move Forward/Back & Rotate Left/Right\nSPACE - Jump\nE - Hack terminal (when near)")
     print("R - Restart/Next level\nESC - Cancel hacking / Exit\nRIGHT-CLICK - Toggle First/Third Person Camera")
+    print("P - Toggle frame profiler overlay")
     print("\nSTRATEGIC GAMEPLAY:")
     print("RED Terminal - Disables ALL security cameras")
     print("ORANGE Terminal - Disables ALL laser barriers")
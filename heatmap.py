@@ -0,0 +1,237 @@
+"""Camera coverage heatmaps for level design.
+
+Loads a level through Game.create_level and replays every SecurityCamera
+over one full rotation cycle. A camera waits rotation_interval, turns 90
+degrees at rotation_speed, and is back where it started after four turns.
+For each floor cell the analysis uses the same range, FOV and line-of-sight
+rules as SecurityCamera.can_see_player, and reports:
+
+    exposure   seconds per cycle that at least one camera sees the cell
+    risk       the longest time any one camera keeps seeing the cell
+               without a break, divided by the time its alarm takes
+               (1.0 = standing there is always caught)
+
+Each camera is one batched NumPy pass: line of sight once per cell, then the
+cone test for every distinct angle of the cycle. Cameras are spread over a
+process pool.
+
+    python heatmap.py --level 8 --out level8             # level8.csv, level8_exposure.png, level8_risk.png
+    python heatmap.py --facility 7 --level 10 --out big --workers 8
+    python heatmap.py --levels big.chl --level 3 --resolution 0.25
+"""
+import argparse, csv, math, multiprocessing, os, time
+
+import numpy as np
+
+from game import FPS, Game, SecurityCamera, segments_hit_boxes
+from images import write_png
+
+_worker = None
+
+def load_level(level, facility=None, pack=None):
+    generator = None
+    if facility is not None:
+        import levelgen
+        generator = levelgen.FacilityGenerator(facility)
+    elif pack is not None:
+        import levelpack
+        generator = levelpack.LevelPack(pack)
+    game = Game(headless=True, verbose=False, seed=0, generator=generator)
+    if level != 1:
+        game.create_level(level)
+    return game
+
+class FloorGrid:
+    # Cell centres over the level bounds; a cell whose centre lies inside a
+    # wall is marked as wall and never analyzed.
+    def __init__(self, bounds, walls, resolution):
+        min_x, max_x, min_z, max_z = bounds
+        self.bounds, self.resolution = bounds, resolution
+        self.nx = max(1, math.ceil((max_x - min_x) / resolution))
+        self.nz = max(1, math.ceil((max_z - min_z) / resolution))
+        self.xs = min_x + (np.arange(self.nx) + 0.5) * resolution
+        self.zs = min_z + (np.arange(self.nz) + 0.5) * resolution
+        self.wall = np.zeros((self.nx, self.nz), dtype=bool)
+        for w in walls:
+            inside_x = np.abs(self.xs - w.position.x) < w.size.x / 2
+            inside_z = np.abs(self.zs - w.position.z) < w.size.z / 2
+            self.wall |= inside_x[:, None] & inside_z[None, :]
+
+    def window(self, x, z, reach):
+        # Flat indices and centres of the cells within `reach` of (x, z) per axis.
+        min_x, _, min_z, _ = self.bounds
+        res = self.resolution
+        i0, i1 = max(0, math.floor((x - reach - min_x) / res)), min(self.nx, math.ceil((x + reach - min_x) / res) + 1)
+        j0, j1 = max(0, math.floor((z - reach - min_z) / res)), min(self.nz, math.ceil((z + reach - min_z) / res) + 1)
+        i, j = np.meshgrid(np.arange(i0, i1), np.arange(j0, j1), indexing='ij')
+        i, j = i.ravel(), j.ravel()
+        return i * self.nz + j, self.xs[i], self.zs[j]
+
+def angle_timeline(camera, dt=1.0 / FPS, turns=4):
+    # The camera's angle after each tick's update, from its current state until
+    # `turns` rotations later, when it is back to the same state.
+    probe = SecurityCamera(camera.position.x, camera.position.z, camera.direction)
+    for name in SecurityCamera.ARRAY_FIELDS:
+        setattr(probe, name, getattr(camera, name))
+    probe.disabled = False
+    angles, finished = [], 0
+    while finished < turns:
+        rotating = probe.rotating
+        probe.update(dt)
+        angles.append(probe.angle)
+        finished += rotating and not probe.rotating
+    return np.array(angles)
+
+def longest_runs(seen):
+    # Longest run of True along each row, counting runs that wrap around the
+    # end of the cycle.
+    n, length = seen.shape
+    doubled = np.concatenate((seen, seen), axis=1)
+    ticks = np.arange(2 * length)
+    last_miss = np.maximum.accumulate(np.where(doubled, -1, ticks), axis=1)
+    return np.minimum((ticks - last_miss).max(axis=1), length)
+
+def line_of_sight(camera, walls, grid, xs, zs):
+    # SecurityCamera.clear_line_to for many points: the occlusion map where it
+    # knows the answer, an exact raycast against nearby walls elsewhere.
+    clear = np.ones(len(xs), dtype=bool)
+    unknown = np.ones(len(xs), dtype=bool)
+    occlusion_map = camera.occlusion_map
+    if occlusion_map is not None:
+        if occlusion_map.cells is None:
+            occlusion_map.bake()
+        cells = occlusion_map.cells
+        i = np.floor((xs - occlusion_map.x0) / occlusion_map.resolution).astype(np.int64)
+        j = np.floor((zs - occlusion_map.z0) / occlusion_map.resolution).astype(np.int64)
+        inside = (i >= 0) & (i < cells.shape[0]) & (j >= 0) & (j < cells.shape[1])
+        state = np.full(len(xs), occlusion_map.MIXED, dtype=np.int8)
+        state[inside] = cells[i[inside], j[inside]]
+        unknown = state == occlusion_map.MIXED
+        clear[~unknown] = state[~unknown] == occlusion_map.VISIBLE
+    if unknown.any():
+        cx, cz, reach = camera.position.x, camera.position.z, camera.range
+        nearby = grid.query(cx - reach, cz - reach, cx + reach, cz + reach) if grid is not None else walls
+        if nearby:
+            wx = np.array([w.position.x for w in nearby])
+            wz = np.array([w.position.z for w in nearby])
+            hx = np.array([w.size.x / 2 for w in nearby])
+            hz = np.array([w.size.z / 2 for w in nearby])
+            hit = segments_hit_boxes(cx, cz, xs[unknown, None], zs[unknown, None], wx, wz, hx, hz).any(axis=1)
+            clear[unknown] = ~hit
+    return clear
+
+def camera_coverage(camera, walls, wall_grid, floor, timeline):
+    # (cells, ticks seen as packed bits, longest run in ticks) over the cells
+    # the camera can ever see.
+    cells, xs, zs = floor.window(camera.position.x, camera.position.z, camera.range)
+    dx, dz = xs - camera.position.x, zs - camera.position.z
+    keep = (np.sqrt(dx * dx + dz * dz) <= camera.range) & ~floor.wall.ravel()[cells]
+    cells, xs, zs, dx, dz = cells[keep], xs[keep], zs[keep], dx[keep], dz[keep]
+    keep = line_of_sight(camera, walls, wall_grid, xs, zs)
+    cells, dx, dz = cells[keep], dx[keep], dz[keep]
+    angles, inverse = np.unique(timeline, return_inverse=True)
+    cos_a, sin_a = np.cos(angles), np.sin(angles)
+    local_x = dx[:, None] * cos_a - dz[:, None] * sin_a
+    local_z = dx[:, None] * sin_a + dz[:, None] * cos_a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cone = (local_x > 0) & (np.arctan2(np.abs(local_z), local_x) <= math.radians(camera.fov_degrees / 2))
+    seen = cone[:, inverse]
+    return cells, np.packbits(seen, axis=1), longest_runs(seen)
+
+def init_worker(level, facility, pack, resolution, cycle):
+    global _worker
+    game = load_level(level, facility, pack)
+    _worker = game, FloorGrid(game.bounds, game.walls, resolution), cycle
+
+def analyze_camera(i):
+    game, floor, cycle = _worker
+    camera = game.cameras[i]
+    timeline = np.resize(angle_timeline(camera, game.clock.dt), cycle)
+    cells, bits, runs = camera_coverage(camera, game.walls, game.wall_grid, floor, timeline)
+    alarm_ticks = 0.8 * camera.detection_threshold / game.clock.dt
+    return cells, bits, np.minimum((runs - 1).clip(0) / alarm_ticks, 1.0)
+
+def analyze(level=1, facility=None, pack=None, resolution=0.5, workers=None):
+    game = load_level(level, facility, pack)
+    floor = FloorGrid(game.bounds, game.walls, resolution)
+    # Cycles only differ if cameras were changed; analyze over the longest.
+    cycle = max((len(angle_timeline(c, game.clock.dt)) for c in game.cameras), default=1)
+    size = floor.nx * floor.nz
+    exposed = np.zeros((size, (cycle + 7) // 8), dtype=np.uint8)
+    risk, watchers = np.zeros(size), np.zeros(size, dtype=np.int32)
+    args = (level, facility, pack, resolution, cycle)
+    if workers == 1 or len(game.cameras) < 2:
+        init_worker(*args)
+        results = map(analyze_camera, range(len(game.cameras)))
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers or os.cpu_count(), init_worker, args)
+        results = pool.imap_unordered(analyze_camera, range(len(game.cameras)))
+    try:
+        for cells, bits, camera_risk in results:
+            exposed[cells] |= bits
+            np.maximum.at(risk, cells, camera_risk)
+            watchers[cells] += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    ticks = np.unpackbits(exposed, axis=1, count=cycle).sum(axis=1)
+    return {'game': game, 'floor': floor, 'cycle': cycle, 'dt': game.clock.dt,
+            'exposure': (ticks * game.clock.dt).reshape(floor.nx, floor.nz),
+            'risk': risk.reshape(floor.nx, floor.nz), 'cameras': watchers.reshape(floor.nx, floor.nz)}
+
+def write_csv(path, result):
+    floor, cycle_seconds = result['floor'], result['cycle'] * result['dt']
+    with open(path, 'w', newline='') as f:
+        out = csv.writer(f)
+        out.writerow(['x', 'z', 'wall', 'exposure_s', 'exposure_fraction', 'risk', 'cameras'])
+        for i, x in enumerate(floor.xs.tolist()):
+            for j, z in enumerate(floor.zs.tolist()):
+                exposure = result['exposure'][i, j]
+                out.writerow([f"{x:g}", f"{z:g}", int(floor.wall[i, j]), f"{exposure:.3f}",
+                              f"{exposure / cycle_seconds:.4f}", f"{result['risk'][i, j]:.3f}", result['cameras'][i, j]])
+
+def heatmap(values, floor, cameras, scale=4):
+    # 0 -> dark floor, then green -> yellow -> red as values reach 1; walls grey
+    # and cameras white. Rows run along z, columns along x.
+    t = np.clip(values, 0, 1)
+    rgb = np.stack((np.clip(2 * t, 0, 1), np.clip(2 - 2 * t, 0, 1), np.zeros_like(t)), axis=-1) * 255
+    rgb[t <= 0] = (30, 34, 44)
+    rgb[floor.wall] = (110, 110, 110)
+    min_x, _, min_z, _ = floor.bounds
+    for camera in cameras:
+        i = int((camera.position.x - min_x) / floor.resolution)
+        j = int((camera.position.z - min_z) / floor.resolution)
+        if 0 <= i < floor.nx and 0 <= j < floor.nz:
+            rgb[i, j] = 255
+    image = rgb.astype(np.uint8).transpose(1, 0, 2)
+    return np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--facility', type=int, help="analyze a generated facility with this seed")
+    parser.add_argument('--levels', metavar='PACK', help="analyze a level from a compiled level pack")
+    parser.add_argument('--resolution', type=float, default=0.5, help="cell size in world units")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--scale', type=int, default=4, help="PNG pixels per cell")
+    parser.add_argument('--out', default='heatmap', help="output prefix")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = analyze(args.level, args.facility, args.levels, args.resolution, args.workers)
+    elapsed = time.perf_counter() - start
+    floor, game = result['floor'], result['game']
+    cycle_seconds = result['cycle'] * result['dt']
+    write_csv(args.out + '.csv', result)
+    write_png(args.out + '_exposure.png', heatmap(result['exposure'] / cycle_seconds, floor, game.cameras, args.scale))
+    write_png(args.out + '_risk.png', heatmap(result['risk'], floor, game.cameras, args.scale))
+    open_floor = ~floor.wall
+    print(f"{len(game.cameras)} cameras, {floor.nx}x{floor.nz} cells, {cycle_seconds:.2f}s cycle, analyzed in {elapsed:.2f}s")
+    print(f"  floor ever watched: {(result['exposure'][open_floor] > 0).mean():.1%}, "
+          f"always caught if standing still: {(result['risk'][open_floor] >= 1).mean():.1%}")
+    print(f"  wrote {args.out}.csv, {args.out}_exposure.png, {args.out}_risk.png")
+
+if __name__ == '__main__':
+    main()
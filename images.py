@@ -0,0 +1,15 @@
+"""Image output without an imaging library."""
+import struct, zlib
+
+import numpy as np
+
+def write_png(path, rgb, level=6):
+    # Minimal 8-bit RGB PNG writer, so no imaging library is needed. level is
+    # the zlib compression level.
+    height, width, _ = rgb.shape
+    raw = np.concatenate((np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, width * 3)), axis=1)
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+                chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) + chunk(b'IEND', b''))
@@ -0,0 +1,239 @@
+"""Seeded procedural facility generator.
+
+Builds a grid of rooms joined by doorways (a random spanning tree plus a few
+extra loops), then scatters pillars, cameras, lasers, terminals and the
+objective. Every layout is checked for solvability: walking from the start
+must reach every terminal and the objective. Layouts are plain data, so
+Game.load_layout turns them into entities. They are cached by seed and
+parameters in memory, and on disk when a cache directory is given.
+
+    layout = levelgen.facility(seed=7, rooms_x=20, rooms_z=20)
+    game = Game(generator=levelgen.FacilityGenerator(seed=7))
+"""
+import collections, hashlib, json, math, os, random
+
+WALL_HEIGHT, WALL_THICKNESS, PLAYER_RADIUS = 3, 1, 0.5
+# The game measures reach in 3D from a standing player (y=0.5) to a terminal
+# (y=0.75) or the objective (y=1.0), so the reach across the floor is shorter
+# than Game's 2.0 and 1.5.
+PLAYER_Y, TERMINAL_Y, OBJECTIVE_Y = 0.5, 0.75, 1.0
+HACK_RANGE = math.sqrt(2.0 ** 2 - (TERMINAL_Y - PLAYER_Y) ** 2)
+OBJECTIVE_RANGE = math.sqrt(1.5 ** 2 - (OBJECTIVE_Y - PLAYER_Y) ** 2)
+FIXED_LASERS = ('horizontal_fixed', 'vertical_fixed')
+
+class FacilityLayout:
+    def __init__(self, bounds, player_start, walls, cameras, lasers, terminals, objective):
+        self.bounds = bounds              # (min_x, max_x, min_z, max_z) of the floor
+        self.player_start = player_start  # (x, z)
+        self.walls = walls                # [(x, y, z, sx, sy, sz)]
+        self.cameras = cameras            # [(x, z, direction)]
+        self.lasers = lasers              # [(x1, z1, x2, z2, movement_type)]
+        self.terminals = terminals        # [(x, z, 'camera' | 'laser')]
+        self.objective = objective        # (x, z)
+    
+    def to_dict(self):
+        return dict(vars(self))
+    
+    @classmethod
+    def from_dict(cls, data):
+        entities = {key: [tuple(item) for item in data[key]] for key in ('walls', 'cameras', 'lasers', 'terminals')}
+        return cls(tuple(data['bounds']), tuple(data['player_start']), objective=tuple(data['objective']), **entities)
+
+def build_layout(rng, rooms_x, rooms_z, room_size, door_width, loop_chance, pillars_per_room,
+                 camera_chance, laser_chance, terminals_per_type):
+    x0, z0 = -rooms_x * room_size / 2, -rooms_z * room_size / 2
+    width, depth = rooms_x * room_size, rooms_z * room_size
+    h = WALL_HEIGHT / 2
+    walls = [(0, h, z0, width + 1, WALL_HEIGHT, 1), (0, h, z0 + depth, width + 1, WALL_HEIGHT, 1),
+             (x0, h, 0, 1, WALL_HEIGHT, depth + 1), (x0 + width, h, 0, 1, WALL_HEIGHT, depth + 1)]
+    
+    # Random spanning tree over the room grid, plus a few extra doors for loops.
+    rooms = [(i, j) for i in range(rooms_x) for j in range(rooms_z)]
+    doors, visited, frontier = set(), {(0, 0)}, [(0, 0)]
+    while frontier:
+        room = frontier[-1]
+        options = [(room[0] + di, room[1] + dj) for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1))]
+        options = [r for r in options if 0 <= r[0] < rooms_x and 0 <= r[1] < rooms_z and r not in visited]
+        if not options:
+            frontier.pop()
+            continue
+        nxt = rng.choice(options)
+        doors.add((min(room, nxt), max(room, nxt)))
+        visited.add(nxt)
+        frontier.append(nxt)
+    
+    lasers = []
+    for i, j in rooms:
+        for neighbour in ((i + 1, j), (i, j + 1)):
+            if neighbour[0] >= rooms_x or neighbour[1] >= rooms_z:
+                continue
+            edge = ((i, j), neighbour)
+            vertical = neighbour[0] == i + 1
+            line = x0 + (i + 1) * room_size if vertical else z0 + (j + 1) * room_size
+            start = z0 + j * room_size if vertical else x0 + i * room_size
+            end = start + room_size
+            if edge not in doors and rng.random() >= loop_chance:
+                walls.append(wall_segment(vertical, line, start, end))
+                continue
+            door_start = rng.uniform(start + 1, end - 1 - door_width)
+            door_end = door_start + door_width
+            walls.append(wall_segment(vertical, line, start, door_start))
+            walls.append(wall_segment(vertical, line, door_end, end))
+            if (i, j) != (0, 0) and rng.random() < laser_chance:
+                if vertical:
+                    lasers.append((line, door_start, line, door_end, 'vertical_fixed'))
+                else:
+                    lasers.append((door_start, line, door_end, line, 'horizontal_fixed'))
+    
+    cameras = []
+    margin = 2.0
+    for i, j in rooms:
+        left, top = x0 + i * room_size, z0 + j * room_size
+        for _ in range(pillars_per_room):
+            if rng.random() < 0.5:
+                size = rng.uniform(0.6, 1.5)
+                walls.append((rng.uniform(left + margin + 1, left + room_size - margin - 1), h,
+                              rng.uniform(top + margin + 1, top + room_size - margin - 1), size, WALL_HEIGHT, size))
+        if (i, j) == (0, 0):
+            continue
+        if rng.random() < camera_chance:
+            cameras.append((rng.uniform(left + margin, left + room_size - margin),
+                            rng.uniform(top + margin, top + room_size - margin), rng.choice((1, -1))))
+        if rng.random() < laser_chance / 2:
+            x, z = rng.uniform(left + margin, left + room_size - margin), rng.uniform(top + margin, top + room_size - margin)
+            lasers.append((x, z, x + 2, z, rng.choice(FIXED_LASERS)))
+    
+    # Terminals in rooms from the far half of the facility, objective in the farthest.
+    depth_of = room_depths(rooms_x, rooms_z, doors)
+    by_distance = sorted(rooms, key=lambda room: (depth_of[room], room))
+    far_rooms = by_distance[len(by_distance) // 2:-1] or by_distance[-1:]
+    terminal_rooms = rng.sample(far_rooms, min(len(far_rooms), 2 * terminals_per_type))
+    terminals = []
+    for k, (i, j) in enumerate(terminal_rooms):
+        terminals.append((x0 + (i + 0.5) * room_size + rng.uniform(-1, 1), z0 + (j + 0.5) * room_size + rng.uniform(-1, 1),
+                          'camera' if k % 2 == 0 else 'laser'))
+    goal = by_distance[-1]
+    objective = (x0 + (goal[0] + 0.5) * room_size, z0 + (goal[1] + 0.5) * room_size)
+    player_start = (x0 + room_size / 2, z0 + room_size / 2)
+    bounds = (x0, x0 + width, z0, z0 + depth)
+    return FacilityLayout(bounds, player_start, walls, cameras, lasers, terminals, objective)
+
+def wall_segment(vertical, line, start, end):
+    center, length = (start + end) / 2, end - start
+    if vertical:
+        return (line, WALL_HEIGHT / 2, center, WALL_THICKNESS, WALL_HEIGHT, length)
+    return (center, WALL_HEIGHT / 2, line, length, WALL_HEIGHT, WALL_THICKNESS)
+
+def room_depths(rooms_x, rooms_z, doors):
+    neighbours = collections.defaultdict(list)
+    for a, b in doors:
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+    depth, queue = {(0, 0): 0}, collections.deque([(0, 0)])
+    while queue:
+        room = queue.popleft()
+        for nxt in neighbours[room]:
+            if nxt not in depth:
+                depth[nxt] = depth[room] + 1
+                queue.append(nxt)
+    return depth
+
+def walkable_cells(layout, resolution=0.5):
+    # Flood fill from the start over cell centres where the player's footprint
+    # does not overlap a wall (same test as Player.check_wall_collision).
+    min_x, max_x, min_z, max_z = layout.bounds
+    nx, nz = int(math.ceil((max_x - min_x) / resolution)), int(math.ceil((max_z - min_z) / resolution))
+    blocked = bytearray(nx * nz)
+    for x, _, z, sx, _, sz in layout.walls:
+        reach_x, reach_z = sx / 2 + PLAYER_RADIUS, sz / 2 + PLAYER_RADIUS
+        i0 = max(0, int((x - reach_x - min_x) / resolution) - 1)
+        i1 = min(nx - 1, int((x + reach_x - min_x) / resolution) + 1)
+        j0 = max(0, int((z - reach_z - min_z) / resolution) - 1)
+        j1 = min(nz - 1, int((z + reach_z - min_z) / resolution) + 1)
+        for i in range(i0, i1 + 1):
+            cx = min_x + (i + 0.5) * resolution
+            if abs(cx - x) >= reach_x:
+                continue
+            for j in range(j0, j1 + 1):
+                if abs(min_z + (j + 0.5) * resolution - z) < reach_z:
+                    blocked[i * nz + j] = 1
+    start = (int((layout.player_start[0] - min_x) / resolution), int((layout.player_start[1] - min_z) / resolution))
+    reached = bytearray(nx * nz)
+    if blocked[start[0] * nz + start[1]]:
+        return reached, nx, nz
+    reached[start[0] * nz + start[1]] = 1
+    queue = collections.deque([start])
+    while queue:
+        i, j = queue.popleft()
+        for ni, nj in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            if 0 <= ni < nx and 0 <= nj < nz:
+                k = ni * nz + nj
+                if not blocked[k] and not reached[k]:
+                    reached[k] = 1
+                    queue.append((ni, nj))
+    return reached, nx, nz
+
+def is_solvable(layout, resolution=0.5):
+    reached, nx, nz = walkable_cells(layout, resolution)
+    min_x, _, min_z, _ = layout.bounds
+    def reachable_within(x, z, distance):
+        cells = int(math.ceil(distance / resolution))
+        ci, cj = int((x - min_x) / resolution), int((z - min_z) / resolution)
+        for i in range(max(0, ci - cells), min(nx, ci + cells + 1)):
+            for j in range(max(0, cj - cells), min(nz, cj + cells + 1)):
+                if reached[i * nz + j] and math.hypot(min_x + (i + 0.5) * resolution - x,
+                                                      min_z + (j + 0.5) * resolution - z) < distance:
+                    return True
+        return False
+    return (all(reachable_within(x, z, HACK_RANGE) for x, z, _ in layout.terminals) and
+            reachable_within(*layout.objective, OBJECTIVE_RANGE))
+
+def generate_facility(seed=0, rooms_x=4, rooms_z=4, room_size=10.0, door_width=2.5, loop_chance=0.15,
+                      pillars_per_room=2, camera_chance=0.5, laser_chance=0.3, terminals_per_type=1, max_attempts=20):
+    for attempt in range(max_attempts):
+        rng = random.Random(f"{seed}:{attempt}")
+        layout = build_layout(rng, rooms_x, rooms_z, room_size, door_width, loop_chance, pillars_per_room,
+                              camera_chance, laser_chance, terminals_per_type)
+        if is_solvable(layout):
+            return layout
+    raise RuntimeError(f"no solvable facility for seed {seed} after {max_attempts} attempts")
+
+_memory_cache = collections.OrderedDict()
+MEMORY_CACHE_SIZE = 32
+# Part of the cache key; bump it when generation or the solvability check
+# changes, so layouts cached on disk by an older version are not reused.
+CACHE_VERSION = 2
+
+def facility(seed=0, cache_dir=None, **params):
+    key = json.dumps(dict(params, seed=seed, version=CACHE_VERSION), sort_keys=True)
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+    layout, path = None, None
+    if cache_dir:
+        path = os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                layout = FacilityLayout.from_dict(json.load(f))
+    if layout is None:
+        layout = generate_facility(seed, **params)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(layout.to_dict(), f)
+    _memory_cache[key] = layout
+    if len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return layout
+
+class FacilityGenerator:
+    # Level source for Game: each level number gets a larger, better guarded facility.
+    def __init__(self, seed=0, base_rooms=3, cache_dir=None, **params):
+        self.seed, self.base_rooms, self.cache_dir, self.params = seed, base_rooms, cache_dir, params
+    
+    def __call__(self, level_num):
+        rooms = self.base_rooms + level_num - 1
+        params = dict(rooms_x=rooms, rooms_z=rooms, camera_chance=min(0.9, 0.3 + 0.05 * level_num),
+                      laser_chance=min(0.6, 0.2 + 0.04 * level_num), terminals_per_type=1 + level_num // 4)
+        params.update(self.params)
+        return facility(self.seed * 1000 + level_num, self.cache_dir, **params)
@@ -0,0 +1,246 @@
+"""Compiled level packs: levels stored as flat arrays and loaded by mmap.
+
+A pack holds a run of levels, with each level's entities as fixed-layout
+arrays. Alongside them it stores the data the game would otherwise derive
+when a level starts: the WallGrid cell map and every camera's baked
+OcclusionMap. LevelPack maps the file once. Entity arrays and occlusion maps
+are read-only NumPy views into that mapping, so opening a level, or switching
+back to one, copies nothing. Only the entity objects the simulation steps
+are created.
+
+    python levelpack.py levels.chl                          # built-in levels 1-8
+    python levelpack.py big.chl --facility 7 --levels 12    # generated facilities
+    python levelpack.py --info big.chl
+    python game.py --levels big.chl
+
+Pack layout (little endian, every array 8-byte aligned):
+    header   magic 'CHLV', version u16, level count u32
+    table    (offset u64, size u64) per level, padded to 8 bytes
+    level    LEVEL struct, then walls f8[n,6], cameras f8[n,3] (x, z, direction),
+             lasers f8[n,4] + u1[n] movement type, terminals f8[n,2] + u1[n] type,
+             wall grid keys i4[c,2], offsets i4[c+1], wall indices i4[r],
+             occlusion origins f8[n,2], sizes i4[n], cells i1[sum of size**2]
+"""
+import argparse, mmap, os, struct, time
+
+import numpy as np
+
+MAGIC, VERSION = b'CHLV', 1
+HEADER = struct.Struct('<4sHxxI')
+ENTRY = struct.Struct('<QQ')
+# bounds, player start, objective, grid cell size, occlusion resolution, then the counts.
+LEVEL = struct.Struct('<10d6I')
+LASER_TYPES = ('static', 'horizontal_fixed', 'vertical_fixed', 'rotating', 'sliding')
+TERMINAL_TYPES = ('camera', 'laser')
+
+def align(n):
+    return (n + 7) & ~7
+
+class Writer:
+    def __init__(self):
+        self.data = bytearray()
+
+    def put(self, array, dtype):
+        self.data += np.ascontiguousarray(array, dtype=dtype).tobytes()
+        self.data += bytes(align(len(self.data)) - len(self.data))
+
+class Reader:
+    def __init__(self, buffer, pos):
+        self.buffer, self.pos = buffer, pos
+
+    def take(self, dtype, *shape):
+        count = int(np.prod(shape))
+        array = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.pos).reshape(shape)
+        self.pos = align(self.pos + array.nbytes)
+        return array
+
+def level_from_game(game):
+    # The level the game has loaded, as the pieces compile_level stores.
+    p = game.player_start
+    walls = [(w.position.x, w.position.y, w.position.z, w.size.x, w.size.y, w.size.z) for w in game.walls]
+    cameras = [(c.position.x, c.position.z, c.direction) for c in game.cameras]
+    lasers = [(l.original_start.x, l.original_start.z, l.original_end.x, l.original_end.z) for l in game.lasers]
+    terminals = [(t.position.x, t.position.z) for t in game.terminals]
+    occlusion = []
+    for camera in game.cameras:
+        occlusion_map = camera.occlusion_map
+        if occlusion_map.cells is None:
+            occlusion_map.bake()
+        occlusion.append((occlusion_map.x0, occlusion_map.z0, occlusion_map.cells))
+    resolution = game.cameras[0].occlusion_map.resolution if game.cameras else 0.25
+    return dict(bounds=game.bounds, player_start=(p.x, p.z), objective=(game.objective.position.x, game.objective.position.z),
+                walls=walls, cameras=cameras, lasers=lasers, laser_types=[LASER_TYPES.index(l.movement_type) for l in game.lasers],
+                terminals=terminals, terminal_types=[TERMINAL_TYPES.index(t.type) for t in game.terminals],
+                grid=game.wall_grid, resolution=resolution, occlusion=occlusion)
+
+def compile_level(level):
+    grid = level['grid']
+    keys = sorted(grid.cells)
+    refs = [grid.cells[key] for key in keys]
+    offsets = np.zeros(len(keys) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(r) for r in refs])
+    sizes = [cells.shape[0] for _, _, cells in level['occlusion']]
+    out = Writer()
+    out.data += LEVEL.pack(*level['bounds'], *level['player_start'], *level['objective'], grid.cell_size, level['resolution'],
+                           len(level['walls']), len(level['cameras']), len(level['lasers']), len(level['terminals']),
+                           len(keys), int(offsets[-1]))
+    out.data += bytes(align(len(out.data)) - len(out.data))
+    out.put(level['walls'], '<f8')
+    out.put(level['cameras'], '<f8')
+    out.put(level['lasers'], '<f8')
+    out.put(level['laser_types'], 'u1')
+    out.put(level['terminals'], '<f8')
+    out.put(level['terminal_types'], 'u1')
+    out.put(keys, '<i4')
+    out.put(offsets, '<i4')
+    out.put([i for r in refs for i in r], '<i4')
+    out.put([(x0, z0) for x0, z0, _ in level['occlusion']], '<f8')
+    out.put(sizes, '<i4')
+    for _, _, cells in level['occlusion']:
+        out.data += np.ascontiguousarray(cells, dtype=np.int8).tobytes()
+    out.data += bytes(align(len(out.data)) - len(out.data))
+    return bytes(out.data)
+
+def compile_pack(path, levels, generator=None):
+    # Run each level through Game.create_level and store the result, so the
+    # pack holds exactly what the game would have built.
+    from game import Game
+    game = Game(headless=True, verbose=False, seed=0, generator=generator)
+    blobs = []
+    for level_num in levels:
+        game.create_level(level_num)
+        blobs.append(compile_level(level_from_game(game)))
+    table = HEADER.size + ENTRY.size * len(blobs)
+    offset = align(table)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(blobs)))
+        for blob in blobs:
+            f.write(ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        f.write(bytes(align(table) - table))
+        for blob in blobs:
+            f.write(blob)
+
+class CompiledLevel:
+    # One level of a pack, shaped like levelgen.FacilityLayout so Game.load_layout
+    # accepts it. Entity tuples are built on first use and kept, and `baked`
+    # hands Game.rebuild_level_caches the precomputed grid and occlusion maps.
+    def __init__(self, buffer, offset):
+        fields = LEVEL.unpack_from(buffer, offset)
+        self.bounds, self.player_start, self.objective = fields[0:4], fields[4:6], fields[6:8]
+        self.cell_size, self.resolution = fields[8], fields[9]
+        walls, cameras, lasers, terminals, cells, refs = fields[10:]
+        read = Reader(buffer, align(offset + LEVEL.size))
+        self.wall_array = read.take('<f8', walls, 6)
+        self.camera_array = read.take('<f8', cameras, 3)
+        self.laser_array = read.take('<f8', lasers, 4)
+        self.laser_types = read.take('u1', lasers)
+        self.terminal_array = read.take('<f8', terminals, 2)
+        self.terminal_types = read.take('u1', terminals)
+        self.grid_keys = read.take('<i4', cells, 2)
+        self.grid_offsets = read.take('<i4', cells + 1)
+        self.grid_refs = read.take('<i4', refs)
+        self.occlusion_origins = read.take('<f8', cameras, 2)
+        self.occlusion_sizes = read.take('<i4', cameras)
+        self.occlusion_offsets = read.pos + np.concatenate(([0], np.cumsum(self.occlusion_sizes.astype(np.int64) ** 2)))
+        self.buffer, self.entities, self.grid_cells = buffer, None, None
+        self.baked = self
+
+    def load_entities(self):
+        types = self.laser_types.tolist()
+        terminal_types = self.terminal_types.tolist()
+        self.entities = ([tuple(w) for w in self.wall_array.tolist()],
+                         [(x, z, int(direction)) for x, z, direction in self.camera_array.tolist()],
+                         [(*l, LASER_TYPES[t]) for l, t in zip(self.laser_array.tolist(), types)],
+                         [(*t, TERMINAL_TYPES[k]) for t, k in zip(self.terminal_array.tolist(), terminal_types)])
+
+    @property
+    def walls(self):
+        if self.entities is None:
+            self.load_entities()
+        return self.entities[0]
+
+    @property
+    def cameras(self):
+        if self.entities is None:
+            self.load_entities()
+        return self.entities[1]
+
+    @property
+    def lasers(self):
+        if self.entities is None:
+            self.load_entities()
+        return self.entities[2]
+
+    @property
+    def terminals(self):
+        if self.entities is None:
+            self.load_entities()
+        return self.entities[3]
+
+    def wall_grid(self, walls):
+        from game import WallGrid
+        if self.grid_cells is None:
+            offsets, refs = self.grid_offsets.tolist(), self.grid_refs.tolist()
+            self.grid_cells = {tuple(key): refs[offsets[i]:offsets[i + 1]] for i, key in enumerate(self.grid_keys.tolist())}
+        return WallGrid(walls, self.cell_size, self.grid_cells)
+
+    def occlusion(self, i):
+        # (x0, z0, cells) for camera i; cells is a read-only view into the pack.
+        n = int(self.occlusion_sizes[i])
+        cells = np.frombuffer(self.buffer, dtype=np.int8, count=n * n, offset=int(self.occlusion_offsets[i])).reshape(n, n)
+        x0, z0 = self.occlusion_origins[i].tolist()
+        return x0, z0, cells
+
+class LevelPack:
+    # Level source for Game, like levelgen.FacilityGenerator. Levels past the
+    # end of the pack repeat the last one.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a Cyber Heist level pack")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported level pack version {version}")
+        self.entries = [ENTRY.unpack_from(self.buffer, HEADER.size + ENTRY.size * i) for i in range(count)]
+        self.levels = [None] * count
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __call__(self, level_num):
+        i = min(max(level_num, 1), len(self.entries)) - 1
+        if self.levels[i] is None:
+            self.levels[i] = CompiledLevel(self.buffer, self.entries[i][0])
+        return self.levels[i]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="pack to write (or read with --info)")
+    parser.add_argument('--levels', type=int, default=8, help="compile levels 1..N")
+    parser.add_argument('--facility', type=int, help="compile generated facilities with this seed")
+    parser.add_argument('--info', action='store_true', help="describe an existing pack")
+    args = parser.parse_args()
+
+    if not args.info:
+        generator = None
+        if args.facility is not None:
+            import levelgen
+            generator = levelgen.FacilityGenerator(args.facility)
+        start = time.perf_counter()
+        compile_pack(args.path, range(1, args.levels + 1), generator)
+        print(f"Compiled {args.levels} levels to {args.path} ({os.path.getsize(args.path) / 1024:.1f} KB) "
+              f"in {time.perf_counter() - start:.2f}s")
+        return
+    pack = LevelPack(args.path)
+    print(f"{args.path}: {len(pack)} levels, version {VERSION}")
+    for level_num in range(1, len(pack) + 1):
+        level = pack(level_num)
+        size = pack.entries[level_num - 1][1]
+        print(f"  level {level_num}: {len(level.wall_array)} walls, {len(level.camera_array)} cameras, "
+              f"{len(level.laser_array)} lasers, {len(level.terminal_array)} terminals, {size / 1024:.1f} KB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Offscreen OpenGL contexts on Mesa's software rasterizer (llvmpipe).
+
+PyOpenGL picks its platform when it is first imported, so import this module
+before game:
+
+    import offscreen
+    context = offscreen.create_context(1024, 768)
+    import game
+"""
+import ctypes, os, sys
+
+if 'OpenGL' in sys.modules and os.environ.get('PYOPENGL_PLATFORM') != 'egl':
+    raise ImportError("offscreen must be imported before OpenGL/game so PyOpenGL can use EGL")
+os.environ['PYOPENGL_PLATFORM'] = 'egl'
+
+from OpenGL import EGL
+
+class OffscreenContext:
+    def __init__(self, display, surface, context, width, height):
+        self.display, self.surface, self.context = display, surface, context
+        self.width, self.height = width, height
+    
+    def make_current(self):
+        EGL.eglMakeCurrent(self.display, self.surface, self.surface, self.context)
+    
+    def release(self):
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroySurface(self.display, self.surface)
+        EGL.eglDestroyContext(self.display, self.context)
+
+def create_context(width, height):
+    # Without an X display, ask Mesa for its surfaceless platform.
+    if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("eglInitialize failed")
+    attributes = (EGL.EGLint * 13)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RED_SIZE, 8,
+                                   EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24,
+                                   EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+    config, count = EGL.EGLConfig(), EGL.EGLint()
+    if not EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count)) or not count.value:
+        raise RuntimeError("no EGL config with desktop OpenGL and pbuffer support")
+    surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not context:
+        raise RuntimeError("eglCreateContext failed")
+    offscreen = OffscreenContext(display, surface, context, width, height)
+    offscreen.make_current()
+    return offscreen
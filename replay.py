@@ -0,0 +1,235 @@
+"""Compact input recordings and fast deterministic replay.
+
+A recording holds everything the simulation reads from the player: the
+movement keys held on every tick, run-length encoded, and the discrete
+commands (hacking, level changes, view toggles) in the order they happened.
+The header carries the game seed and facility generator so replay rebuilds
+the exact same levels, and a trailer stores the outcome the player saw.
+
+    python game.py --record bug.chr            # play and record
+    python replay.py bug.chr                   # replay headlessly and verify
+    python replay.py --corpus runs/ --missions 500
+    python replay.py runs/*.chr                # check the whole corpus
+"""
+import argparse, atexit, glob, json, os, struct, sys, time
+
+MAGIC, VERSION = b'CHRP', 1
+HEADER = struct.Struct('<4sBQH')
+OUTCOME = struct.Struct('<QQBIiB3d')
+
+# Everything Player.update reads, one bit per key.
+MASK_KEYS = (b'w', b'W', b'a', b'A', b's', b'S', b'd', b'D', 'up', 'down', 'left', 'right', b' ')
+COMMANDS = ('try_hack', 'submit_hack', 'cancel', 'next_level', 'restart_game', 'toggle_view')
+STATES = ('playing', 'hacking', 'game_over', 'won')
+OP_TICKS, OP_END = 0x00, 0xFF
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def key_mask(keys):
+    mask = 0
+    for bit, key in enumerate(MASK_KEYS):
+        if keys.get(key, False):
+            mask |= 1 << bit
+    return mask
+
+def mask_keys(mask):
+    return {key: True for bit, key in enumerate(MASK_KEYS) if mask >> bit & 1}
+
+def generator_config(generator):
+    if generator is None:
+        return {}
+    if hasattr(generator, 'path'):
+        return {'pack': generator.path}
+    return {'seed': generator.seed, 'base_rooms': generator.base_rooms, 'params': generator.params}
+
+def game_outcome(game, updates):
+    p = game.player.position
+    return (updates, game.clock.ticks, STATES.index(game.state), game.level, game.score,
+            game.hack_lives, p.x, p.y, p.z)
+
+class InputLog:
+    # Attached as Game.input_log. Game.update reports the held keys each tick and
+    # the command methods report themselves; identical ticks collapse into one
+    # (count, mask) record.
+    def __init__(self, path, game):
+        self.game, self.updates = game, 0
+        self.mask, self.count = None, 0
+        self.file = open(path, 'wb')
+        config = json.dumps(generator_config(game.generator)).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, game.seed, len(config)) + config)
+        self.buffer = bytearray()
+        game.input_log = self
+
+    def tick(self, keys):
+        self.updates += 1
+        mask = key_mask(keys)
+        if mask != self.mask:
+            self.flush_ticks()
+            self.mask = mask
+        self.count += 1
+
+    def command(self, name, text=None):
+        self.flush_ticks()
+        self.mask = None
+        self.buffer.append(1 + COMMANDS.index(name))
+        if name == 'submit_hack':
+            data = text.encode('ascii', 'replace')[:255]
+            self.buffer.append(len(data))
+            self.buffer += data
+
+    def flush_ticks(self):
+        if self.count:
+            self.buffer.append(OP_TICKS)
+            write_varint(self.buffer, self.count)
+            self.buffer += struct.pack('<H', self.mask)
+            self.count = 0
+        if len(self.buffer) > 1 << 16:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush_ticks()
+        self.buffer.append(OP_END)
+        self.buffer += OUTCOME.pack(*game_outcome(self.game, self.updates))
+        self.file.write(self.buffer)
+        self.file.close()
+        if self.game.input_log is self:
+            self.game.input_log = None
+
+def record(path, game):
+    # Record an interactive session; the file is finalized when the process exits.
+    log = InputLog(path, game)
+    atexit.register(log.close)
+    return log
+
+def load(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, seed, config_len = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a Cyber Heist recording")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported recording version {version}")
+    pos = HEADER.size
+    config = json.loads(data[pos:pos + config_len])
+    return seed, config, data, pos + config_len
+
+def replay(path, on_tick=None):
+    # Re-run a recording headlessly as fast as possible. Returns (expected, actual)
+    # outcome tuples; expected is None if the recording was cut off. on_tick,
+    # if given, is called with the game after every update.
+    from game import Game
+    seed, config, data, pos = load(path)
+    generator = None
+    if 'pack' in config:
+        import levelpack
+        generator = levelpack.LevelPack(config['pack'])
+    elif config:
+        import levelgen
+        generator = levelgen.FacilityGenerator(config['seed'], config['base_rooms'], **config['params'])
+    game = Game(headless=True, verbose=False, seed=seed, generator=generator)
+    updates, expected = 0, None
+    while pos < len(data):
+        op = data[pos]
+        pos += 1
+        if op == OP_TICKS:
+            count, pos = read_varint(data, pos)
+            game.keys = mask_keys(struct.unpack_from('<H', data, pos)[0])
+            pos += 2
+            for _ in range(count):
+                game.update()
+                if on_tick is not None:
+                    on_tick(game)
+            updates += count
+        elif op == OP_END:
+            expected = OUTCOME.unpack_from(data, pos)
+            break
+        else:
+            name = COMMANDS[op - 1]
+            if name == 'submit_hack':
+                length = data[pos]
+                game.submit_hack(data[pos + 1:pos + 1 + length].decode('ascii'))
+                pos += 1 + length
+            elif name == 'cancel':
+                game.cancel_hack()
+            else:
+                getattr(game, name)()
+    return expected, game_outcome(game, updates)
+
+def record_corpus(directory, missions, seed=0, facility=None, max_ticks=None):
+    from game import FPS, Game, make_random_policy, run_mission
+    generator = None
+    if facility is not None:
+        import levelgen
+        generator = levelgen.FacilityGenerator(facility)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(missions):
+        game = Game(headless=True, verbose=False, seed=seed + i, generator=generator)
+        path = os.path.join(directory, f"mission_{seed + i:06d}.chr")
+        log = InputLog(path, game)
+        run_mission(game, make_random_policy(seed + i), max_ticks or FPS * 130)
+        log.close()
+        paths.append(path)
+    return paths
+
+def describe(outcome):
+    updates, ticks, state, level, score, lives = outcome[:6]
+    return f"{STATES[state]} level {level} score {score} lives {lives} after {ticks} ticks"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help="recordings or directories of recordings to replay")
+    parser.add_argument('--corpus', metavar='DIR', help="record random-policy missions into DIR")
+    parser.add_argument('--missions', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--facility', type=int, help="use generated facilities with this seed")
+    args = parser.parse_args()
+
+    if args.corpus:
+        start = time.perf_counter()
+        paths = record_corpus(args.corpus, args.missions, args.seed, args.facility)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"Recorded {len(paths)} missions to {args.corpus} ({size / 1024:.1f} KB) in {time.perf_counter() - start:.2f}s")
+        return
+
+    paths = []
+    for path in args.paths:
+        paths.extend(sorted(glob.glob(os.path.join(path, '*.chr'))) if os.path.isdir(path) else [path])
+    if not paths:
+        parser.error("no recordings given")
+
+    failures, ticks = 0, 0
+    start = time.perf_counter()
+    for path in paths:
+        expected, actual = replay(path)
+        ticks += actual[0]
+        if expected is None:
+            print(f"{path}: {describe(actual)} (no recorded outcome)")
+        elif expected != actual:
+            failures += 1
+            print(f"{path}: MISMATCH\n  recorded: {describe(expected)}\n  replayed: {describe(actual)}")
+        elif len(paths) == 1:
+            print(f"{path}: {describe(actual)}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)} recordings, {ticks} ticks in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s), {failures} mismatched")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Batch episode runner for difficulty tuning.
+
+Runs independent headless Game instances across a process pool and streams
+outcomes back as they finish, so memory stays flat no matter how many
+episodes are requested.
+
+    python runner.py --episodes 20000 --levels 1-8 --policy random --out runs.jsonl
+"""
+import argparse, json, multiprocessing, os, time
+
+from game import FPS, Game, make_navigator_policy, make_random_policy
+
+KEY_NAMES = {'space': b' ', 'up': 'up', 'down': 'down', 'left': 'left', 'right': 'right'}
+
+def make_scripted_policy(script):
+    # script is a list of (ticks, actions) segments, e.g. [(60, ['w']), (1, ['hack'])].
+    # Actions are key names ('w', 'a', 'space', 'up', ...) plus 'hack', which
+    # opens the nearest terminal and types the correct sequence.
+    steps = []
+    for ticks, actions in script:
+        keys = {KEY_NAMES.get(a, a.encode()): True for a in actions if a != 'hack'}
+        steps.extend([(keys, 'hack' in actions)] * ticks)
+    def policy(game):
+        tick = game.clock.ticks
+        keys, hack = steps[tick] if tick < len(steps) else ({}, False)
+        if hack and game.state == 'playing':
+            game.try_hack()
+            if game.hacking:
+                game.submit_hack(game.hack_sequence)
+        return keys
+    return policy
+
+POLICIES = {'random': make_random_policy, 'navigate': make_navigator_policy, 'idle': lambda seed: (lambda game: {})}
+
+def build_policy(spec, seed):
+    if isinstance(spec, (list, tuple)):
+        return make_scripted_policy(spec)
+    return POLICIES[spec](seed)
+
+def run_episode(job):
+    seed, level, policy_spec, max_ticks, campaign = job
+    game = Game(headless=True, verbose=False, seed=seed)
+    # Enter the level the way a player does, including next_level's time penalty.
+    for _ in range(level - 1):
+        game.next_level()
+    policy = build_policy(policy_spec, seed)
+    ticks = 0
+    while ticks < max_ticks:
+        if game.state == 'won' and campaign:
+            game.next_level()
+        if game.state not in ('playing', 'hacking'):
+            break
+        game.step(policy(game))
+        ticks += 1
+    return {'seed': seed, 'start_level': level, 'level': game.level, 'state': game.state,
+            'reason': game.game_over_reason, 'score': game.score, 'time_bonus': game.time_bonus, 'ticks': ticks}
+
+class Summary:
+    def __init__(self):
+        self.episodes, self.ticks, self.by_level = 0, 0, {}
+    
+    def add(self, result):
+        self.episodes += 1
+        self.ticks += result['ticks']
+        level = self.by_level.setdefault(result['start_level'], {'runs': 0, 'wins': 0, 'score': 0, 'time_bonus': 0,
+                                                                 'reached': 0, 'outcomes': {}})
+        level['runs'] += 1
+        level['wins'] += result['state'] == 'won'
+        level['score'] += result['score']
+        level['time_bonus'] += result['time_bonus']
+        level['reached'] = max(level['reached'], result['level'])
+        outcome = result['reason'] or result['state'].upper()
+        level['outcomes'][outcome] = level['outcomes'].get(outcome, 0) + 1
+    
+    def report(self, elapsed):
+        print(f"{self.episodes} episodes, {self.ticks} ticks in {elapsed:.2f}s "
+              f"({self.episodes / max(elapsed, 1e-9):.0f} episodes/s, {self.ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+        for level_num in sorted(self.by_level):
+            level = self.by_level[level_num]
+            runs = level['runs']
+            print(f"Level {level_num}: win rate {level['wins'] / runs:.1%}, mean score {level['score'] / runs:.0f}, "
+                  f"mean time bonus {level['time_bonus'] / runs:.0f}, highest level reached {level['reached']}")
+            for outcome, count in sorted(level['outcomes'].items(), key=lambda item: -item[1]):
+                print(f"    {outcome}: {count / runs:.1%}")
+
+def jobs(episodes, levels, policy, max_ticks, campaign, seed):
+    for i in range(episodes):
+        yield seed + i, levels[i % len(levels)], policy, max_ticks, campaign
+
+def run_batch(episodes, levels=(1,), policy='random', max_ticks=FPS * 130, campaign=False, seed=0,
+              workers=None, out=None, chunksize=16):
+    summary = Summary()
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+        for result in pool.imap_unordered(run_episode, jobs(episodes, levels, policy, max_ticks, campaign, seed), chunksize):
+            summary.add(result)
+            if out:
+                out.write(json.dumps(result) + '\n')
+    return summary, time.perf_counter() - start
+
+def parse_levels(text):
+    if '-' in text:
+        first, last = text.split('-')
+        return list(range(int(first), int(last) + 1))
+    return [int(level) for level in text.split(',')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless Cyber Heist episodes in parallel.")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--levels', type=parse_levels, default=[1], help="e.g. 3, 1-8 or 1,4,7")
+    parser.add_argument('--policy', default='random', help="random, navigate, idle, or a JSON file with a [[ticks, [actions]], ...] script")
+    parser.add_argument('--campaign', action='store_true', help="continue to the next level after each win")
+    parser.add_argument('--max-ticks', type=int, default=FPS * 130)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', help="stream one JSON line per episode to this file")
+    args = parser.parse_args(argv)
+    
+    policy = args.policy
+    if policy not in POLICIES:
+        with open(policy) as f:
+            policy = [tuple(segment) for segment in json.load(f)]
+    out = open(args.out, 'w') if args.out else None
+    try:
+        summary, elapsed = run_batch(args.episodes, args.levels, policy, args.max_ticks, args.campaign,
+                                     args.seed, args.workers, out)
+    finally:
+        if out:
+            out.close()
+    summary.report(elapsed)
+
+if __name__ == '__main__':
+    main()
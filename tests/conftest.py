@@ -0,0 +1,30 @@
+import os, sys
+
+# The game and its tools are top-level modules in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game import run_mission
+
+def snapshot(game):
+    # Everything a tick can change that the equivalence tests compare. Camera
+    # angles are synced first, as rendering does.
+    if game.camera_schedule is not None:
+        game.camera_schedule.sync()
+    p = game.player.position
+    return {'state': game.state, 'level': game.level, 'score': game.score, 'player': (p.x, p.y, p.z),
+            'cameras': [(c.angle, c.rotating, c.disabled, c.is_detecting, c.detection_time) for c in game.cameras],
+            'lasers': [(laser.segment, laser.active) for laser in game.lasers],
+            'terminals': [terminal.hacked for terminal in game.terminals],
+            'objective': (game.objective.position.x, game.objective.position.z)}
+
+def trace_mission(game, policy, max_ticks, trace):
+    # run_mission with the game appended to trace before every tick and once
+    # more at the end. Occlusion memory is left out of the result: compiled
+    # levels load every map baked, built levels bake them lazily.
+    def traced(game):
+        trace.append(snapshot(game))
+        return policy(game)
+    result = run_mission(game, traced, max_ticks)
+    trace.append(snapshot(game))
+    del result['occlusion_bytes']
+    return result
@@ -0,0 +1,77 @@
+import pytest
+
+import levelgen
+from conftest import trace_mission
+from game import Game, TimerWheel, make_random_policy
+
+# (seed, level, facility generator) missions that between them see cameras
+# detect, raise the alarm, get hacked, and run with up to 37 cameras.
+MISSIONS = [(1, 1, None), (4, 1, None), (3, 3, None), (1, 6, None), (3, 1, 3), (3, 6, 3)]
+
+class EveryTickGame(Game):
+    # The camera loop CameraArray and CameraSchedule replace: every camera is
+    # rotated and tested on every tick, stopping at the first alarm.
+    def update_cameras(self):
+        dt = self.clock.dt
+        if self.terminal_hacked('camera'):
+            for camera in self.cameras:
+                camera.disabled = True
+                camera.update(dt)
+            return
+        for camera in self.cameras:
+            camera.update(dt)
+            if camera.update_detection(self.player, self.walls, self.clock.time, self.wall_grid) == 'alarm':
+                self.game_over("CAUGHT IN CAMERA'S RED VISION CONE!")
+                return
+
+def camera_trace(cls, seed, level, facility):
+    game = cls(headless=True, verbose=False, seed=seed,
+               generator=levelgen.FacilityGenerator(facility) if facility else None)
+    for _ in range(level - 1):
+        game.next_level()
+    trace = []
+    result = trace_mission(game, make_random_policy(seed), 60 * 40, trace)
+    return game, result, trace
+
+@pytest.fixture(scope='module')
+def every_tick_traces():
+    # The reference both camera paths are compared with, run once per module.
+    return [camera_trace(EveryTickGame, *mission)[1:] for mission in MISSIONS]
+
+def assert_matches(every_tick_traces, uses_path):
+    for mission, expected in zip(MISSIONS, every_tick_traces):
+        game, result, trace = camera_trace(Game, *mission)
+        assert uses_path(game)
+        assert (result, trace) == expected
+    cameras = [camera for _, trace in every_tick_traces for tick in trace for camera in tick['cameras']]
+    assert any(result['reason'] == "CAUGHT IN CAMERA'S RED VISION CONE!" for result, _ in every_tick_traces)
+    assert any(is_detecting for _, _, _, is_detecting, _ in cameras)
+    assert any(disabled for _, _, disabled, _, _ in cameras)
+
+def test_camera_array_matches_every_tick_loop(every_tick_traces, monkeypatch):
+    monkeypatch.setattr('game.BATCH_CAMERA_THRESHOLD', 0)
+    assert_matches(every_tick_traces, lambda game: game.camera_array is not None)
+
+def test_camera_schedule_matches_every_tick_loop(every_tick_traces):
+    assert_matches(every_tick_traces, lambda game: game.camera_schedule is not None)
+
+def test_timer_wheel_keeps_events_beyond_a_revolution():
+    wheel = TimerWheel(size=8)
+    for delay, item in ((0, 'next tick'), (3, 'soon'), (11, 'second lap'), (19, 'third lap')):
+        wheel.schedule(delay, item)
+    fired = {item: wheel.tick for _ in range(24) for item in wheel.advance()}
+    assert fired == {'next tick': 1, 'soon': 3, 'second lap': 11, 'third lap': 19}
+
+def test_sleeps_longer_than_the_wheel_match_every_tick_loop():
+    # 9.5 s between turns is 570 ticks, more than one revolution of the
+    # schedule's 512-slot wheel.
+    traces = []
+    for cls in (EveryTickGame, Game):
+        game = cls(headless=True, verbose=False, seed=3, generator=levelgen.FacilityGenerator(3))
+        for camera in game.cameras:
+            camera.rotation_interval = 9.5
+        game.rebuild_level_caches()
+        trace = []
+        traces.append((trace_mission(game, make_random_policy(3), 60 * 40, trace), trace))
+    assert traces[0] == traces[1]
+    assert sum(any(rotating for _, rotating, _, _, _ in tick['cameras']) for tick in traces[1][1]) > 100
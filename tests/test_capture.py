@@ -0,0 +1,55 @@
+import os, subprocess, sys
+
+import numpy as np
+import pytest
+
+import replay
+from game import FPS, WINDOW_HEIGHT, WINDOW_WIDTH, Game, make_random_policy, run_mission
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+
+@pytest.fixture(scope='module')
+def egl():
+    # offscreen has to be imported before PyOpenGL, so every capture runs in its
+    # own process.
+    probe = run('-c', "import offscreen; offscreen.create_context(16, 16)")
+    if probe.returncode:
+        pytest.skip("no EGL context available: " + probe.stderr.strip().splitlines()[-1])
+
+def record_game_over(path, idle_updates):
+    # A lost mission, then idle_updates more updates on the game over screen,
+    # where the game clock no longer advances.
+    game = Game(headless=True, verbose=False, seed=1)
+    log = replay.InputLog(path, game)
+    run_mission(game, make_random_policy(1), FPS * 130)
+    assert game.state == 'game_over'
+    ticks = game.clock.ticks
+    for _ in range(idle_updates):
+        game.step({})
+    assert game.clock.ticks == ticks
+    log.close()
+    return ticks + idle_updates
+
+def test_frame_count_follows_recording_not_outcome(egl, tmp_path):
+    recording = str(tmp_path / 'lost.chr')
+    updates = record_game_over(recording, 61)
+    out = tmp_path / 'frames.rgb'
+    result = run('capture.py', recording, str(out), '--format', 'raw', '--every', '4')
+    assert result.returncode == 0, result.stderr
+    frame_bytes = WINDOW_WIDTH * WINDOW_HEIGHT * 3
+    assert out.stat().st_size == (updates // 4) * frame_bytes
+    assert f"Captured {updates // 4} frames" in result.stdout
+
+def test_offscreen_frames_have_hud_text(egl, tmp_path):
+    recording = str(tmp_path / 'lost.chr')
+    record_game_over(recording, 0)
+    out = tmp_path / 'frame.rgb'
+    result = run('capture.py', recording, str(out), '--format', 'raw', '--limit', '1')
+    assert result.returncode == 0, result.stderr
+    frame = np.fromfile(out, dtype=np.uint8).reshape(WINDOW_HEIGHT, WINDOW_WIDTH, 3)
+    # "Level: 1" sits on the first HUD line, baseline 30 px from the top.
+    hud = frame[15:35, 20:120]
+    assert (hud == 255).all(axis=-1).sum() > 50
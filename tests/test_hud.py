@@ -0,0 +1,31 @@
+from game import Game
+
+def baseline_line(cam_id, progress):
+    # The detection readout as the HUD printed it before HUD caching.
+    for minimum, label in ((0.8, "ALARM TRIGGERED!"), (0.6, "CRITICAL DANGER"), (0.4, "DANGER"), (0.2, "WARNING")):
+        if progress >= minimum:
+            return f"Camera {cam_id}: {label} - {progress*100:.0f}%"
+    return f"Camera {cam_id}: DETECTED - {progress*100:.0f}%"
+
+def detection_lines(game):
+    return [text for _, _, text, _ in game.layout_hud(game.hud_key()) if text.startswith("Camera ") and " - " in text]
+
+def test_detection_readout_shows_true_progress():
+    game = Game(headless=True, verbose=False, seed=0)
+    camera = game.cameras[0]
+    camera.is_detecting = True
+    for step in range(0, 1300):
+        progress = step / 1000
+        camera.detection_time = progress * camera.detection_threshold
+        assert detection_lines(game) == [baseline_line(1, min(progress, 1.0))]
+
+def test_hud_key_changes_only_with_readout():
+    game = Game(headless=True, verbose=False, seed=0)
+    camera = game.cameras[0]
+    camera.is_detecting = True
+    camera.detection_time = 0.4201 * camera.detection_threshold
+    key = game.hud_key()
+    camera.detection_time = 0.4249 * camera.detection_threshold
+    assert game.hud_key() == key
+    camera.detection_time = 0.4251 * camera.detection_threshold
+    assert game.hud_key() != key
@@ -0,0 +1,96 @@
+import math, random
+
+import numpy as np
+
+from game import Laser, Player, Vector3, laser_hits_many, laser_hits_player, laser_touches
+
+def static_check(px, py, pz, x1, z1, x2, z2):
+    # Laser.check_collision before swept collision: the end-of-tick snapshot only.
+    if py > 0.8:
+        return False
+    A, B, C = z2 - z1, x1 - x2, x2 * z1 - x1 * z2
+    distance = abs(A * px + B * pz + C) / math.sqrt(A * A + B * B)
+    if distance < 0.3:
+        return min(x1, x2) - 0.3 <= px <= max(x1, x2) + 0.3 and min(z1, z2) - 0.3 <= pz <= max(z1, z2) + 0.3
+    return False
+
+def test_fast_player_crossing_moving_beam_is_caught():
+    # The player runs from z=1 to z=-1 while a sliding beam moves from z=0 to
+    # z=0.5, so they pass through each other between ticks.
+    laser = Laser(-2, 0, 2, 0, 'sliding')
+    laser.previous_segment, laser.segment = (-2, 0, 2, 0), (-2, 0.5, 2, 0.5)
+    player = Player()
+    player.previous_position, player.position = Vector3(0, 0.5, 1), Vector3(0, 0.5, -1)
+    assert not static_check(0, 0.5, -1, -2, 0.5, 2, 0.5)
+    assert laser.check_collision(player)
+
+def test_player_jumping_over_crossing_beam_is_not_caught():
+    laser = Laser(-2, 0, 2, 0)
+    player = Player()
+    player.previous_position, player.position = Vector3(0, 1.5, 1), Vector3(0, 1.5, -1)
+    assert not laser.check_collision(player)
+
+def sampled_touch(p0, p1, previous, current, samples=400):
+    # Ground truth: laser_touches at many times across the tick, on the
+    # linearly interpolated player and beam.
+    for k in range(samples + 1):
+        t = k / samples
+        lerp = lambda a, b: a + t * (b - a)
+        if lerp(p0.y, p1.y) <= 0.8 and laser_touches(lerp(p0.x, p1.x), lerp(p0.z, p1.z),
+                                                    *(lerp(a, b) for a, b in zip(previous, current))):
+            return True
+    return False
+
+def test_diagonal_crossing_under_half_width_per_axis_is_caught():
+    # Every coordinate moves by 0.29, but the player and beam close about 0.82
+    # along the diagonal, more than the 0.6-wide band.
+    p0, p1 = Vector3(0.2475, 0.5, -0.2475), Vector3(-0.0425, 0.5, 0.0425)
+    previous, current = (-5, -5, 5, 5), (-4.71, -5.29, 5.29, 4.71)
+    assert not static_check(p1.x, p1.y, p1.z, *current)
+    assert sampled_touch(p0, p1, previous, current)
+    assert laser_hits_player(p0, p1, previous, current)
+    assert laser_hits_many(*(np.array([v]) for v in (p0.x, p0.y, p0.z, p1.x, p1.y, p1.z) + previous + current))[0]
+
+def test_sweep_matches_sampled_ground_truth():
+    # Small and large moves, jumps included. Ticks that start touching are
+    # skipped: the previous tick's end would already have caught them.
+    rng = random.Random(7)
+    hits = 0
+    for step in (0.29, 1.0):
+        for _ in range(3000):
+            x1, z1 = rng.uniform(-3, 3), rng.uniform(-3, 3)
+            x2, z2 = x1 + rng.uniform(-4, 4), z1 + rng.uniform(-4, 4)
+            px, py, pz = rng.uniform(-5, 5), rng.choice((0.5, 0.5, 1.0)), rng.uniform(-5, 5)
+            jitter = lambda: rng.uniform(-step, step)
+            previous, current = (x1 + jitter(), z1 + jitter(), x2 + jitter(), z2 + jitter()), (x1, z1, x2, z2)
+            p0, p1 = Vector3(px + jitter(), py + rng.choice((0, 0, 0.6, -0.6)), pz + jitter()), Vector3(px, py, pz)
+            if p0.y <= 0.8 and laser_touches(p0.x, p0.z, *previous):
+                continue
+            expected = sampled_touch(p0, p1, previous, current)
+            hits += expected
+            assert laser_hits_player(p0, p1, previous, current) == expected
+    assert hits > 50
+
+def test_laser_touches_matches_static_check():
+    rng = random.Random(11)
+    for _ in range(20000):
+        x1, z1, x2, z2 = (rng.uniform(-3, 3) for _ in range(4))
+        px, pz = rng.uniform(-4, 4), rng.uniform(-4, 4)
+        assert laser_touches(px, pz, x1, z1, x2, z2) == static_check(px, 0.5, pz, x1, z1, x2, z2)
+
+def test_batched_hits_match_scalar():
+    # Agents x lasers through laser_hits_many must agree with laser_hits_player
+    # pair by pair, small moves included.
+    rng = random.Random(3)
+    rows = []
+    for _ in range(5000):
+        step = rng.choice((0.1, 0.5, 2.0))
+        x1, z1, x2, z2 = (rng.uniform(-3, 3) for _ in range(4))
+        previous = tuple(v + rng.uniform(-step, step) for v in (x1, z1, x2, z2))
+        p1 = (rng.uniform(-4, 4), rng.choice((0.5, 1.0)), rng.uniform(-4, 4))
+        p0 = (p1[0] + rng.uniform(-step, step), p1[1], p1[2] + rng.uniform(-step, step))
+        rows.append(p0 + p1 + previous + (x1, z1, x2, z2))
+    columns = np.array(rows).T
+    batched = laser_hits_many(*columns)
+    for row, hit in zip(rows, batched.tolist()):
+        assert laser_hits_player(Vector3(*row[0:3]), Vector3(*row[3:6]), row[6:10], row[10:14]) == hit
@@ -0,0 +1,19 @@
+import levelgen
+from game import Objective, Terminal, Vector3
+
+def test_reach_matches_the_game():
+    # A player standing at the horizontal reach is just inside the game's 3D reach.
+    player = Vector3(0, 0.5, 0)
+    assert player.distance_to(Terminal(levelgen.HACK_RANGE - 1e-6, 0, 'camera').position) < 2
+    assert player.distance_to(Terminal(levelgen.HACK_RANGE + 1e-6, 0, 'camera').position) >= 2
+    assert player.within(Objective(levelgen.OBJECTIVE_RANGE - 1e-6, 0).position, 1.5)
+    assert not player.within(Objective(levelgen.OBJECTIVE_RANGE + 1e-6, 0).position, 1.5)
+
+def test_objective_beyond_standing_reach_is_unsolvable():
+    # The wall blocks walking past x=1.5, so the nearest reachable cell centre
+    # is 1.45 from the objective: inside a flat 1.5, outside the real 1.414.
+    wall = (2.5, 1.5, 0, 1, 3, 10)
+    layout = levelgen.FacilityLayout((-5, 5, -5, 5), (0, 0), [wall], [], [], [], (2.7, 0.25))
+    assert not levelgen.is_solvable(layout)
+    layout.objective = (2.6, 0.25)
+    assert levelgen.is_solvable(layout)
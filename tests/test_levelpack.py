@@ -0,0 +1,48 @@
+import numpy as np
+
+import levelgen
+from conftest import trace_mission
+from game import Game, make_navigator_policy, make_random_policy
+from levelpack import LevelPack, compile_pack
+
+def campaign_trace(generator, seed, policy, levels=3, max_ticks=60 * 40):
+    # A seeded mission that moves on to the next level whenever one is won.
+    game = Game(headless=True, verbose=False, seed=seed, generator=generator)
+    trace, results = [], []
+    while True:
+        results.append(trace_mission(game, policy, max_ticks, trace))
+        if game.state != 'won' or game.level >= levels:
+            return results, trace
+        game.next_level()
+
+def assert_baked_data_matches(path, generator):
+    # The wall grid and occlusion maps a pack stores against the ones the game
+    # derives for itself. Missions may never look through a wrong cell.
+    built = Game(headless=True, verbose=False, seed=0, generator=generator)
+    packed = Game(headless=True, verbose=False, seed=0, generator=LevelPack(path))
+    for level in range(1, 4):
+        built.create_level(level)
+        packed.create_level(level)
+        assert packed.wall_grid.cells == built.wall_grid.cells
+        for mine, theirs in zip(built.cameras, packed.cameras):
+            mine.occlusion_map.bake()
+            assert (theirs.occlusion_map.x0, theirs.occlusion_map.z0) == (mine.occlusion_map.x0, mine.occlusion_map.z0)
+            assert np.array_equal(theirs.occlusion_map.cells, mine.occlusion_map.cells)
+
+def assert_pack_matches(tmp_path, generator):
+    path = str(tmp_path / 'levels.chl')
+    compile_pack(path, range(1, 4), generator)
+    assert_baked_data_matches(path, generator)
+    reached = 1
+    for seed in range(3):
+        for make_policy in (make_navigator_policy, make_random_policy):
+            results, trace = campaign_trace(LevelPack(path), seed, make_policy(seed))
+            assert (results, trace) == campaign_trace(generator, seed, make_policy(seed))
+            reached = max(reached, results[-1]['level'])
+    assert reached >= 2
+
+def test_pack_of_builtin_levels_matches_builtin(tmp_path):
+    assert_pack_matches(tmp_path, None)
+
+def test_pack_of_facilities_matches_generator(tmp_path):
+    assert_pack_matches(tmp_path, levelgen.FacilityGenerator(3))
@@ -0,0 +1,33 @@
+import numpy as np
+
+import levelgen
+from game import Game, Wall
+from runner import run_episode
+
+def test_grid_kept_across_restart_and_owned_by_game():
+    game = Game(headless=True, verbose=False, seed=0, generator=levelgen.FacilityGenerator(3))
+    grid = game.navigation
+    field = grid.field(game.objective.position.x, game.objective.position.z, 0.8)
+    assert grid.walls is None
+    assert isinstance(field.distance, np.ndarray) and isinstance(field.toward, np.ndarray)
+    game.restart_game()
+    assert game.navigation is grid
+    assert grid.field(game.objective.position.x, game.objective.position.z, 0.8) is field
+    other = Game(headless=True, verbose=False, seed=0, generator=levelgen.FacilityGenerator(3))
+    assert other.navigation is not grid
+    game.next_level()
+    assert game.navigation is not grid
+
+def test_replaced_walls_get_a_new_grid():
+    game = Game(headless=True, verbose=False, seed=0)
+    grid = game.navigation
+    game.walls = game.walls + [Wall(0, 1.5, 0, 2, 3, 2)]
+    game.rebuild_level_caches()
+    assert game.navigation is not grid
+    x, z = game.navigation.center(game.navigation.cell(0, 0))
+    game.navigation.rasterize()
+    assert not game.navigation.open[game.navigation.cell(x, z)]
+
+def test_navigator_clears_level_one():
+    result = run_episode((0, 1, 'navigate', 60 * 130, False))
+    assert result['state'] == 'won'